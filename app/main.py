@@ -1,7 +1,23 @@
-from fastapi import FastAPI
+import time
+import asyncio
+import logging
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.routes import chatbot, resume
+from app.routes import admin, chatbot, resume
+from app.utils.browser_pool import BROWSER_POOL
+from app.repositories.supabase_http import close_supabase_http
+from app.utils.metrics import HTTP_REQUEST_SECONDS, HTTP_IN_FLIGHT, render_metrics
+from app.utils.usage import bind_request
+from app.utils.admission import AdmissionRejected
+from app.utils.upload_ingest import BodySizeLimitMiddleware
+from app.services.bulk_import_service import MAX_IMPORT_BYTES, shutdown_import_pool
+from app.utils.logging_config import setup_logging, shutdown_logging, bind_request_id
+from app.repositories.session_snapshots import restore_sessions, flush_sessions, run_snapshots
+
+setup_logging()
+logger = logging.getLogger("app.access")
 
 app = FastAPI(
     title="AI Enhanced Resume Assistant Backend",
@@ -9,6 +25,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Reject oversized request bodies before they are buffered (kept inside CORS so the 413 is readable by the browser)
+app.add_middleware(BodySizeLimitMiddleware, path_limits={"/resume/import": MAX_IMPORT_BYTES + 256 * 1024})
+
 # CORS for frontend/Lovable
 app.add_middleware(
     CORSMiddleware,
@@ -18,9 +37,83 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency metrics, labeled by route template so ids don't explode cardinality
+# Also binds the request id used to correlate log lines, and writes one access log line per request
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    HTTP_IN_FLIGHT.inc()
+    bind_request(request.scope)
+    request_id = bind_request_id(request.headers.get("x-request-id"))
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        HTTP_IN_FLIGHT.dec()
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method,
+            route=route_path,
+            status=str(status),
+        ).observe(elapsed)
+        logger.info(
+            "%s %s %s", request.method, route_path, status,
+            extra={"path": request.url.path, "status": status, "duration_ms": round(elapsed * 1000, 1)},
+        )
+
+# LLM-backed routes that could not be admitted in time get a fast 429 with a retry hint
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected(request: Request, exc: AdmissionRejected):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc), "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 # Routes
 app.include_router(chatbot.router, prefix="/chatbot")
 app.include_router(resume.router, prefix="/resume")
+app.include_router(admin.router, prefix="/admin")
+
+_snapshot_task = None
+
+@app.on_event("startup")
+async def start_session_snapshots():
+    global _snapshot_task
+    await asyncio.to_thread(restore_sessions)
+    _snapshot_task = asyncio.create_task(run_snapshots())
+
+@app.on_event("shutdown")
+async def flush_session_snapshots():
+    if _snapshot_task is not None:
+        _snapshot_task.cancel()
+    await asyncio.to_thread(flush_sessions)
+
+@app.on_event("shutdown")
+async def close_browser_pool():
+    await BROWSER_POOL.close()
+
+@app.on_event("shutdown")
+async def close_supabase_pool():
+    await close_supabase_http()
+
+@app.on_event("shutdown")
+async def close_import_pool():
+    shutdown_import_pool()
+
+@app.on_event("shutdown")
+async def flush_logs():
+    shutdown_logging()
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
 
 @app.get("/")
 def root():
@@ -0,0 +1,245 @@
+import os
+import json
+import uuid
+import sqlite3
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+from app.repositories.storage_repository import RESUME_BUCKET, STORAGE_CACHE
+from app.utils.byte_cache import ByteCache
+
+# Offline stand-ins for the Supabase resumes table and storage bucket, used for load
+# tests and benchmarks (DATA_BACKEND=local). They mirror ResumeRepository and
+# StorageRepository method for method.
+
+LOCAL_DATA_DIR = os.getenv("LOCAL_DATA_DIR", ".local_data")
+
+JSON_COLUMNS = {"resume_json", "preferences"}
+
+SCHEMA = """
+create table if not exists resumes (
+    id text primary key,
+    user_id text not null,
+    resume_json text,
+    resume_name text not null,
+    resume_html text,
+    preferences text,
+    original_file_path text,
+    source_type text,
+    created_at text not null,
+    updated_at text not null
+);
+create index if not exists resumes_user_name on resumes (user_id, resume_name);
+"""
+
+ALL_COLUMNS = (
+    "id", "user_id", "resume_json", "resume_name", "resume_html", "preferences",
+    "original_file_path", "source_type", "created_at", "updated_at",
+)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _parse_select(select: str):
+    if select.strip() == "*":
+        return list(ALL_COLUMNS)
+    names = [name.strip() for name in select.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ALL_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown resume columns: {unknown}")
+    return names
+
+
+class SqliteResumeRepository:
+    # SQLite-backed ResumeRepository
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def _run(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            rows = cursor.fetchall()
+            self._conn.commit()
+            return rows
+
+    async def _query(self, sql, params=()):
+        return await asyncio.to_thread(self._run, sql, params)
+
+    def _to_dicts(self, names, rows):
+        result = []
+        for row in rows:
+            item = dict(zip(names, row))
+            for name in JSON_COLUMNS & item.keys():
+                if item[name] is not None:
+                    item[name] = json.loads(item[name])
+            result.append(item)
+        return result
+
+    def _encode(self, row: dict):
+        values = {name: row.get(name) for name in ALL_COLUMNS}
+        for name in JSON_COLUMNS:
+            if values[name] is not None:
+                values[name] = json.dumps(values[name])
+        now = _now()
+        values["id"] = values["id"] or str(uuid.uuid4())
+        values["created_at"] = values["created_at"] or now
+        values["updated_at"] = values["updated_at"] or now
+        return values
+
+    async def get(self, resume_id, select="*", user_id=None):
+        names = _parse_select(select)
+        sql = f"select {', '.join(names)} from resumes where id = ?"
+        params = [resume_id]
+        if user_id is not None:
+            sql += " and user_id = ?"
+            params.append(user_id)
+        rows = self._to_dicts(names, await self._query(sql + " limit 1", params))
+        return rows[0] if rows else None
+
+    async def get_many(self, resume_ids, select="*"):
+        if not resume_ids:
+            return []
+        names = _parse_select(select)
+        placeholders = ", ".join("?" for _ in resume_ids)
+        rows = await self._query(f"select {', '.join(names)} from resumes where id in ({placeholders})", list(resume_ids))
+        return self._to_dicts(names, rows)
+
+    async def list_for_user(self, user_id, select="id, user_id, resume_name, source_type, created_at"):
+        names = _parse_select(select)
+        rows = await self._query(
+            f"select {', '.join(names)} from resumes where user_id = ? order by created_at desc", (user_id,)
+        )
+        return self._to_dicts(names, rows)
+
+    async def name_exists(self, user_id, resume_name, exclude_id=None):
+        rows = await self._query(
+            "select 1 from resumes where user_id = ? and resume_name = ? and id is not ? limit 1",
+            (user_id, resume_name, exclude_id),
+        )
+        return bool(rows)
+
+    async def insert(self, row, returning="id"):
+        rows = await self.insert_many([row], returning=returning)
+        return rows[0]
+
+    async def insert_many(self, rows, returning="id"):
+        encoded = [self._encode(row) for row in rows]
+        placeholders = ", ".join("?" for _ in ALL_COLUMNS)
+
+        def insert_all():
+            with self._lock:
+                self._conn.executemany(
+                    f"insert into resumes ({', '.join(ALL_COLUMNS)}) values ({placeholders})",
+                    [tuple(values[name] for name in ALL_COLUMNS) for values in encoded],
+                )
+                self._conn.commit()
+
+        await asyncio.to_thread(insert_all)
+        return await self.get_many([values["id"] for values in encoded], select=returning)
+
+    async def insert_with_unique_name(self, row):
+        # Same naming rules as the insert_resume_with_unique_name RPC, under one lock
+        def insert_unique():
+            with self._lock:
+                base_name = row["resume_name"].strip()
+                final_name = base_name
+                suffix = 0
+                while self._conn.execute(
+                    "select 1 from resumes where user_id = ? and resume_name = ?", (row["user_id"], final_name)
+                ).fetchone():
+                    suffix += 1
+                    final_name = f"{base_name} ({suffix})"
+                values = self._encode({**row, "resume_name": final_name})
+                self._conn.execute(
+                    f"insert into resumes ({', '.join(ALL_COLUMNS)}) values ({', '.join('?' for _ in ALL_COLUMNS)})",
+                    tuple(values[name] for name in ALL_COLUMNS),
+                )
+                self._conn.commit()
+                return {"id": values["id"], "resume_name": final_name}
+
+        return await asyncio.to_thread(insert_unique)
+
+    async def update(self, resume_id, values):
+        values = dict(values)
+        for name in JSON_COLUMNS & values.keys():
+            values[name] = json.dumps(values[name])
+        values["updated_at"] = _now()
+        assignments = ", ".join(f"{name} = ?" for name in values)
+        await self._query(f"update resumes set {assignments} where id = ?", [*values.values(), resume_id])
+        return [{"id": resume_id}]
+
+    async def delete(self, resume_id, returning="id, user_id, source_type, original_file_path"):
+        row = await self.get(resume_id, select=returning)
+        if row:
+            await self._query("delete from resumes where id = ?", (resume_id,))
+        return row
+
+
+class FilesystemStorageRepository:
+    # Directory-backed StorageRepository
+    def __init__(self, root: str, bucket: str = RESUME_BUCKET, cache: ByteCache = STORAGE_CACHE):
+        self.root = os.path.abspath(os.path.join(root, bucket))
+        self.bucket = bucket
+        self.cache = cache
+
+    def _file_path(self, path: str) -> str:
+        full = os.path.abspath(os.path.join(self.root, path))
+        if not full.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage path: {path}")
+        return full
+
+    async def download(self, path):
+        cached = self.cache.get(path)
+        if cached is not None:
+            return cached
+
+        def read():
+            try:
+                with open(self._file_path(path), "rb") as f:
+                    return f.read()
+            except FileNotFoundError:
+                return None
+
+        data = await asyncio.to_thread(read)
+        if data:
+            self.cache.put(path, data)
+        return data
+
+    async def upload(self, path, data, content_type="application/octet-stream", upsert=False):
+        full = self._file_path(path)
+
+        def write():
+            if os.path.exists(full) and not upsert:
+                raise FileExistsError(f"Storage object already exists: {path}")
+            os.makedirs(os.path.dirname(full), exist_ok=True)
+            with open(full, "wb") as f:
+                f.write(data)
+
+        await asyncio.to_thread(write)
+        self.cache.put(path, data)
+
+    async def remove(self, paths):
+        for path in paths:
+            try:
+                os.remove(self._file_path(path))
+            except FileNotFoundError:
+                pass
+            self.cache.pop(path)
+
+
+def use_local_backend() -> bool:
+    return os.getenv("DATA_BACKEND", "supabase").lower() == "local"
+
+
+def create_local_resume_repository():
+    return SqliteResumeRepository(os.path.join(LOCAL_DATA_DIR, "resumes.sqlite3"))
+
+
+def create_local_storage_repository():
+    return FilesystemStorageRepository(os.path.join(LOCAL_DATA_DIR, "storage"))
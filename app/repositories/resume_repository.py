@@ -0,0 +1,104 @@
+from app.repositories.supabase_http import SupabaseHTTP, columns, get_supabase_http
+
+RESUME_TABLE_PATH = "/rest/v1/resumes"
+INSERT_UNIQUE_RPC_PATH = "/rest/v1/rpc/insert_resume_with_unique_name"
+
+# Column projections used by the routes and services, so no caller pulls resume_html/resume_json by accident
+SUMMARY_COLUMNS = columns("id", "user_id", "resume_name", "source_type", "created_at")
+PREVIEW_COLUMNS = columns("source_type", "original_file_path", "resume_html", "updated_at")
+FILE_COLUMNS = columns("id", "user_id", "source_type", "original_file_path")
+
+
+class ResumeRepository:
+    # Data access for the resumes table over PostgREST
+    def __init__(self, http: SupabaseHTTP):
+        self.http = http
+
+    async def get(self, resume_id: str, select: str = "*", user_id: str | None = None):
+        params = {"select": select, "id": f"eq.{resume_id}", "limit": "1"}
+        if user_id is not None:
+            params["user_id"] = f"eq.{user_id}"
+        response = await self.http.request("GET", RESUME_TABLE_PATH, params=params)
+        rows = response.json()
+        return rows[0] if rows else None
+
+    async def get_many(self, resume_ids: list[str], select: str = "*"):
+        if not resume_ids:
+            return []
+        id_list = ",".join(f'"{resume_id}"' for resume_id in resume_ids)
+        response = await self.http.request(
+            "GET", RESUME_TABLE_PATH, params={"select": select, "id": f"in.({id_list})"}
+        )
+        return response.json()
+
+    async def list_for_user(self, user_id: str, select: str = SUMMARY_COLUMNS):
+        response = await self.http.request(
+            "GET",
+            RESUME_TABLE_PATH,
+            params={"select": select, "user_id": f"eq.{user_id}", "order": "created_at.desc"},
+        )
+        return response.json()
+
+    async def name_exists(self, user_id: str, resume_name: str, exclude_id: str | None = None) -> bool:
+        params = {"select": "id", "user_id": f"eq.{user_id}", "resume_name": f"eq.{resume_name}", "limit": "1"}
+        if exclude_id is not None:
+            params["id"] = f"neq.{exclude_id}"
+        response = await self.http.request("GET", RESUME_TABLE_PATH, params=params)
+        return bool(response.json())
+
+    async def insert(self, row: dict, returning: str = "id"):
+        rows = await self.insert_many([row], returning=returning)
+        return rows[0]
+
+    async def insert_many(self, rows: list[dict], returning: str = "id"):
+        # Multi-row insert in one request; PostgREST hands back the inserted rows
+        if not rows:
+            return []
+        response = await self.http.request(
+            "POST",
+            RESUME_TABLE_PATH,
+            params={"select": returning},
+            json=rows,
+            headers={"Prefer": "return=representation"},
+        )
+        return response.json()
+
+    async def insert_with_unique_name(self, row: dict):
+        # Name allocation + insert in one round trip (see supabase/migrations)
+        response = await self.http.request("POST", INSERT_UNIQUE_RPC_PATH, json={"p_row": row})
+        return response.json()
+
+    async def update(self, resume_id: str, values: dict):
+        response = await self.http.request(
+            "PATCH",
+            RESUME_TABLE_PATH,
+            params={"id": f"eq.{resume_id}", "select": "id"},
+            json=values,
+            headers={"Prefer": "return=representation"},
+        )
+        return response.json()
+
+    async def delete(self, resume_id: str, returning: str = FILE_COLUMNS):
+        # Deletes and returns the removed row, so callers don't need a select beforehand
+        response = await self.http.request(
+            "DELETE",
+            RESUME_TABLE_PATH,
+            params={"id": f"eq.{resume_id}", "select": returning},
+            headers={"Prefer": "return=representation"},
+        )
+        rows = response.json()
+        return rows[0] if rows else None
+
+
+_resume_repository = None
+
+def get_resume_repository() -> ResumeRepository:
+    # DATA_BACKEND=local swaps in the SQLite stand-in for offline load tests
+    global _resume_repository
+    if _resume_repository is None:
+        from app.repositories.local_backend import use_local_backend, create_local_resume_repository
+        if use_local_backend():
+            _resume_repository = create_local_resume_repository()
+        else:
+            _resume_repository = ResumeRepository(get_supabase_http())
+    return _resume_repository
@@ -0,0 +1,271 @@
+import os
+import json
+import time
+import uuid
+import zlib
+import struct
+import asyncio
+import hashlib
+import logging
+import threading
+
+# Crash-safe snapshots of the in-memory conversation sessions, so a worker restart doesn't
+# throw away 20-turn conversations. Each session has an append-only log file of frames;
+# a frame is a 4-byte length followed by a zlib-compressed batch of JSON records:
+#   {"op": "meta", "fields": {...}}       whitelisted session fields that changed
+#   {"op": "messages", "messages": [...]} the message list was replaced
+#   {"op": "append", "messages": [...]}   messages appended since the last frame
+# A frame cut short by a crash is ignored on restore.
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_ENABLED = os.getenv("SESSION_SNAPSHOTS", "1") == "1"
+SNAPSHOT_DIR = os.getenv("SESSION_SNAPSHOT_DIR", ".sessions")
+SNAPSHOT_INTERVAL_S = float(os.getenv("SESSION_SNAPSHOT_INTERVAL_S", "2"))
+SNAPSHOT_TTL_S = int(os.getenv("SESSION_SNAPSHOT_TTL_S", str(24 * 3600)))
+SNAPSHOT_FSYNC = os.getenv("SESSION_SNAPSHOT_FSYNC", "0") == "1"
+
+# Logs with more frames than this are rewritten as a single frame when restored
+COMPACT_AFTER_FRAMES = 32
+
+_HEADER = struct.Struct(">I")
+
+
+def _valid_session_id(session_id) -> bool:
+    # Session ids are server-minted UUIDs; anything else never reaches the filesystem
+    try:
+        return str(uuid.UUID(str(session_id))) == session_id
+    except ValueError:
+        return False
+
+
+def _digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class SessionSnapshots:
+    # Snapshot log files for one kind of session, holding only the whitelisted fields plus the message history
+    def __init__(self, root: str, kind: str, fields: tuple):
+        self.directory = os.path.join(root, kind)
+        self.kind = kind
+        self.fields = fields
+        self._lock = threading.Lock()
+        # Per session: identity and length of the message list and digest of the fields last written
+        self._written: dict[str, dict] = {}
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.directory, f"{session_id}.log")
+
+    def _records_for(self, session_id: str, session: dict):
+        # Records describing what changed since the last flush of this session
+        state = self._written.get(session_id, {"list_id": None, "count": 0, "meta": None})
+        records = []
+
+        meta = {field: session.get(field) for field in self.fields}
+        meta_digest = _digest(meta)
+        if meta_digest != state["meta"]:
+            records.append({"op": "meta", "fields": meta})
+
+        messages = session.get("messages") or []
+        count = len(messages)
+        if id(messages) != state["list_id"] or count < state["count"]:
+            records.append({"op": "messages", "messages": list(messages[:count])})
+        elif count > state["count"]:
+            records.append({"op": "append", "messages": list(messages[state["count"]:count])})
+
+        return records, {"list_id": id(messages), "count": count, "meta": meta_digest}
+
+    def _append_frame(self, session_id: str, records: list):
+        payload = zlib.compress(json.dumps(records, separators=(",", ":"), default=str).encode("utf-8"))
+        with open(self._path(session_id), "ab") as f:
+            f.write(_HEADER.pack(len(payload)) + payload)
+            f.flush()
+            if SNAPSHOT_FSYNC:
+                os.fsync(f.fileno())
+
+    def flush(self, sessions: dict) -> int:
+        # Append a frame for every session that changed since the last flush; returns how many were written
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            written = 0
+            for session_id, session in list(sessions.items()):
+                if not _valid_session_id(session_id):
+                    continue
+                records, state = self._records_for(session_id, session)
+                if not records:
+                    continue
+                try:
+                    self._append_frame(session_id, records)
+                except OSError as e:
+                    logger.warning("Could not snapshot %s session %s: %s", self.kind, session_id, e)
+                    continue
+                self._written[session_id] = state
+                written += 1
+            return written
+
+    def _read_frames(self, session_id: str):
+        with open(self._path(session_id), "rb") as f:
+            data = f.read()
+        frames, offset = [], 0
+        while offset + _HEADER.size <= len(data):
+            (length,) = _HEADER.unpack_from(data, offset)
+            body = data[offset + _HEADER.size: offset + _HEADER.size + length]
+            if len(body) < length:
+                break
+            try:
+                frames.append(json.loads(zlib.decompress(body)))
+            except (zlib.error, ValueError):
+                break
+            offset += _HEADER.size + length
+        return frames
+
+    def load(self, session_id: str):
+        # Rebuild a session from its log, or None if there is no usable snapshot
+        if not _valid_session_id(session_id):
+            return None
+        with self._lock:
+            try:
+                frames = self._read_frames(session_id)
+            except FileNotFoundError:
+                return None
+            except OSError as e:
+                logger.warning("Could not read %s session snapshot %s: %s", self.kind, session_id, e)
+                return None
+            if not frames:
+                return None
+
+            session = {"messages": []}
+            for records in frames:
+                for record in records:
+                    if record["op"] == "meta":
+                        session.update(record["fields"])
+                    elif record["op"] == "messages":
+                        session["messages"] = record["messages"]
+                    elif record["op"] == "append":
+                        session["messages"].extend(record["messages"])
+
+            if len(frames) > COMPACT_AFTER_FRAMES:
+                self._compact(session_id, session)
+            records, state = self._records_for(session_id, session)
+            self._written[session_id] = state
+            return session
+
+    def _compact(self, session_id: str, session: dict):
+        # Rewrite the log as one frame, via a temp file so a crash leaves either the old or the new log
+        self._written.pop(session_id, None)
+        records, _ = self._records_for(session_id, session)
+        path = self._path(session_id)
+        temp_path = f"{path}.tmp"
+        payload = zlib.compress(json.dumps(records, separators=(",", ":"), default=str).encode("utf-8"))
+        with open(temp_path, "wb") as f:
+            f.write(_HEADER.pack(len(payload)) + payload)
+        os.replace(temp_path, path)
+
+    def _remove_log(self, session_id: str):
+        # Caller holds self._lock
+        self._written.pop(session_id, None)
+        if _valid_session_id(session_id):
+            try:
+                os.remove(self._path(session_id))
+            except FileNotFoundError:
+                pass
+
+    def session_ids(self, max_age_s: int):
+        # Ids of snapshots touched within max_age_s; older logs are removed
+        if not os.path.isdir(self.directory):
+            return []
+        cutoff = time.time() - max_age_s
+        ids = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".log"):
+                continue
+            path = os.path.join(self.directory, name)
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                continue
+            ids.append(name[:-len(".log")])
+        return ids
+
+
+class SnapshotSessions(dict):
+    # Session dict that falls back to the snapshot log on a lookup miss, e.g. after a worker restart
+    def __init__(self, snapshots: SessionSnapshots, defaults: dict):
+        super().__init__()
+        self.snapshots = snapshots
+        self.defaults = defaults
+
+    def _restore(self, session_id):
+        if not SNAPSHOTS_ENABLED:
+            return None
+        session = self.snapshots.load(session_id)
+        if session is None:
+            return None
+        session = {**self.defaults, **session}
+        return super().setdefault(session_id, session)
+
+    def get(self, session_id, default=None):
+        session = super().get(session_id)
+        if session is None:
+            session = self._restore(session_id)
+        return default if session is None else session
+
+    def __contains__(self, session_id):
+        return super().__contains__(session_id) or self._restore(session_id) is not None
+
+    def pop(self, session_id, *default):
+        if not SNAPSHOTS_ENABLED:
+            return super().pop(session_id, *default)
+        # Out of the dict first, then the log, both under the snapshot lock: a flush running concurrently
+        # either finishes before the pop or no longer sees the session, so it can't write the log back
+        with self.snapshots._lock:
+            try:
+                return super().pop(session_id, *default)
+            finally:
+                self.snapshots._remove_log(session_id)
+
+    def restore_all(self, max_age_s: int = SNAPSHOT_TTL_S) -> int:
+        restored = 0
+        for session_id in self.snapshots.session_ids(max_age_s):
+            if not super().__contains__(session_id) and self._restore(session_id) is not None:
+                restored += 1
+        return restored
+
+    def flush(self) -> int:
+        return self.snapshots.flush(self)
+
+
+_REGISTERED: list[SnapshotSessions] = []
+
+
+def snapshot_sessions(kind: str, fields: tuple, defaults: dict = None) -> SnapshotSessions:
+    # Create a session store for one kind of session, snapshotted by run_snapshots()
+    sessions = SnapshotSessions(SessionSnapshots(SNAPSHOT_DIR, kind, fields), defaults or {})
+    _REGISTERED.append(sessions)
+    return sessions
+
+
+def restore_sessions():
+    # Eagerly reload recent sessions on startup; older logs are cleaned up
+    if not SNAPSHOTS_ENABLED:
+        return
+    for sessions in _REGISTERED:
+        restored = sessions.restore_all()
+        if restored:
+            logger.info("Restored %d %s sessions from snapshots", restored, sessions.snapshots.kind)
+
+
+def flush_sessions():
+    if not SNAPSHOTS_ENABLED:
+        return
+    for sessions in _REGISTERED:
+        sessions.flush()
+
+
+async def run_snapshots():
+    # Background loop started with the app: flush changed sessions every SNAPSHOT_INTERVAL_S
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL_S)
+        try:
+            await asyncio.to_thread(flush_sessions)
+        except Exception as e:
+            logger.warning("Session snapshot flush failed: %s", e)
@@ -0,0 +1,71 @@
+import os
+from urllib.parse import quote
+
+from app.repositories.supabase_http import SupabaseHTTP, RepositoryError, get_supabase_http
+from app.utils.byte_cache import ByteCache
+
+RESUME_BUCKET = "resumes"
+
+# Shared cache of stored files (originals, thumbnails), keyed by storage path
+STORAGE_CACHE = ByteCache(
+    max_bytes=int(os.getenv("STORAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    max_item_bytes=int(os.getenv("STORAGE_CACHE_MAX_ITEM_BYTES", str(8 * 1024 * 1024))),
+)
+
+
+class StorageRepository:
+    # Data access for a Supabase Storage bucket, reading through STORAGE_CACHE
+    def __init__(self, http: SupabaseHTTP, bucket: str = RESUME_BUCKET, cache: ByteCache = STORAGE_CACHE):
+        self.http = http
+        self.bucket = bucket
+        self.cache = cache
+
+    def _object_path(self, path: str) -> str:
+        return f"/storage/v1/object/{self.bucket}/{quote(path)}"
+
+    async def download(self, path: str) -> bytes | None:
+        cached = self.cache.get(path)
+        if cached is not None:
+            return cached
+        try:
+            response = await self.http.request("GET", self._object_path(path))
+        except RepositoryError as e:
+            # Storage answers 400/404 for missing objects
+            if e.status_code in (400, 404):
+                return None
+            raise
+        data = response.content
+        if data:
+            self.cache.put(path, data)
+        return data
+
+    async def upload(self, path: str, data: bytes, content_type: str = "application/octet-stream", upsert: bool = False):
+        await self.http.request(
+            "POST",
+            self._object_path(path),
+            content=data,
+            headers={"Content-Type": content_type, "x-upsert": "true" if upsert else "false"},
+        )
+        # Seed the cache with what we just stored, so the first read doesn't download it back
+        self.cache.put(path, data)
+
+    async def remove(self, paths: list[str]):
+        if not paths:
+            return
+        await self.http.request("DELETE", f"/storage/v1/object/{self.bucket}", json={"prefixes": paths})
+        for path in paths:
+            self.cache.pop(path)
+
+
+_storage_repository = None
+
+def get_storage_repository() -> StorageRepository:
+    # DATA_BACKEND=local swaps in the filesystem stand-in for offline load tests
+    global _storage_repository
+    if _storage_repository is None:
+        from app.repositories.local_backend import use_local_backend, create_local_storage_repository
+        if use_local_backend():
+            _storage_repository = create_local_storage_repository()
+        else:
+            _storage_repository = StorageRepository(get_supabase_http())
+    return _storage_repository
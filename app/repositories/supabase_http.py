@@ -0,0 +1,153 @@
+import os
+import random
+import asyncio
+import httpx
+from dotenv import load_dotenv
+from app.utils.metrics import SUPABASE_SECONDS, STORAGE_SECONDS, STORAGE_BYTES, track
+
+load_dotenv()
+
+# Statuses worth retrying; everything else is surfaced to the caller immediately
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+# Errors raised before the request reached the server, safe to retry for any method
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RepositoryError(Exception):
+    # Raised when Supabase answers with an error status (after retries)
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Supabase error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+TABLE_OPS = {"GET": "select", "POST": "insert", "PATCH": "update", "DELETE": "delete"}
+STORAGE_OPS = {"GET": "download", "POST": "upload", "DELETE": "remove"}
+
+
+def _metric_labels(method: str, path: str):
+    # Map a REST path onto the histogram and labels it is reported under
+    if path.startswith("/storage/"):
+        return STORAGE_SECONDS, {"op": STORAGE_OPS.get(method, method.lower())}
+    if path.startswith("/rest/v1/rpc/"):
+        return SUPABASE_SECONDS, {"table": "rpc", "op": path.rsplit("/", 1)[-1]}
+    table = path.removeprefix("/rest/v1/").split("/")[0]
+    return SUPABASE_SECONDS, {"table": table, "op": TABLE_OPS.get(method, method.lower())}
+
+
+def columns(*names: str) -> str:
+    # Column projection for PostgREST select=, e.g. columns("id", "resume_name")
+    return ",".join(name.strip() for name in names)
+
+
+class SupabaseHTTP:
+    # Shared async HTTP client for the Supabase REST and Storage APIs.
+    # One pooled keep-alive client per process, with timeouts and retries with full jitter.
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str,
+        max_retries: int = 3,
+        backoff_base: float = 0.2,
+        backoff_cap: float = 3.0,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"apikey": self.api_key, "Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(
+                    float(os.getenv("SUPABASE_TIMEOUT", "15")),
+                    connect=float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5")),
+                ),
+                limits=httpx.Limits(
+                    max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", "50")),
+                    max_keepalive_connections=int(os.getenv("SUPABASE_MAX_KEEPALIVE", "20")),
+                    keepalive_expiry=30.0,
+                ),
+            )
+        return self._client
+
+    def _backoff(self, attempt: int, retry_after: str | None = None) -> float:
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_cap)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        method = method.upper()
+        histogram, labels = _metric_labels(method, path)
+        with track(histogram, **labels):
+            response = await self._request_with_retries(method, path, **kwargs)
+
+        if histogram is STORAGE_SECONDS:
+            size = len(response.content) if method == "GET" else len(kwargs.get("content") or b"")
+            STORAGE_BYTES.labels(op=labels["op"]).inc(size)
+        return response
+
+    async def _request_with_retries(self, method: str, path: str, **kwargs) -> httpx.Response:
+        client = self._get_client()
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = await client.request(method, path, **kwargs)
+            except UNSENT_ERRORS:
+                if last_attempt:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            except httpx.TransportError:
+                # The request may have been applied, so only idempotent calls are replayed
+                if last_attempt or method not in IDEMPOTENT_METHODS:
+                    raise
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            retryable = response.status_code in RETRY_STATUSES and (
+                method in IDEMPOTENT_METHODS or response.status_code == 429
+            )
+            if retryable and not last_attempt:
+                await asyncio.sleep(self._backoff(attempt, response.headers.get("retry-after")))
+                continue
+
+            if response.status_code >= 400:
+                raise RepositoryError(response.status_code, response.text)
+            return response
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_http = None
+
+def get_supabase_http() -> SupabaseHTTP:
+    # Created on first use so importing the app doesn't require Supabase credentials
+    global _http
+    if _http is None:
+        url = os.getenv("SUPABASE_URL")
+        key = os.getenv("SUPABASE_KEY")
+        if not url:
+            raise ValueError("SUPABASE_URL is not set in environment")
+        if not key:
+            raise ValueError("SUPABASE_KEY is not set in environment")
+        _http = SupabaseHTTP(url, key)
+    return _http
+
+
+async def close_supabase_http():
+    if _http is not None:
+        await _http.aclose()
@@ -0,0 +1,35 @@
+import os
+import hmac
+from fastapi import APIRouter, Header, HTTPException, Query
+from app.utils.usage import USAGE, DIMENSIONS
+
+router = APIRouter()
+
+
+def _require_admin(token: str | None):
+    # Admin routes are disabled unless ADMIN_TOKEN is configured
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not token or not hmac.compare_digest(token, expected):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+# OpenAI token usage and estimated cost, per endpoint/purpose/session/user
+@router.get("/usage")
+def get_usage(
+    dimension: str | None = Query(None, description="One of endpoint, purpose, session, user"),
+    limit: int = Query(50, ge=1, le=1000),
+    x_admin_token: str | None = Header(None),
+):
+    _require_admin(x_admin_token)
+
+    if dimension is not None:
+        if dimension not in DIMENSIONS:
+            raise HTTPException(status_code=400, detail=f"dimension must be one of {', '.join(DIMENSIONS)}")
+        return {"totals": USAGE.totals(), dimension: USAGE.summary(dimension, limit)}
+
+    return {
+        "totals": USAGE.totals(),
+        **{name: USAGE.summary(name, limit) for name in DIMENSIONS},
+    }
@@ -1,8 +1,17 @@
-from fastapi import APIRouter
+import asyncio
+from fastapi import APIRouter, WebSocket
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from app.utils.admission import ADMISSION
+from app.utils.streaming import open_channel, receive_messages, relay_stream, send_error
 from app.services.chatbot_service import (
     start_chat_session,
+    has_session,
+    chat_message_demand,
     send_chat_message,
+    stream_chat_message,
+    start_speculation,
+    speculation_result,
     get_resume_json_from_session,
     get_preferences_from_session
 )
@@ -21,18 +30,67 @@ class ChatMessageRequest(BaseModel):
 def start_chat(req: ChatStartRequest):
     return start_chat_session(req.user_id)
 
-# Send message to chatbot session
+# Send message to chatbot session, queued behind admission control (429 when over budget)
 @router.post("/message")
-def send_message(req: ChatMessageRequest):
-    return send_chat_message(req.session_id, req.message)
+async def send_message(req: ChatMessageRequest):
+    async with ADMISSION.admit(*chat_message_demand(req.session_id, req.message)):
+        result = await run_in_threadpool(send_chat_message, req.session_id, req.message)
+    # Start extraction and rendering now, so the follow-up json/preferences/generate calls find them ready
+    if result.get("ready_to_generate"):
+        start_speculation(req.session_id)
+    return result
 
 # Retrieve resume JSON from chatbot session
 @router.get("/json/{session_id}")
-def get_resume_json_api(session_id: str):
-    return get_resume_json_from_session(session_id)
+async def get_resume_json_api(session_id: str):
+    return await get_resume_json_from_session(session_id)
 
 # Retrieve preferences JSON from chatbot session
 @router.get("/preferences/{session_id}")
-def get_preferences_api(session_id: str):
+async def get_preferences_api(session_id: str):
     """Return the resume preferences extracted from the chatbot session."""
-    return get_preferences_from_session(session_id)
+    return await get_preferences_from_session(session_id)
+
+# Push the speculative extraction to the client as soon as it is ready
+async def _notify_resume_ready(channel, session_id: str):
+    result = await speculation_result(session_id)
+    if result:
+        await channel.send({"type": "event", "event": "resume_ready", **result})
+
+# Session-bound conversation socket: streams reply tokens and pushes server events.
+# Client frames: {"type": "message", "content": "..."}
+# Server frames: session, token, reply, event (resume_ready), error
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket, session_id: str | None = None, user_id: str | None = None):
+    async with open_channel(websocket, "chatbot") as channel:
+        if session_id is None:
+            started = start_chat_session(user_id)
+            session_id = started["session_id"]
+            await channel.send({"type": "session", **started})
+        elif has_session(session_id):
+            await channel.send({"type": "session", "session_id": session_id})
+        else:
+            await channel.send({"type": "error", "status": 404, "detail": "Invalid session_id"})
+            await websocket.close(code=4404)
+            return
+
+        notifier = None
+        try:
+            async for text in receive_messages(channel):
+                try:
+                    async with ADMISSION.admit(*chat_message_demand(session_id, text)):
+                        result = await relay_stream(channel, lambda: stream_chat_message(session_id, text))
+                except Exception as e:
+                    await send_error(channel, e, status=502)
+                    continue
+
+                if "error" in result:
+                    await send_error(channel, Exception(result["error"]), status=404)
+                    continue
+                await channel.send({"type": "reply", **result})
+
+                if result["ready_to_generate"] and start_speculation(session_id):
+                    notifier = asyncio.create_task(_notify_resume_ready(channel, session_id))
+        finally:
+            if notifier is not None:
+                notifier.cancel()
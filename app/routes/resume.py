@@ -1,27 +1,57 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Response
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Form, HTTPException, Request, Response, WebSocket
 from app.services.resume_service import generate_html_resume_service, parse_resume_file
 from app.services.analysis_service import analyze_resume_service
 from app.services.export_service import html_to_pdf_bytes, html_to_docx_bytes
 from app.services.upload_service import upload_resume_service
-from app.services.improvement_service import start_improvement_session, continue_improvement_session, finalize_improvement_session
-from app.services.resume_service import generate_unique_resume_name
-from app.utils.supabase_client import supabase
+from app.services.batch_export_service import (
+    MAX_EXPORT_RESUMES,
+    EXPORT_FORMATS,
+    fetch_export_rows,
+    stream_export_zip,
+)
+from app.services.ats_service import score_resume, score_user_resumes
+from app.services.bulk_import_service import MAX_IMPORT_BYTES, start_import_job, get_import_job
+from app.services.improvement_service import (
+    start_improvement_session,
+    improvement_message_demand,
+    improvement_stage,
+    continue_improvement_session,
+    stream_improvement_turn,
+    finalize_improvement_session,
+)
+from app.services.resume_service import generate_unique_resume_name, insert_resume_with_unique_name
+from app.services.thumbnail_service import store_thumbnail, get_thumbnail, remove_thumbnail
+from app.repositories.resume_repository import get_resume_repository, PREVIEW_COLUMNS
+from app.repositories.storage_repository import get_storage_repository
+from app.utils.admission import ADMISSION
+from app.utils.streaming import open_channel, receive_messages, relay_stream, send_error
+from app.utils.upload_ingest import ingest_upload
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 import os
 import json
+import hashlib
+import logging
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 
 # Generate HTML resume
 @router.post("/generate")
 async def generate_resume(body: dict):
-    return generate_html_resume_service(body)
+    return await generate_html_resume_service(body)
 
 # Parse uploaded PDF/DOCX
 @router.post("/parse")
 async def parse_resume(file: UploadFile = File(...)):
-    return parse_resume_file(file)
+    upload = await ingest_upload(file)
+    try:
+        return await run_in_threadpool(parse_resume_file, upload)
+    finally:
+        upload.cleanup()
 
 # Analyze with context
 @router.post("/analyze-with-context")
@@ -31,15 +61,14 @@ async def analyze_with_context(
     target_job: str = Form(...),
 ):
     parsed = json.loads(parsed_json)
-    file_bytes = await file.read()
-
-    filename = file.filename or ""
-    ext = os.path.splitext(filename)[1]
-
-    if ext not in [".pdf", ".docx"]:
-        raise HTTPException(status_code=400, detail="Unsupported file type. Only PDF and DOCX resumes are supported.")
+    upload = await ingest_upload(file)
+    try:
+        file_bytes = await run_in_threadpool(upload.read_bytes)
+    finally:
+        upload.cleanup()
 
-    return analyze_resume_service(file_bytes, parsed, target_job, ext)
+    # Rasterizing the PDF and the vision call block, so they run off the event loop
+    return await run_in_threadpool(analyze_resume_service, file_bytes, parsed, target_job, upload.ext)
 
 # Export PDF file
 @router.post("/export/pdf")
@@ -66,38 +95,158 @@ async def export_docx(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(500, f"Failed to generate DOCX: {e}")
     
+# Export many stored resumes as one ZIP, streamed as files finish rendering
+class BatchExportRequest(BaseModel):
+    resume_ids: list[str]
+    format: str = "pdf"
+    user_id: str | None = None
+
+@router.post("/export/batch")
+async def export_batch(req: BatchExportRequest):
+    if req.format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format. Use one of: {', '.join(EXPORT_FORMATS)}")
+    if not req.resume_ids:
+        raise HTTPException(status_code=400, detail="No resume ids given")
+    if len(req.resume_ids) > MAX_EXPORT_RESUMES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_EXPORT_RESUMES} resumes can be exported at once")
+
+    rows, skipped = await fetch_export_rows(req.resume_ids, req.user_id)
+    if not rows:
+        raise HTTPException(status_code=404, detail="None of the requested resumes can be exported")
+
+    return StreamingResponse(
+        stream_export_zip(rows, skipped, req.format),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="resumes-{req.format}.zip"'},
+    )
+
+# Local keyword-match score of a resume against a job description (no model call)
+class AtsScoreRequest(BaseModel):
+    job_description: str
+    resume_json: dict | None = None
+    resume_id: str | None = None
+    user_id: str | None = None
+
+@router.post("/ats-score")
+async def ats_score(req: AtsScoreRequest):
+    if req.resume_json is None and not req.resume_id:
+        raise HTTPException(status_code=400, detail="Provide resume_json or resume_id")
+    try:
+        result = await score_resume(req.job_description, req.resume_json, req.resume_id, req.user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return result
+
+# Score one job description against all of a user's resumes
+class AtsBatchScoreRequest(BaseModel):
+    user_id: str
+    job_description: str
+
+@router.post("/ats-score/batch")
+async def ats_score_batch(req: AtsBatchScoreRequest):
+    try:
+        results = await score_user_resumes(req.user_id, req.job_description)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": results}
+
 # Upload resume
 @router.post("/upload")
 async def upload_resume(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     user_id: str = Form(...),
 ):
+    upload = await ingest_upload(file)
     try:
-        result = await upload_resume_service(file, user_id)
-        return result
+        result = await upload_resume_service(upload, user_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload.cleanup()
+
+    background_tasks.add_task(store_thumbnail, result["resume_id"], {
+        "source_type": "upload",
+        "original_file_path": result["original_file_path"],
+    })
+    return result
+
+# Bulk import a ZIP of resumes as a background job
+@router.post("/import", status_code=202)
+async def import_resumes(
+    file: UploadFile = File(...),
+    user_id: str = Form(...),
+):
+    archive = await ingest_upload(
+        file, allowed=(".zip",), max_bytes=MAX_IMPORT_BYTES, unsupported="Bulk imports must be a ZIP archive."
+    )
+    job = start_import_job(archive, user_id)
+    return job.to_dict()
+
+# Bulk import progress
+@router.get("/import/{job_id}")
+async def import_status(job_id: str):
+    job = get_import_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job.to_dict()
 
 # Preview resume
+PREVIEW_CACHE_CONTROL = "private, no-cache"
+
+def _make_etag(*parts) -> str:
+    # Strong ETag from the given version parts (timestamps, paths or content)
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    # Check If-None-Match, which may hold several (possibly weak) tags or "*"
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": PREVIEW_CACHE_CONTROL})
+
 @router.get("/preview/{resume_id}")
-async def preview_resume(resume_id: str):
+async def preview_resume(resume_id: str, request: Request):
 
-    result = supabase.table("resumes").select("*").eq("id", resume_id).single().execute()
-    if not result.data:
+    resume = await get_resume_repository().get(resume_id, select=PREVIEW_COLUMNS)
+    if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
-    resume = result.data
     source_type = resume.get("source_type")
+    updated_at = resume.get("updated_at")
 
     if source_type == "upload":
         file_path = resume.get("original_file_path")
         if not file_path:
             raise HTTPException(status_code=500, detail="No original file stored.")
-        
-        res = supabase.storage.from_("resumes").download(file_path)
+
+        # The stored file only changes along with the row, so the ETag can be checked before downloading
+        etag = _make_etag(resume_id, file_path, updated_at) if updated_at else None
+        if etag and _etag_matches(request, etag):
+            return _not_modified(etag)
+
+        res = await get_storage_repository().download(file_path)
 
         if res is None:
             raise HTTPException(status_code=500, detail="Failed to download file.")
-        
+
+        if etag is None:
+            etag = _make_etag(res)
+            if _etag_matches(request, etag):
+                return _not_modified(etag)
+
         ext = file_path.split(".")[-1]
 
         if ext == "pdf":
@@ -105,7 +254,9 @@ async def preview_resume(resume_id: str):
                 content=res,
                 media_type="application/pdf",
                 headers={
-                    "Content-Disposition": f'inline; filename="{os.path.basename(file_path)}"'
+                    "Content-Disposition": f'inline; filename="{os.path.basename(file_path)}"',
+                    "ETag": etag,
+                    "Cache-Control": PREVIEW_CACHE_CONTROL,
                 }
             )
         else:
@@ -113,7 +264,9 @@ async def preview_resume(resume_id: str):
                 content=res,
                 media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
                 headers={
-                    "Content-Disposition": f'attachment; filename="{os.path.basename(file_path)}"'
+                    "Content-Disposition": f'attachment; filename="{os.path.basename(file_path)}"',
+                    "ETag": etag,
+                    "Cache-Control": PREVIEW_CACHE_CONTROL,
                 }
             )
     else:
@@ -121,27 +274,54 @@ async def preview_resume(resume_id: str):
         if not html:
             raise HTTPException(status_code=500, detail="Resume HTML missing.")
 
+        etag = _make_etag(html)
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+
         return Response(
             content=html, 
             media_type="text/html; charset=utf-8",
             headers={
-                "Content-Disposition": "inline; filename=resume.html"
+                "Content-Disposition": "inline; filename=resume.html",
+                "ETag": etag,
+                "Cache-Control": PREVIEW_CACHE_CONTROL,
             })
 
+# Resume thumbnail for dashboard list views
+THUMBNAIL_CACHE_CONTROL = "private, max-age=86400"
+
+@router.get("/thumbnail/{resume_id}")
+async def resume_thumbnail(resume_id: str, request: Request):
+    png = await get_thumbnail(resume_id)
+    if not png:
+        raise HTTPException(status_code=404, detail="Thumbnail not available")
+
+    etag = _make_etag(png)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": THUMBNAIL_CACHE_CONTROL})
+
+    return Response(
+        content=png,
+        media_type="image/png",
+        headers={"ETag": etag, "Cache-Control": THUMBNAIL_CACHE_CONTROL},
+    )
+
 # Delete resume
 @router.delete("/{resume_id}")
 async def delete_resume(resume_id: str):
-    row = supabase.table("resumes").select("*").eq("id", resume_id).single().execute()
+    # The delete returns the removed row, so there is no separate lookup
+    resume = await get_resume_repository().delete(resume_id)
 
-    if not row.data:
+    if not resume:
         raise HTTPException(404, "Resume not found")
 
-    resume = row.data
-
-    supabase.table("resumes").delete().eq("id", resume_id).execute()
-
     if resume["source_type"] == "upload" and resume["original_file_path"]:
-        supabase.storage.from_("resumes").remove([resume["original_file_path"]])
+        await get_storage_repository().remove([resume["original_file_path"]])
+
+    try:
+        await remove_thumbnail(resume_id)
+    except Exception as e:
+        logger.warning("Could not remove thumbnail for resume %s: %s", resume_id, e)
 
     return {"message": "Deleted"}
 
@@ -150,26 +330,22 @@ async def delete_resume(resume_id: str):
 async def rename_resume(resume_id: str, new_name: str = Form(...)):
     new_name = new_name.strip()
 
-    row = (
-        supabase.table("resumes")
-        .select("user_id")
-        .eq("id", resume_id)
-        .single()
-        .execute()
-    )
-    if not row.data:
+    resumes = get_resume_repository()
+    row = await resumes.get(resume_id, select="user_id")
+    if not row:
         raise HTTPException(404, "Resume not found")
     
-    user_id = row.data["user_id"]
+    user_id = row["user_id"]
     
-    final_name = generate_unique_resume_name(user_id, new_name)
+    final_name = await generate_unique_resume_name(user_id, new_name, exclude_id=resume_id)
 
-    supabase.table("resumes").update({"resume_name": new_name}).eq("id", resume_id).execute()
+    await resumes.update(resume_id, {"resume_name": final_name})
     return {"message": "Renamed", "new_name": final_name}
 
 # Save generated resume
 @router.post("/save-generated")
-def save_generated_resume(
+async def save_generated_resume(
+    background_tasks: BackgroundTasks,
     resume_json: str = Form(...),
     preferences: str = Form(...),
     resume_html: str = Form(...),
@@ -186,35 +362,26 @@ def save_generated_resume(
     except:
         raise HTTPException(status_code=400, detail="Invalid preferences format")
     
-    final_name = generate_unique_resume_name(user_id, resume_name)
-
     data = {
         "user_id": user_id,
         "resume_json": parsed_json,
-        "resume_name": final_name,
+        "resume_name": resume_name,
         "resume_html": resume_html,
         "preferences": parsed_preferences,
         "original_file_path": None,
         "source_type": "chatbot"
     }
 
-    supabase.table("resumes").insert(data).execute()
-
-
-    fetch = (
-        supabase.table("resumes")
-        .select("id")
-        .eq("user_id", user_id)
-        .eq("resume_name", final_name)
-        .order("created_at", desc=True)
-        .limit(1)
-        .execute()
-    )
+    try:
+        saved = await insert_resume_with_unique_name(data)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save resume: {e}")
 
-    if fetch.data is None:
-        raise HTTPException(status_code=500, detail="Supabase returned no data after insert")
+    resume_id = saved["id"]
+    final_name = saved["resume_name"]
+    background_tasks.add_task(store_thumbnail, resume_id, {"source_type": "chatbot", "resume_html": resume_html})
 
-    return {"resume_id": fetch.data[0]["id"], "resume_name": final_name}
+    return {"resume_id": resume_id, "resume_name": final_name}
 
 # Start improvement session
 @router.post("/improve/start")
@@ -223,7 +390,7 @@ async def improve_start(
     user_id: str = Form(...),
 ):
     try:
-        return start_improvement_session(resume_id, user_id)
+        return await start_improvement_session(resume_id, user_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -233,21 +400,51 @@ async def improve_message(
     session_id: str = Form(...),
     message: str = Form(...),
 ):
-    try:
-        return continue_improvement_session(session_id, message)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+    async with ADMISSION.admit(*improvement_message_demand(session_id, message)):
+        try:
+            return await continue_improvement_session(session_id, message)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+# Session-bound improvement socket: the first message (target job) runs the analysis and pushes an
+# analysis_ready event; later turns stream reply tokens. Finalizing stays on POST /improve/finalize.
+@router.websocket("/improve/ws")
+async def improve_socket(websocket: WebSocket, session_id: str):
+    async with open_channel(websocket, "improvement") as channel:
+        stage = improvement_stage(session_id)
+        if stage is None:
+            await channel.send({"type": "error", "status": 404, "detail": "Improvement session not found"})
+            await websocket.close(code=4404)
+            return
+        await channel.send({"type": "session", "session_id": session_id, "stage": stage})
+
+        async for message in receive_messages(channel):
+            try:
+                async with ADMISSION.admit(*improvement_message_demand(session_id, message)):
+                    if improvement_stage(session_id) == "awaiting_target_job":
+                        result = await continue_improvement_session(session_id, message)
+                        await channel.send({"type": "event", "event": "analysis_ready", "analysis": result.pop("analysis")})
+                    else:
+                        result = await relay_stream(channel, lambda: stream_improvement_turn(session_id, message))
+            except Exception as e:
+                await send_error(channel, e)
+                continue
+            await channel.send({"type": "reply", **result})
 
 #Finalize improvement session
 @router.post("/improve/finalize")
 async def improve_finalize(
+    background_tasks: BackgroundTasks,
     session_id: str = Form(...),
 ):
     try:
-        return finalize_improvement_session(session_id)
+        result = await finalize_improvement_session(session_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    background_tasks.add_task(store_thumbnail, result["resume_id"], {"source_type": "chatbot", "resume_html": result["html"]})
+    return result
+
 
 
     
@@ -1,11 +1,13 @@
-from app.utils.openai_client import get_openai
+from app.utils.openai_client import get_openai, chat_completion
 import base64
-import json
-import fitz
+from app.utils.metrics import timed_stage
+from app.utils.resume_serialization import resume_for_prompt
 
 
+@timed_stage("rasterize")
 def convert_pdf_to_images_web(pdf_path):
     # Convert each page of the PDF to a base64-encoded PNG image for analysis
+    import fitz
     doc = fitz.open(pdf_path)
     images = []
     for i, page in enumerate(doc):
@@ -16,8 +18,36 @@ def convert_pdf_to_images_web(pdf_path):
     doc.close()
     return images
 
-def analyze_resume_text_only(parsed_resume, target_job):
+@timed_stage("rasterize")
+def convert_pdf_bytes_to_images_web(pdf_bytes):
+    # Same as convert_pdf_to_images_web, but renders straight from memory without a temp file
+    import fitz
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    images = []
+    for page in doc:
+        pix = page.get_pixmap(dpi=150)
+        images.append(base64.b64encode(pix.tobytes("png")).decode("utf-8"))
+    doc.close()
+    return images
+
+def prepare_analysis_inputs(file_bytes, parsed_resume, ext):
+    # CPU-bound prep for analysis (page rasterization, base64 encoding, JSON serialization)
+    # Split out so it can run ahead of time, leaving only the GPT-4o call on the critical path
+    ext = (ext or "").lower()
+    images = []
+    if ext == ".pdf" and file_bytes:
+        images = convert_pdf_bytes_to_images_web(file_bytes)
+
+    return {
+        "ext": ext,
+        "images": images,
+        "resume_text": resume_for_prompt(parsed_resume),
+    }
+
+def analyze_resume_text_only(parsed_resume, target_job, resume_text=None):
     # Analyze resume based solely on parsed text JSON and target job
+    if resume_text is None:
+        resume_text = resume_for_prompt(parsed_resume)
     client = get_openai()
     prompt = f"""
     Provide a structured, expert resume analysis using ONLY the parsed JSON below.
@@ -31,11 +61,6 @@ def analyze_resume_text_only(parsed_resume, target_job):
     - industry alignment
     - section order
 
-    Target job: {target_job}
-
-    Parsed resume JSON:
-    {json.dumps(parsed_resume, indent=2)}
-
     Return your response in these sections:
     1. Industry Summary
         - Summarize what top resumes in this field look like (structure, tone, design).
@@ -52,9 +77,15 @@ def analyze_resume_text_only(parsed_resume, target_job):
         - Include structural or visual fixes only if they affect one-page fit or readability.
         - Never propose changes just to reach a number.
         - Each recommendation should specify whether it is Content, Formatting, or Structural and briefly explain *why*.
+
+    Target job: {target_job}
+
+    Parsed resume JSON:
+    {resume_text}
     """
 
-    response = client.chat.completions.create(
+    response = chat_completion(
+        client, "analysis_text",
         model="gpt-4o",
         messages=[
             {"role": "system", "content": "You are a professional resume reviewer with expertise in ATS optimization."},
@@ -72,18 +103,16 @@ def analyze_resume_text_only(parsed_resume, target_job):
 
 def analyze_resume_with_context_web(file_bytes, parsed_resume, target_job, ext):
     #Conduct analysis based on file type and target job
+    prepared = prepare_analysis_inputs(file_bytes, parsed_resume, ext)
+    return analyze_prepared_resume(prepared, parsed_resume, target_job)
 
-    ext = ext.lower()
-    
-    if ext == ".pdf":
-        temp_path = "temp_uploaded.pdf"
-        with open(temp_path, "wb") as f:
-            f.write(file_bytes)
 
-        # Convert PDF pages to base64 images
-        image_b64_list = convert_pdf_to_images_web(temp_path)
+def analyze_prepared_resume(prepared, parsed_resume, target_job):
+    # Run the GPT-4o analysis on inputs built by prepare_analysis_inputs
+    image_b64_list = prepared["images"]
+    resume_text = prepared["resume_text"]
 
-        
+    if prepared["ext"] == ".pdf" and image_b64_list:
         client = get_openai()
 
         visual_inputs = [
@@ -123,7 +152,7 @@ def analyze_resume_with_context_web(file_bytes, parsed_resume, target_job, ext):
         # Add parsed JSON text
         visual_inputs.append({
             "type": "text",
-            "text": f"Here is the parsed resume text:\n{json.dumps(parsed_resume, indent=2)}"
+            "text": f"Here is the parsed resume text:\n{resume_text}"
         })
 
         # Add target job context
@@ -133,7 +162,8 @@ def analyze_resume_with_context_web(file_bytes, parsed_resume, target_job, ext):
         })
 
         try:
-            response = client.chat.completions.create(
+            response = chat_completion(
+                client, "analysis_vision",
                 model="gpt-4o",
                 messages=[
                     {
@@ -156,7 +186,7 @@ def analyze_resume_with_context_web(file_bytes, parsed_resume, target_job, ext):
             return {"error": str(e)}
     
     else:
-        return analyze_resume_text_only(parsed_resume, target_job)
+        return analyze_resume_text_only(parsed_resume, target_job, resume_text)
 
 def analyze_resume_service(file_bytes, parsed_resume, target_job, file_ext):
     return analyze_resume_with_context_web(file_bytes, parsed_resume, target_job, file_ext)    
\ No newline at end of file
@@ -0,0 +1,295 @@
+import os
+import re
+import math
+import asyncio
+from collections import Counter
+
+from app.repositories.resume_repository import get_resume_repository
+from app.repositories.supabase_http import columns
+
+# Local ATS-style keyword matching: how well does a resume cover the terms of a job description?
+# Runs in milliseconds with no model call, as a cheap alternative to the full GPT-4o analysis.
+#
+# Both texts go through the same pipeline (tokenize -> normalize skills -> drop stopwords), then each
+# job-description term is weighted and every resume is scored with BM25-style saturation of how often
+# it mentions the term. Scoring many resumes is one NumPy matrix product.
+
+MAX_JOB_DESCRIPTION_CHARS = int(os.getenv("ATS_MAX_JOB_DESCRIPTION_CHARS", "20000"))
+MAX_REPORTED_KEYWORDS = 20
+
+# BM25 parameters. k1 is low so one solid mention counts for most of a term's weight; b applies a mild
+# penalty to very long resumes relative to AVG_RESUME_TERMS, a fixed reference so a resume scores the
+# same alone or in a batch.
+K1 = 0.5
+B = 0.3
+AVG_RESUME_TERMS = 350
+
+# Known skills outweigh the other words of a job description. With only one job description there is
+# no corpus to learn IDF from, so this prior stands in for it.
+SKILL_WEIGHT = 2.5
+
+# Canonical skill -> the spellings that mean it. Canonical names are what the API reports.
+SKILL_ALIASES = {
+    "javascript": ["js", "ecmascript"],
+    "typescript": ["ts"],
+    "python": ["python3"],
+    "java": [],
+    "c++": ["cpp"],
+    "c#": ["csharp", "c sharp"],
+    ".net": ["dotnet", "asp.net"],
+    "golang": ["go programming"],
+    "rust": [],
+    "ruby": [],
+    "php": [],
+    "swift": [],
+    "kotlin": [],
+    "scala": [],
+    "sql": ["structured query language"],
+    "postgresql": ["postgres", "psql"],
+    "mysql": [],
+    "mongodb": ["mongo"],
+    "redis": [],
+    "nosql": [],
+    "html": ["html5"],
+    "css": ["css3"],
+    "react": ["reactjs", "react.js"],
+    "angular": ["angularjs", "angular.js"],
+    "vue": ["vuejs", "vue.js"],
+    "node.js": ["nodejs"],
+    "django": [],
+    "flask": [],
+    "fastapi": [],
+    "spring": ["spring boot", "springboot"],
+    "rest api": ["restful", "restful api", "rest apis", "restful apis"],
+    "graphql": [],
+    "aws": ["amazon web services"],
+    "azure": ["microsoft azure"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "docker": ["containerization"],
+    "kubernetes": ["k8s"],
+    "terraform": [],
+    "ci/cd": ["cicd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "git": ["github", "gitlab"],
+    "linux": ["unix"],
+    "machine learning": ["ml"],
+    "deep learning": ["dl"],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "computer vision": [],
+    "data analysis": ["data analytics", "analyzing data", "data analyst"],
+    "data science": ["data scientist"],
+    "data visualization": ["data viz", "dashboards", "dashboarding"],
+    "statistics": ["statistical analysis", "statistical"],
+    "etl": ["data pipelines", "data pipeline"],
+    "tableau": [],
+    "power bi": ["powerbi"],
+    "excel": ["microsoft excel", "ms excel", "spreadsheets"],
+    "pandas": [],
+    "numpy": [],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "tensorflow": [],
+    "pytorch": ["torch"],
+    "spark": ["apache spark", "pyspark"],
+    "hadoop": [],
+    "airflow": ["apache airflow"],
+    "snowflake": [],
+    "salesforce": ["sfdc"],
+    "sap": [],
+    "jira": [],
+    "agile": ["scrum", "kanban"],
+    "project management": ["managing projects", "pmp"],
+    "product management": ["product manager"],
+    "stakeholder management": ["stakeholder communication", "stakeholders"],
+    "customer service": ["customer support", "client service"],
+    "communication": ["communication skills", "communicating"],
+    "leadership": ["team leadership", "led teams", "team lead"],
+    "problem solving": ["problem-solving", "troubleshooting"],
+    "seo": ["search engine optimization"],
+    "google analytics": ["ga4"],
+    "adobe creative suite": ["adobe cc", "photoshop", "illustrator", "indesign"],
+    "figma": [],
+    "ux design": ["ux", "user experience"],
+    "ui design": ["ui", "user interface"],
+    "quickbooks": [],
+    "accounting": ["bookkeeping"],
+    "financial analysis": ["financial modeling", "financial modelling"],
+    "budgeting": ["budgets", "budget management"],
+    "hipaa": [],
+    "epic ehr": ["epic emr"],
+    "patient care": [],
+    "cpr": ["bls", "basic life support"],
+    "a/b testing": ["ab testing", "split testing"],
+}
+
+STOPWORDS = frozenset("""
+a about above across after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each either etc few for from further
+had has have having he her here hers him his how i if in into is it its itself just like may me might
+more most must my no nor not of off on once only or other our ours out over own per same she should so
+some such than that the their theirs them then there these they this those through to too under until
+up us very via was we were what when where which while who whom why will with within without would you
+your yours
+ability able applicant apply background benefits candidate candidates company competitive daily degree
+demonstrated description duties environment equal excellent experience experienced familiarity
+familiar field highly ideal including join job knowledge looking new opportunity opportunities plus
+position preferred proficiency proficient proven qualifications qualified related required requirement
+requirements responsibilities responsible role salary seeking skill skills strong team teams understanding
+using well work working year years
+want wants need needs seek seeks hire hiring offer offers offering ensure ensures provide provides help
+helps make makes get gets take takes include includes look looks love thrive grow growing ideally please
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#./\-]*[a-z0-9+#]|[a-z0-9]")
+_DOTNET = re.compile(r"(?<![\w.])\.net\b")
+
+# Phrase (tuple of tokens) -> canonical skill, the longest phrase to look for, and the tokens phrases start with
+_PHRASES = {}
+for _skill, _aliases in SKILL_ALIASES.items():
+    for _spelling in [_skill, *_aliases]:
+        _PHRASES[tuple(_TOKEN.findall(_DOTNET.sub("dotnet", _spelling.lower())))] = _skill
+_MAX_PHRASE = max(len(phrase) for phrase in _PHRASES)
+_PHRASE_STARTS = frozenset(phrase[0] for phrase in _PHRASES)
+SKILL_TERMS = frozenset(SKILL_ALIASES)
+
+# Contact details never count as keywords
+_IGNORED_RESUME_FIELDS = {"full_name", "email", "phone", "linkedin", "start_date", "end_date"}
+
+
+def tokenize(text: str) -> list[str]:
+    # Lowercased word tokens that keep tech spellings like c++, c#, node.js and ci/cd intact
+    text = _DOTNET.sub("dotnet", (text or "").lower())
+    return [token.rstrip(".-/") for token in _TOKEN.findall(text)]
+
+
+def _stem(token: str) -> str:
+    # Plural folding only; anything more aggressive starts merging unrelated terms.
+    # analyses -> analysis, technologies -> technology, processes/boxes/matches/dashes -> drop "es",
+    # otherwise drop a final "s" (skills, databases) unless the singular itself ends in ss/us/is
+    if len(token) <= 4 or not token.endswith("s"):
+        return token
+    if token.endswith("yses"):
+        return token[:-2] + "is"
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("sses", "xes", "ches", "shes")):
+        return token[:-2]
+    if token.endswith(("ss", "us", "is")):
+        return token
+    return token[:-1]
+
+
+def extract_terms(text: str) -> list[str]:
+    # Tokens with skill spellings collapsed to their canonical name (longest phrase first),
+    # stopwords and letterless tokens dropped
+    tokens = tokenize(text)
+    terms = []
+    i = 0
+    while i < len(tokens):
+        longest = min(_MAX_PHRASE, len(tokens) - i) if tokens[i] in _PHRASE_STARTS else 0
+        for size in range(longest, 0, -1):
+            skill = _PHRASES.get(tuple(tokens[i:i + size]))
+            if skill is not None:
+                terms.append(skill)
+                i += size
+                break
+        else:
+            token = tokens[i]
+            # Tokens without a letter ("5+", "3-5", "24/7") are counts and schedules, not keywords
+            if token not in STOPWORDS and len(token) > 1 and any(c.isalpha() for c in token):
+                terms.append(_stem(token))
+            i += 1
+    return terms
+
+
+def resume_text(resume_json: dict) -> str:
+    # All the free text of a resume (summary, titles, bullets, skills, ...), without contact details
+    parts = []
+
+    def collect(value, key=None):
+        if key in _IGNORED_RESUME_FIELDS:
+            return
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, dict):
+            for child_key, child in value.items():
+                collect(child, child_key)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item, key)
+
+    collect(resume_json or {})
+    return "\n".join(parts)
+
+
+def job_keywords(job_description: str):
+    # The job description's terms in order of first appearance, with their weights
+    counts = Counter(extract_terms(job_description[:MAX_JOB_DESCRIPTION_CHARS]))
+    keywords = list(counts)
+    weights = [(1 + math.log(counts[term])) * (SKILL_WEIGHT if term in SKILL_TERMS else 1.0) for term in keywords]
+    return keywords, weights
+
+
+def score_resumes(resumes: list[dict], job_description: str) -> list[dict]:
+    # Score each resume_json against the job description: a 0-100 match plus matched and missing keywords
+    import numpy as np
+
+    keywords, weights = job_keywords(job_description)
+    if not keywords:
+        raise ValueError("The job description has no keywords to match against.")
+    column = {term: i for i, term in enumerate(keywords)}
+    weights = np.asarray(weights)
+
+    # Term frequencies of the job keywords in each resume, and each resume's length in terms
+    tf = np.zeros((len(resumes), len(keywords)))
+    lengths = np.empty(len(resumes))
+    for row, resume in enumerate(resumes):
+        terms = extract_terms(resume_text(resume))
+        lengths[row] = len(terms)
+        for term in terms:
+            col = column.get(term)
+            if col is not None:
+                tf[row, col] += 1
+
+    # BM25 term saturation scaled to [0, 1): mentioning a keyword matters far more than repeating it
+    norm = K1 * (1 - B + B * lengths / AVG_RESUME_TERMS)
+    coverage = tf * (K1 + 1) / (tf + norm[:, None]) / (K1 + 1)
+    scores = 100 * (coverage @ weights) / weights.sum()
+
+    # Missing/matched keywords reported by weight, heaviest first
+    by_weight = np.argsort(-weights, kind="stable")
+    results = []
+    for row in range(len(resumes)):
+        present = tf[row, by_weight] > 0
+        results.append({
+            "score": round(float(scores[row]), 1),
+            "matched_keywords": [keywords[i] for i in by_weight[present][:MAX_REPORTED_KEYWORDS]],
+            "missing_keywords": [keywords[i] for i in by_weight[~present][:MAX_REPORTED_KEYWORDS]],
+        })
+    return results
+
+
+async def score_resume(job_description: str, resume_json: dict | None = None, resume_id: str | None = None,
+                       user_id: str | None = None):
+    # Score one resume, given inline or by id; None if the stored resume doesn't exist
+    if resume_json is None:
+        row = await get_resume_repository().get(resume_id, select="resume_json", user_id=user_id)
+        if not row or not row.get("resume_json"):
+            return None
+        resume_json = row["resume_json"]
+    results = await asyncio.to_thread(score_resumes, [resume_json], job_description)
+    return results[0]
+
+
+async def score_user_resumes(user_id: str, job_description: str):
+    # Score one job description against all of a user's stored resumes at once, best match first
+    rows = await get_resume_repository().list_for_user(user_id, select=columns("id", "resume_name", "resume_json"))
+    rows = [row for row in rows if row.get("resume_json")]
+    if not rows:
+        return []
+    results = await asyncio.to_thread(score_resumes, [row["resume_json"] for row in rows], job_description)
+    ranked = [
+        {"resume_id": row["id"], "resume_name": row["resume_name"], **result}
+        for row, result in zip(rows, results)
+    ]
+    ranked.sort(key=lambda item: item["score"], reverse=True)
+    return ranked
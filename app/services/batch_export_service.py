@@ -0,0 +1,127 @@
+import os
+import re
+import json
+import asyncio
+import logging
+import zipfile
+
+from app.repositories.resume_repository import get_resume_repository
+from app.repositories.supabase_http import columns
+from app.services.export_service import html_to_pdf_bytes, html_to_docx_bytes
+from app.utils.metrics import EXPORTED_FILES
+
+# Batch export: the stored HTML of many resumes is fetched in one query, rendered concurrently
+# (PDFs bounded by the Chromium page pool, DOCX by EXPORT_PANDOC_WORKERS) and streamed back as a
+# ZIP, each file written as soon as it is rendered.
+
+logger = logging.getLogger(__name__)
+
+MAX_EXPORT_RESUMES = int(os.getenv("MAX_EXPORT_RESUMES", "200"))
+EXPORT_PANDOC_WORKERS = int(os.getenv("EXPORT_PANDOC_WORKERS", str(os.cpu_count() or 2)))
+
+EXPORT_FORMATS = {"pdf": ".pdf", "docx": ".docx"}
+EXPORT_COLUMNS = columns("id", "user_id", "resume_name", "resume_html", "preferences")
+
+
+class _ZipStream:
+    # Write-only sink for zipfile. It has no seek(), so zipfile streams entries with data descriptors,
+    # and drain() hands back whatever was written since the last call.
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _archive_name(resume_name: str, ext: str, used: set) -> str:
+    # Filesystem-safe, unique file name for a resume inside the archive
+    base = re.sub(r'[\\/:*?"<>|\x00-\x1f]+', "_", (resume_name or "").strip()).strip(". ") or "resume"
+    base = base[:120]
+    name = f"{base}{ext}"
+    suffix = 1
+    while name in used:
+        name = f"{base} ({suffix}){ext}"
+        suffix += 1
+    used.add(name)
+    return name
+
+
+async def fetch_export_rows(resume_ids: list[str], user_id: str | None = None):
+    # Stored HTML for the requested resumes in one query, plus {id: reason} for those that can't be exported
+    unique_ids = list(dict.fromkeys(resume_ids))
+    rows = await get_resume_repository().get_many(unique_ids, select=EXPORT_COLUMNS)
+    found = {row["id"]: row for row in rows if user_id is None or row.get("user_id") == user_id}
+
+    exportable, skipped = [], {}
+    for resume_id in unique_ids:
+        row = found.get(resume_id)
+        if row is None:
+            skipped[resume_id] = "not found"
+        elif not row.get("resume_html"):
+            skipped[resume_id] = "no generated HTML (uploaded resume)"
+        else:
+            exportable.append(row)
+    return exportable, skipped
+
+
+async def _render(row: dict, export_format: str, pandoc_slots: asyncio.Semaphore):
+    # BROWSER_POOL already caps concurrent PDF pages; pandoc subprocesses get their own cap
+    if export_format == "pdf":
+        return await html_to_pdf_bytes(row["resume_html"])
+    style = (row.get("preferences") or {}).get("style_choice") or "corporate"
+    async with pandoc_slots:
+        return await html_to_docx_bytes(row["resume_html"], style)
+
+
+async def stream_export_zip(rows: list[dict], skipped: dict, export_format: str):
+    # Yield the ZIP in pieces as renders finish; a manifest.json listing what was exported and skipped goes last
+    ext = EXPORT_FORMATS[export_format]
+    pandoc_slots = asyncio.Semaphore(EXPORT_PANDOC_WORKERS)
+
+    async def render(row):
+        try:
+            return row, await _render(row, export_format, pandoc_slots), None
+        except Exception as e:
+            return row, None, e
+
+    tasks = [asyncio.create_task(render(row)) for row in rows]
+    sink = _ZipStream()
+    used_names = set()
+    manifest = {"format": export_format, "files": [], "skipped": [{"id": k, "reason": v} for k, v in skipped.items()]}
+
+    try:
+        # Rendered files are already compressed, so they are stored rather than deflated again
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+            for next_render in asyncio.as_completed(tasks):
+                row, data, error = await next_render
+                if error is not None:
+                    logger.warning("Batch export of resume %s failed: %s", row["id"], error)
+                    EXPORTED_FILES.labels(format=export_format, outcome="failed").inc()
+                    manifest["skipped"].append({"id": row["id"], "reason": f"render failed: {error}"})
+                    continue
+                name = _archive_name(row.get("resume_name"), ext, used_names)
+                archive.writestr(name, data)
+                EXPORTED_FILES.labels(format=export_format, outcome="ok").inc()
+                manifest["files"].append({"id": row["id"], "file": name})
+                yield sink.drain()
+
+            archive.writestr("manifest.json", json.dumps(manifest, indent=2), compress_type=zipfile.ZIP_DEFLATED)
+        yield sink.drain()
+    finally:
+        # Client gone or stream failed: stop rendering what nobody will receive
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,275 @@
+import os
+import time
+import uuid
+import shutil
+import asyncio
+import hashlib
+import logging
+import zipfile
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from app.repositories.resume_repository import get_resume_repository
+from app.repositories.storage_repository import get_storage_repository
+from app.services.resume_service import parse_resume_file
+from app.services.text_extraction import extract_resume_text
+from app.utils.openai_client import get_openai
+from app.utils.metrics import IMPORT_FILES, track_stage
+from app.utils.usage import usage_scope
+from app.utils.admission import ADMISSION
+from app.utils.upload_ingest import IngestedUpload, RESUME_TYPES, MAX_UPLOAD_BYTES, UPLOAD_CHUNK_BYTES, matches_type
+
+# Bulk resume import from a ZIP archive, run as a background job:
+# unpack (bounded against zip bombs) -> extract text in a process pool -> parse with bounded LLM
+# concurrency and the shared token budget (through the hash-keyed parse cache) -> upload originals -> batched multi-row inserts.
+
+logger = logging.getLogger(__name__)
+
+MAX_IMPORT_BYTES = int(os.getenv("MAX_IMPORT_BYTES", str(200 * 1024 * 1024)))
+MAX_IMPORT_FILES = int(os.getenv("MAX_IMPORT_FILES", "500"))
+# Cap on the archive's total uncompressed size, checked before anything is unpacked
+MAX_IMPORT_UNCOMPRESSED_BYTES = int(os.getenv("MAX_IMPORT_UNCOMPRESSED_BYTES", str(1024 * 1024 * 1024)))
+IMPORT_EXTRACT_WORKERS = int(os.getenv("IMPORT_EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+IMPORT_PARSE_CONCURRENCY = int(os.getenv("IMPORT_PARSE_CONCURRENCY", "8"))
+# Tokens charged to the global admission budget per parse (prompt, resume text and the JSON reply)
+IMPORT_PARSE_TOKENS = int(os.getenv("IMPORT_PARSE_TOKENS", "4000"))
+IMPORT_INSERT_BATCH = int(os.getenv("IMPORT_INSERT_BATCH", "50"))
+# Finished jobs stay queryable for this long
+IMPORT_JOB_TTL_S = int(os.getenv("IMPORT_JOB_TTL_S", "3600"))
+
+# Errors kept per job for the status endpoint
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportJob:
+    # Progress of one bulk import, as reported by the status endpoint
+    def __init__(self, user_id: str, archive_name: str):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.archive_name = archive_name
+        self.status = "queued"
+        self.total = 0
+        self.parsed = 0
+        self.imported = 0
+        self.failed = 0
+        self.resume_ids = []
+        self.errors = []
+        self.created_at = time.time()
+        self.finished_at = None
+        self.task = None
+
+    def fail_file(self, filename: str, error):
+        self.failed += 1
+        IMPORT_FILES.labels(outcome="failed").inc()
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"file": filename, "error": str(error)})
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "archive_name": self.archive_name,
+            "total": self.total,
+            "parsed": self.parsed,
+            "imported": self.imported,
+            "failed": self.failed,
+            "resume_ids": self.resume_ids,
+            "errors": self.errors,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+# In-memory job registry
+IMPORT_JOBS: dict[str, ImportJob] = {}
+
+_extract_pool = None
+_extract_pool_lock = threading.Lock()
+
+
+def _extraction_pool() -> ProcessPoolExecutor:
+    # Spawned rather than forked, since the server process already runs threads
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=IMPORT_EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _extract_pool
+
+
+def _extract_in_pool(path: str) -> str:
+    # PyMuPDF/python-docx extraction is CPU-bound and holds the GIL, so it runs in worker processes
+    return _extraction_pool().submit(extract_resume_text, path).result()
+
+
+def shutdown_import_pool():
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is not None:
+            _extract_pool.shutdown(wait=False, cancel_futures=True)
+            _extract_pool = None
+
+
+def _unpack_member(archive: zipfile.ZipFile, member: zipfile.ZipInfo, path: str, ext: str) -> IngestedUpload:
+    # Copy one archive member to disk, checking its magic bytes and actual (not declared) size
+    digest = hashlib.sha256()
+    size = 0
+    with archive.open(member) as source, open(path, "wb") as target:
+        while chunk := source.read(UPLOAD_CHUNK_BYTES):
+            if size == 0 and not matches_type(chunk, ext):
+                raise ValueError("Unsupported file type. Only PDF and DOCX resumes are supported.")
+            size += len(chunk)
+            if size > MAX_UPLOAD_BYTES:
+                raise ValueError(f"File exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit.")
+            digest.update(chunk)
+            target.write(chunk)
+    if size == 0:
+        raise ValueError("File is empty.")
+    return IngestedUpload(os.path.basename(member.filename), path, ext, size, digest.hexdigest())
+
+
+def _unpack_archive(job: ImportJob, archive_path: str, work_dir: str) -> list[IngestedUpload]:
+    # Unpack the resumes in the archive into work_dir; other files are reported and skipped
+    uploads = []
+    with zipfile.ZipFile(archive_path) as archive:
+        members = []
+        for member in archive.infolist():
+            name = os.path.basename(member.filename)
+            # Directories, hidden files and macOS resource forks aren't resumes
+            if member.is_dir() or not name or name.startswith(".") or member.filename.startswith("__MACOSX/"):
+                continue
+            members.append(member)
+
+        if len(members) > MAX_IMPORT_FILES:
+            raise ValueError(f"Archive holds {len(members)} files; the limit is {MAX_IMPORT_FILES}.")
+        if sum(member.file_size for member in members) > MAX_IMPORT_UNCOMPRESSED_BYTES:
+            raise ValueError("Archive is too large once uncompressed.")
+
+        job.total = len(members)
+        for index, member in enumerate(members):
+            ext = os.path.splitext(member.filename)[1].lower()
+            if ext not in RESUME_TYPES:
+                job.fail_file(member.filename, "Unsupported file type. Only PDF and DOCX resumes are supported.")
+                continue
+            path = os.path.join(work_dir, f"{index}{ext}")
+            try:
+                uploads.append(_unpack_member(archive, member, path, ext))
+            except (ValueError, zipfile.BadZipFile, OSError) as e:
+                job.fail_file(member.filename, e)
+    return uploads
+
+
+async def _prepare_row(job: ImportJob, index: int, upload: IngestedUpload, client, semaphore: asyncio.Semaphore):
+    # Parse one resume and store its original; returns the row to insert, or None if it failed
+    async with semaphore:
+        try:
+            # Imports share the tokens-per-minute budget with interactive traffic, yielding to it when tight
+            await ADMISSION.reserve_background(IMPORT_PARSE_TOKENS)
+            parsed = await asyncio.to_thread(parse_resume_file, upload, client, _extract_in_pool)
+            if parsed is None:
+                raise ValueError("Could not parse resume.")
+            job.parsed += 1
+
+            # One folder per file keeps duplicate names in an archive apart while preserving the original name
+            storage_path = f"{job.user_id}/imports/{job.id}/{index}/{upload.filename}"
+            file_bytes = await asyncio.to_thread(upload.read_bytes)
+            await get_storage_repository().upload(storage_path, file_bytes)
+        except Exception as e:
+            job.fail_file(upload.filename, e)
+            return None
+        finally:
+            upload.cleanup()
+
+    return {
+        "user_id": job.user_id,
+        "resume_json": parsed,
+        "resume_name": upload.filename,
+        "resume_html": None,
+        "preferences": None,
+        "original_file_path": storage_path,
+        "source_type": "upload",
+    }
+
+
+async def _insert_batch(job: ImportJob, rows: list[dict]):
+    if not rows:
+        return
+    try:
+        inserted = await get_resume_repository().insert_many(rows, returning="id")
+    except Exception as e:
+        logger.warning("Bulk import %s: inserting %d rows failed: %s", job.id, len(rows), e)
+        for row in rows:
+            job.fail_file(row["resume_name"], e)
+        # Don't leave orphaned originals behind for rows that never made it into the table
+        try:
+            await get_storage_repository().remove([row["original_file_path"] for row in rows])
+        except Exception as cleanup_error:
+            logger.warning("Bulk import %s: removing orphaned originals failed: %s", job.id, cleanup_error)
+        return
+    job.resume_ids.extend(row["id"] for row in inserted)
+    job.imported += len(inserted)
+    IMPORT_FILES.labels(outcome="imported").inc(len(inserted))
+
+
+async def _run_import(job: ImportJob, archive: IngestedUpload):
+    work_dir = tempfile.mkdtemp(prefix="resume-import-")
+    try:
+        job.status = "extracting"
+        with track_stage("import_unpack"):
+            uploads = await asyncio.to_thread(_unpack_archive, job, archive.path, work_dir)
+        archive.cleanup()
+
+        job.status = "importing"
+        client = get_openai()
+        semaphore = asyncio.Semaphore(IMPORT_PARSE_CONCURRENCY)
+        with usage_scope(user_id=job.user_id):
+            tasks = [
+                asyncio.create_task(_prepare_row(job, index, upload, client, semaphore))
+                for index, upload in enumerate(uploads)
+            ]
+
+        # Insert in batches as parses finish, rather than one round trip per resume or one at the very end
+        pending = []
+        for next_row in asyncio.as_completed(tasks):
+            row = await next_row
+            if row is not None:
+                pending.append(row)
+            if len(pending) >= IMPORT_INSERT_BATCH:
+                await _insert_batch(job, pending)
+                pending = []
+        await _insert_batch(job, pending)
+        job.status = "done"
+    except Exception as e:
+        logger.error("Bulk import %s failed: %s", job.id, e)
+        job.status = "failed"
+        job.errors.append({"file": job.archive_name, "error": str(e)})
+    finally:
+        job.finished_at = time.time()
+        archive.cleanup()
+        shutil.rmtree(work_dir, ignore_errors=True)
+        logger.info(
+            "Bulk import %s %s: %d imported, %d failed of %d", job.id, job.status, job.imported, job.failed, job.total
+        )
+
+
+def _prune_jobs():
+    cutoff = time.time() - IMPORT_JOB_TTL_S
+    for job_id, job in list(IMPORT_JOBS.items()):
+        if job.finished_at is not None and job.finished_at < cutoff:
+            IMPORT_JOBS.pop(job_id, None)
+
+
+def start_import_job(archive: IngestedUpload, user_id: str) -> ImportJob:
+    # Register a job for an ingested ZIP and run it in the background; the job owns the archive file
+    _prune_jobs()
+    job = ImportJob(user_id, archive.filename)
+    IMPORT_JOBS[job.id] = job
+    job.task = asyncio.create_task(_run_import(job, archive))
+    return job
+
+
+def get_import_job(job_id: str):
+    return IMPORT_JOBS.get(job_id)
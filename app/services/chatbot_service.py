@@ -1,23 +1,47 @@
+import os
 import uuid
-from chatbot import (
+import asyncio
+import logging
+from app.services.llm_service import (
     init_conversation,
     get_resume_json,
     get_resume_preferences,
 )
-from app.utils.openai_client import get_openai
+from app.services.layout_service import fit_resume_html
+from app.services.export_service import html_to_pdf_bytes
+from app.utils.openai_client import get_openai, chat_completion, stream_chat_completion
+from app.utils.metrics import SESSIONS_STARTED, SPECULATIONS, watch_sessions
+from app.utils.usage import usage_scope
+from app.utils.admission import estimate_tokens
+from app.repositories.session_snapshots import snapshot_sessions
 
-# In-memory session storage
-SESSIONS = {}
+logger = logging.getLogger(__name__)
+
+READY_PHRASE = "i'm ready to generate the resume."
+
+# Pre-render the PDF as well when a chat signals readiness (costs a Chromium render per finished chat)
+SPECULATIVE_PDF = os.getenv("SPECULATIVE_PDF", "0") == "1"
+
+# In-memory session storage, snapshotted to disk so conversations survive a restart
+SESSIONS = snapshot_sessions(
+    "chatbot",
+    fields=("user_id", "resume_json", "preferences_json", "turn"),
+    defaults={"speculation": None},
+)
+watch_sessions("chatbot", SESSIONS)
 
 def start_chat_session(user_id=None):
     session_id = str(uuid.uuid4())
     messages = init_conversation()
+    SESSIONS_STARTED.labels(kind="chatbot").inc()
 
     SESSIONS[session_id] = {
         "messages": messages,
         "user_id": user_id,
         "resume_json": {},           
         "preferences_json": {},      
+        "turn": 0,
+        "speculation": None,
     }
 
     # Return assistant greeting
@@ -27,30 +51,32 @@ def start_chat_session(user_id=None):
     }
 
 
-def send_chat_message(session_id: str, text: str):
+def chat_message_demand(session_id: str, text: str):
+    # Who a chat turn is charged to and roughly how many tokens it will use, for admission control
     session = SESSIONS.get(session_id)
     if not session:
-        return {"error": "Invalid session_id"}
+        return session_id, estimate_tokens(text)
+    return session.get("user_id") or session_id, estimate_tokens(session["messages"], text)
 
-    client = get_openai()
 
-    # Append user message
+def _turn_messages(session: dict, text: str):
+    # History plus the new user message; the session only records it once the reply is complete
+    return [*session["messages"], {"role": "user", "content": text}]
+
+
+def _finish_turn(session_id: str, session: dict, text: str, reply: str):
+    # Record the user message together with its reply, so a failed or abandoned turn leaves no dangling user turn
     session["messages"].append({"role": "user", "content": text})
+    session["messages"].append({"role": "assistant", "content": reply})
 
-    # Get assistant reply
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=session["messages"],
-            temperature=0.5,
-        )
-        reply = completion.choices[0].message.content
-        session["messages"].append({"role": "assistant", "content": reply})
-    except Exception as e:
-        return {"error": str(e)}
+    # Anything extracted from the conversation so far is now out of date
+    session["turn"] = session.get("turn", 0) + 1
+    session["resume_json"] = {}
+    session["preferences_json"] = {}
+    session["speculation"] = None
 
     # Detect readiness
-    ready = "i'm ready to generate the resume." in reply.lower()
+    ready = READY_PHRASE in reply.lower()
 
     return {
         "reply": reply,
@@ -59,23 +85,141 @@ def send_chat_message(session_id: str, text: str):
     }
 
 
+def send_chat_message(session_id: str, text: str):
+    session = SESSIONS.get(session_id)
+    if not session:
+        return {"error": "Invalid session_id"}
+
+    client = get_openai()
+
+    # Get assistant reply
+    try:
+        with usage_scope(session_id=session_id, user_id=session.get("user_id")):
+            completion = chat_completion(
+                client, "chat_turn",
+                model="gpt-4o",
+                messages=_turn_messages(session, text),
+                temperature=0.5,
+            )
+        reply = completion.choices[0].message.content
+    except Exception as e:
+        return {"error": str(e)}
+
+    return _finish_turn(session_id, session, text, reply)
+
+
+def stream_chat_message(session_id: str, text: str):
+    # Generator form of send_chat_message for the WebSocket transport: yields reply tokens,
+    # then returns the same result dict once the reply is complete
+    session = SESSIONS.get(session_id)
+    if not session:
+        return {"error": "Invalid session_id"}
+
+    client = get_openai()
+
+    parts = []
+    with usage_scope(session_id=session_id, user_id=session.get("user_id")):
+        for delta in stream_chat_completion(
+            client, "chat_turn",
+            model="gpt-4o",
+            messages=_turn_messages(session, text),
+            temperature=0.5,
+        ):
+            parts.append(delta)
+            yield delta
+
+    return _finish_turn(session_id, session, text, "".join(parts))
+
+
+async def _speculate(session_id: str, session: dict, turn: int):
+    # Run what the frontend will ask for next: resume JSON and preferences in parallel, then the fitted HTML
+    client = get_openai()
+    messages = list(session["messages"])
+    with usage_scope(session_id=session_id, user_id=session.get("user_id")):
+        resume_json, preferences = await asyncio.gather(
+            asyncio.to_thread(get_resume_json, messages, client),
+            asyncio.to_thread(get_resume_preferences, messages, client),
+        )
+
+    # The user kept chatting while this ran, so the results describe an older conversation
+    if session.get("turn") != turn:
+        SPECULATIONS.labels(outcome="stale").inc()
+        return
+    session["resume_json"] = resume_json
+    session["preferences_json"] = preferences
+
+    # fit_resume_html caches the density level, so /resume/generate for this JSON skips the Chromium measuring,
+    # and the PDF lands in PDF_CACHE keyed by the exact HTML /resume/generate will return
+    html = await fit_resume_html(resume_json, preferences)
+    if SPECULATIVE_PDF:
+        await html_to_pdf_bytes(html)
+    SPECULATIONS.labels(outcome="completed").inc()
+
+
+def start_speculation(session_id: str):
+    # Called once a reply signals readiness; the follow-up getters wait on this instead of repeating the work
+    session = SESSIONS.get(session_id)
+    if not session:
+        return None
+    task = asyncio.create_task(_speculate(session_id, session, session.get("turn", 0)))
+    task.add_done_callback(_log_speculation_failure)
+    session["speculation"] = task
+    SPECULATIONS.labels(outcome="started").inc()
+    return task
+
+
+def _log_speculation_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        SPECULATIONS.labels(outcome="failed").inc()
+        logger.warning("Speculative resume generation failed: %s", task.exception())
+
+
+async def _await_speculation(session: dict):
+    # Wait for an in-flight speculation covering the current turn; its failures fall back to the normal path
+    task = session.get("speculation")
+    if task is None or task.done():
+        return
+    try:
+        await asyncio.shield(task)
+    except Exception:
+        pass
+
+
+async def speculation_result(session_id: str):
+    # Wait for the session's speculation; the extracted resume JSON and preferences, or None if it failed or went stale
+    session = SESSIONS.get(session_id)
+    if not session:
+        return None
+    await _await_speculation(session)
+    if not session.get("resume_json") or not session.get("preferences_json"):
+        return None
+    return {"resume_json": session["resume_json"], "preferences": session["preferences_json"]}
+
+
+def has_session(session_id: str):
+    return session_id in SESSIONS
+
 
-def get_resume_json_from_session(session_id: str):
+async def get_resume_json_from_session(session_id: str):
     session = SESSIONS.get(session_id)
     if not session:
         return {"resume_json": {}}
+    await _await_speculation(session)
     if not session.get("resume_json"):
         client = get_openai()
-        resume_json = get_resume_json(session["messages"], client)
+        with usage_scope(session_id=session_id, user_id=session.get("user_id")):
+            resume_json = await asyncio.to_thread(get_resume_json, session["messages"], client)
         session["resume_json"] = resume_json
     return {"resume_json": session["resume_json"]}
 
-def get_preferences_from_session(session_id):
+async def get_preferences_from_session(session_id):
     session = SESSIONS.get(session_id)
     if not session:
         return {"preferences": {}}
+    await _await_speculation(session)
     if not session.get("preferences_json"):
         client = get_openai()
-        preferences = get_resume_preferences(session["messages"], client)
+        with usage_scope(session_id=session_id, user_id=session.get("user_id")):
+            preferences = await asyncio.to_thread(get_resume_preferences, session["messages"], client)
         session["preferences_json"] = preferences
     return {"preferences": session["preferences_json"]}
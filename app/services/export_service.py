@@ -1,44 +1,51 @@
 import os
+import asyncio
+import hashlib
 import tempfile
 import subprocess
-from playwright.async_api import async_playwright
+from app.utils.browser_pool import BROWSER_POOL
+from app.utils.byte_cache import ByteCache
+from app.utils.metrics import timed_stage, track_stage
 
+# Rendered PDFs by HTML hash, so a PDF pre-rendered speculatively (or exported twice) is served without Chromium
+PDF_CACHE = ByteCache(
+    max_bytes=int(os.getenv("PDF_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    max_item_bytes=int(os.getenv("PDF_CACHE_MAX_ITEM_BYTES", str(2 * 1024 * 1024))),
+)
+
+
+def _html_key(html: str) -> str:
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
 
-async def html_to_pdf_bytes(html: str) -> bytes:
-    # Render the HTML to PDF using Playwright
-    with tempfile.TemporaryDirectory() as tmpdir:
-        html_path = os.path.join(tmpdir, "resume.html")
-        pdf_path = os.path.join(tmpdir, "resume.pdf")
-
-        # Write HTML to a temp file
-        with open(html_path, "w", encoding="utf-8") as f:
-            f.write(html)
-
-        # Playwright rendering
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(args=["--no-sandbox"])
-            context = await browser.new_context()
-            page = await context.new_page()
-
-            await page.goto(f"file://{html_path}")
-
-            await page.pdf(
-                path=pdf_path,
-                format="Letter",
-                margin={"top": "0", "bottom": "0", "left": "0", "right": "0"},
-                print_background=True,
-                prefer_css_page_size=True,
-                scale=1.0,
-            )
 
-            await browser.close()
+async def html_to_pdf_bytes(html: str) -> bytes:
+    # Serve from PDF_CACHE when this exact HTML was rendered before
+    key = _html_key(html)
+    pdf_bytes = PDF_CACHE.get(key)
+    if pdf_bytes is None:
+        pdf_bytes = await _render_pdf(html)
+        PDF_CACHE.put(key, pdf_bytes)
+    return pdf_bytes
+
+
+@timed_stage("chromium_pdf")
+async def _render_pdf(html: str) -> bytes:
+    # Render the HTML to PDF on a page borrowed from the shared Chromium pool
+    async with BROWSER_POOL.page() as page:
+        await page.set_content(html, wait_until="load")
+
+        pdf_bytes = await page.pdf(
+            format="Letter",
+            margin={"top": "0", "bottom": "0", "left": "0", "right": "0"},
+            print_background=True,
+            prefer_css_page_size=True,
+            scale=1.0,
+        )
 
-        if not os.path.exists(pdf_path):
-            raise Exception("PDF was not generated.")
+    if not pdf_bytes:
+        raise Exception("PDF was not generated.")
 
-        # Read the resulting PDF
-        with open(pdf_path, "rb") as f:
-            return f.read()
+    return pdf_bytes
 
 
 REFERENCE_DIR = "/app/reference-docx"
@@ -65,17 +72,20 @@ async def html_to_docx_bytes(html_content: str, style_choice: str = "corporate")
         temp_docx_path = temp_docx.name
 
     try:
-        subprocess.run(
-            [
-                "pandoc",
-                temp_html_path,
-                "--from=html",
-                "--to=docx",
-                f"--reference-doc={reference_path}",
-                "--output", temp_docx_path
-            ],
-            check=True
-        )
+        # Pandoc runs in a worker thread so concurrent conversions don't stall the event loop
+        with track_stage("pandoc_html_to_docx"):
+            await asyncio.to_thread(
+                subprocess.run,
+                [
+                    "pandoc",
+                    temp_html_path,
+                    "--from=html",
+                    "--to=docx",
+                    f"--reference-doc={reference_path}",
+                    "--output", temp_docx_path
+                ],
+                check=True
+            )
 
         with open(temp_docx_path, "rb") as file:
             return file.read()
@@ -1,69 +1,96 @@
 import uuid
-import json
+import asyncio
+import logging
 from typing import Dict, Any
-from datetime import datetime
 
-from app.utils.supabase_client import supabase
-from app.utils.openai_client import get_openai
-from app.services.analysis_service import analyze_resume_service
-from chatbot import (
+from app.repositories.resume_repository import get_resume_repository
+from app.repositories.storage_repository import get_storage_repository
+from app.repositories.supabase_http import columns
+from app.utils.openai_client import get_openai, chat_completion, stream_chat_completion
+from app.utils.metrics import SESSIONS_STARTED, watch_sessions
+from app.utils.usage import usage_scope
+from app.utils.admission import estimate_tokens
+from app.utils.resume_serialization import resume_for_prompt
+from app.repositories.session_snapshots import snapshot_sessions
+from app.services.analysis_service import prepare_analysis_inputs, analyze_prepared_resume
+from app.services.prompts import improvement_system_prompt
+from app.services.llm_service import (
     get_resume_json,
     get_resume_preferences,
     normalize_descriptions,
 )
-from render_resume import generate_html_from_template
-from app.services.resume_service import generate_unique_resume_name
+from app.services.layout_service import fit_resume_html
+from app.services.resume_service import insert_resume_with_unique_name
 
-# In-memory improvement sessions
-IMPROVE_SESSIONS: Dict[str, Dict[str, Any]] = {}
+logger = logging.getLogger(__name__)
 
-def _get_resume_file_bytes_and_ext(resume: dict):
+# Token allowance reserved for the page images sent with the vision analysis
+ANALYSIS_IMAGE_TOKENS = 2000
+
+# In-memory improvement sessions, snapshotted to disk so conversations survive a restart.
+# The prewarm task isn't persisted; restored sessions prepare the analysis inputs on demand.
+IMPROVE_SESSIONS: Dict[str, Dict[str, Any]] = snapshot_sessions(
+    "improvement",
+    fields=("resume_id", "user_id", "parsed_resume", "original_file_path", "file_ext", "target_job", "analysis", "stage"),
+)
+watch_sessions("improvement", IMPROVE_SESSIONS)
+
+def _get_resume_file_path_and_ext(resume: dict):
+    # Work out which original file (if any) the analysis needs, without downloading it
     source_type = resume.get("source_type")
     original_path = resume.get("original_file_path")
-    file_bytes = None
     file_ext = None
 
     if source_type == "upload" and original_path:
+        path_lower = original_path.lower()
+        if path_lower.endswith(".pdf"):
+            file_ext = ".pdf"
+        elif path_lower.endswith(".docx"):
+            file_ext = ".docx"
+
+    return original_path, file_ext
+
+
+async def _prepare_session_analysis(original_path, parsed_resume, file_ext):
+    # Fetch the original file only for PDFs, since only they get visual analysis
+    file_bytes = None
+    if file_ext == ".pdf" and original_path:
         try:
-            file_bytes = supabase.storage.from_("resumes").download(original_path)
-            if file_bytes:
-                path_lower = original_path.lower()
-                if path_lower.endswith(".pdf"):
-                    file_ext = ".pdf"
-                elif path_lower.endswith(".docx"):
-                    file_ext = ".docx"
+            file_bytes = await get_storage_repository().download(original_path)
         except Exception as e:
-            print(f"Warning: could not download original file for analysis: {e}")
+            logger.warning("Could not download original file for analysis: %s", e)
 
-    return file_bytes, file_ext
+    # Rasterization is CPU-bound, keep it off the event loop
+    return await asyncio.to_thread(prepare_analysis_inputs, file_bytes, parsed_resume, file_ext)
 
 
-def start_improvement_session(resume_id: str, user_id: str):
+async def start_improvement_session(resume_id: str, user_id: str):
     # Load resume from Supabase
-    row = (
-        supabase.table("resumes")
-        .select("*")
-        .eq("id", resume_id)
-        .eq("user_id", user_id)
-        .single()
-        .execute()
+    resume = await get_resume_repository().get(
+        resume_id,
+        select=columns("resume_json", "source_type", "original_file_path"),
+        user_id=user_id,
     )
-    if not row.data:
+    if not resume:
         raise ValueError("Resume not found")
 
-    resume = row.data
     parsed_resume = resume.get("resume_json") or {}
 
-    file_bytes, file_ext = _get_resume_file_bytes_and_ext(resume)
+    original_path, file_ext = _get_resume_file_path_and_ext(resume)
+
+    # Start fetching/rasterizing/serializing now, the target job isn't needed until the GPT-4o call
+    prewarm = asyncio.create_task(_prepare_session_analysis(original_path, parsed_resume, file_ext))
 
     #Initialize improvement session
     session_id = str(uuid.uuid4())
+    SESSIONS_STARTED.labels(kind="improvement").inc()
     IMPROVE_SESSIONS[session_id] = {
         "resume_id": resume_id,
         "user_id": user_id,
         "parsed_resume": parsed_resume,
-        "file_bytes": file_bytes,
-        "file_ext": file_ext,  
+        "original_file_path": original_path,
+        "file_ext": file_ext,
+        "prewarm": prewarm,
         "target_job": None,
         "analysis": None,
         "messages": [],  
@@ -80,89 +107,40 @@ def start_improvement_session(resume_id: str, user_id: str):
     }
 
 
+async def _get_prepared_analysis_inputs(session: dict):
+    # Collect the prewarmed analysis inputs, redoing the work inline if the background job failed
+    prewarm = session.pop("prewarm", None)
+    if prewarm is not None:
+        try:
+            return await prewarm
+        except Exception as e:
+            logger.warning("Analysis prewarm failed, retrying inline: %s", e)
+
+    return await _prepare_session_analysis(
+        session.get("original_file_path"),
+        session["parsed_resume"],
+        session.get("file_ext"),
+    )
+
+
 def _build_improvement_system_prompt(target_job: str, analysis: str, parsed_resume: dict):
     # Build the system prompt for the improvement chatbot session (1st part of improvement flow)
-    today = datetime.today().strftime("%B %Y")
-
-    system_context = f"""
-    Today's date is {today}.
-    You are a resume improvement assistant.
-    The user is targeting a role in: {target_job}.
-    You have already analyzed their resume and provided the following feedback:
-    {analysis}
-
-    You will work with this resume data in JSON format, following the schema below
-    and starting with the user's parsed resume data below in JSON format.
-    Schema:
-                    {{
-                    "full_name": "",
-                    "email": "",
-                    "phone": "",
-                    "linkedin": "",
-                    "summary": "",
-                    "experience": [
-                        {{
-                            "job_title": "",
-                            "company": "",
-                            "location": "",
-                            "start_date": "",
-                            "end_date": "",
-                            "description": []
-                        }}
-                    ],
-                    "education": [...],
-                    "skills": [...],
-                    "certifications": [...],
-                    "projects": [...],
-                    "volunteer": [...]
-                    }}
-
-    Here is the current parsed resume data in JSON format to start with:
-    {json.dumps(parsed_resume, indent=2)}
-
-    Rules:
-    - Keep this JSON updated internally whenever the user approves a change.
-        - Never mention to the user that you are updating the internal JSON, just do so silently after they confirm.
-    -After completing an improvement, you MUST propose the next most impactful improvement remaining.
-        - Do NOT wait for the user to guess what to improve next.
-        - Always say what the next potential improvement is (e.g., “Next, we could improve X, Y, or Z.”).
-        - Present improvements one at a time in priority order: High → Moderate → Optional.
-        - After each improvement, ask: “Would you like to apply this change?” 
-        - Only move on when the user says “yes” or “no,” but ALWAYS tell them the next available improvement.
-        - Continue until there are no more improvements left.
-        - When no improvements remain, say: “All improvements are complete. I’m ready to generate the resume.”
-    - Modify only existing fields; never invent new keys or reorder sections arbitrarily.
-    - When suggesting edits, quote the original bullet, explain the rationale, and apply the edit only if the user confirms.
-        - After confirmation, update your internal JSON immediately.
-        - NEVER provide the JSON to the user unless they specifically request it, it should be kept internal and the backend may prompt for it at any time.
-    - Do not lose prior changes — this JSON must always stay current.
-    - If the user asks to view or generate the resume, return only the latest JSON.
-    - Never insist on adding a professional summary unless it is STRONGLY encouraged for this industry/job type.
-    - NEVER suggest bold, italics, underlining, or any selective highlighting of specific skills or keywords.
-    - The resume must remain fully ATS-friendly and uniform with no emphasis styles.
-    - If recommending the user include specific metrics, provide an example of how it could be phrased, but ask the user if they have any metrics they can provide.
-        - Do not invent metrics for them, only help them phrase real metrics they provide if they have any. 
-        - If they do not have metrics, try to help them strengthen impact in other ways if necessary.
-        - Never use the example metrics if the user claims they do not have any relevant metrics.
-    - If the industry/job type typically skips summaries, do not prompt the user for one.
-    - Use the resume content already provided to inform your guidance - only ask for details that are clearly missing.
-    - When suggesting improvements, focus on relevance, impact, and ATS optimization, not unnecessary sections.
-    - Using this context, help the user improve their resume step by step.
-    - Ask one focused question at a time.
-    - Keep all context in memory.
-    - When suggesting changes, explain why they matter from a recruiter's perspective.
-    - Prioritize sections that have the highest impact for this industry first.
-    - If a user refuses to implement a change, move on to the next suggestion without argument.
-    - When finished, offer to generate an improved resume for this industry.
-    - When the user confirms that all changes are complete or says "yes" to proceed with generation,
-        respond only with the phrase: "Sounds good! I'm ready to generate the resume."
-        - Do not include any other text or explanation.       
-    """
-
-    return system_context
-
-
-def continue_improvement_session(session_id: str, user_message: str):
+    return improvement_system_prompt(target_job, analysis, parsed_resume)
+
+
+def improvement_message_demand(session_id: str, user_message: str):
+    # Who an improvement turn is charged to and roughly how many tokens it will use, for admission control
+    session = IMPROVE_SESSIONS.get(session_id)
+    if not session:
+        return session_id, estimate_tokens(user_message)
+    key = session.get("user_id") or session_id
+    if session["stage"] == "awaiting_target_job":
+        # The first turn runs the resume analysis, which also sends the page images
+        return key, estimate_tokens(resume_for_prompt(session["parsed_resume"]), user_message) + ANALYSIS_IMAGE_TOKENS
+    return key, estimate_tokens(session["messages"], user_message)
+
+
+async def continue_improvement_session(session_id: str, user_message: str):
     # 2nd part of improvement flow
     session = IMPROVE_SESSIONS.get(session_id)
     if not session:
@@ -175,16 +153,12 @@ def continue_improvement_session(session_id: str, user_message: str):
         target_job = user_message.strip()
         session["target_job"] = target_job
 
-        file_bytes = session.get("file_bytes")
-        file_ext = (session.get("file_ext") or "").lower()
         parsed_resume = session["parsed_resume"]
+        prepared = await _get_prepared_analysis_inputs(session)
 
-        if file_ext == ".pdf" and file_bytes:
-            # visual + text analysis for PDF resumes
-            analysis_result = analyze_resume_service(file_bytes, parsed_resume, target_job, file_ext)
-        else:
-            # Text-only analysis fallback (DOCX or chatbot resume)
-            analysis_result = analyze_resume_service(None, parsed_resume, target_job, file_ext)
+        # Visual + text analysis for PDF resumes, text-only fallback for DOCX or chatbot resumes
+        with usage_scope(session_id=session_id, user_id=session["user_id"]):
+            analysis_result = await asyncio.to_thread(analyze_prepared_resume, prepared, parsed_resume, target_job)
 
         if "error" in analysis_result:
             analysis_text = f"Analysis failed: {analysis_result['error']}"
@@ -214,19 +188,26 @@ def continue_improvement_session(session_id: str, user_message: str):
         return {
             "assistant_message": assistant_intro,
             "ready_to_finalize": False,
+            "analysis": analysis_text,
         }
 
     # Begin improvement chat loop
-    messages = session["messages"]
-    messages.append({"role": "user", "content": user_message})
+    with usage_scope(session_id=session_id, user_id=session["user_id"]):
+        completion = await asyncio.to_thread(
+            chat_completion,
+            client, "improvement_turn",
+            model="gpt-4o",
+            messages=[*session["messages"], {"role": "user", "content": user_message}],
+            temperature=0.5,
+        )
+    return _finish_improvement_turn(session, user_message, completion.choices[0].message.content)
 
-    completion = client.chat.completions.create(
-        model="gpt-4o",
-        messages=messages,
-        temperature=0.5,
-    )
-    reply = completion.choices[0].message.content.strip()
-    messages.append({"role": "assistant", "content": reply})
+
+def _finish_improvement_turn(session: dict, user_message: str, reply: str):
+    # Record the user message together with its reply, so a failed or abandoned turn leaves no dangling user turn
+    reply = reply.strip()
+    session["messages"].append({"role": "user", "content": user_message})
+    session["messages"].append({"role": "assistant", "content": reply})
 
     ready = "i'm ready to generate the resume." in reply.lower()
 
@@ -236,7 +217,36 @@ def continue_improvement_session(session_id: str, user_message: str):
     }
 
 
-def finalize_improvement_session(session_id: str):
+def stream_improvement_turn(session_id: str, user_message: str):
+    # Generator form of an improvement chat turn for the WebSocket transport: yields reply tokens,
+    # then returns the same result dict as continue_improvement_session
+    session = IMPROVE_SESSIONS.get(session_id)
+    if not session:
+        raise ValueError("Improvement session not found")
+
+    client = get_openai()
+
+    parts = []
+    with usage_scope(session_id=session_id, user_id=session["user_id"]):
+        for delta in stream_chat_completion(
+            client, "improvement_turn",
+            model="gpt-4o",
+            messages=[*session["messages"], {"role": "user", "content": user_message}],
+            temperature=0.5,
+        ):
+            parts.append(delta)
+            yield delta
+
+    return _finish_improvement_turn(session, user_message, "".join(parts))
+
+
+def improvement_stage(session_id: str):
+    # "awaiting_target_job" until the first turn has run the analysis, then "improving"; None if unknown
+    session = IMPROVE_SESSIONS.get(session_id)
+    return session["stage"] if session else None
+
+
+async def finalize_improvement_session(session_id: str):
     # 3rd part of improvement flow, generate and store improved resume
     session = IMPROVE_SESSIONS.get(session_id)
     if not session:
@@ -245,41 +255,33 @@ def finalize_improvement_session(session_id: str):
     client = get_openai()
     messages = session["messages"]
 
-    # Get final JSON + preferences from AI
-    resume_json = get_resume_json(messages, client)
+    # Get final JSON + preferences from AI, in parallel and off the event loop
+    with usage_scope(session_id=session_id, user_id=session["user_id"]):
+        resume_json, preferences = await asyncio.gather(
+            asyncio.to_thread(get_resume_json, messages, client),
+            asyncio.to_thread(get_resume_preferences, messages, client),
+        )
     resume_json = normalize_descriptions(resume_json)
-    preferences = get_resume_preferences(messages, client)
 
-    html_resume = generate_html_from_template(resume_json, preferences)
+    html_resume = await fit_resume_html(resume_json, preferences)
 
     # Fetch original resume name
-    row = (
-        supabase.table("resumes")
-        .select("resume_name")
-        .eq("id", session["resume_id"])
-        .single()
-        .execute()
-    )
-    base_name = row.data["resume_name"] if row.data else "Improved Resume"
-
-    improved_base = f"{base_name} (Improved)"
-    final_name = generate_unique_resume_name(session["user_id"], improved_base)
+    row = await get_resume_repository().get(session["resume_id"], select="resume_name")
+    base_name = row["resume_name"] if row else "Improved Resume"
 
     data = {
         "user_id": session["user_id"],
         "resume_json": resume_json,
-        "resume_name": final_name,
+        "resume_name": f"{base_name} (Improved)",
         "resume_html": html_resume,
         "preferences": preferences,
         "original_file_path": None,
         "source_type": "chatbot", 
     }
 
-    result = supabase.table("resumes").insert(data).execute()
-    if not result.data:
-        raise ValueError("Failed to save improved resume")
-
-    new_id = result.data[0]["id"]
+    saved = await insert_resume_with_unique_name(data)
+    new_id = saved["id"]
+    final_name = saved["resume_name"]
 
     # Clean up session
     IMPROVE_SESSIONS.pop(session_id, None)
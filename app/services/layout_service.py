@@ -0,0 +1,77 @@
+import os
+import json
+import hashlib
+import logging
+from collections import OrderedDict
+
+from render_resume import DENSITY_LEVELS, generate_html_from_template
+from app.utils.browser_pool import BROWSER_POOL, PAGE_WIDTH_PX, PAGE_HEIGHT_PX
+from app.utils.metrics import timed_stage
+
+logger = logging.getLogger(__name__)
+FIT_CACHE_SIZE = int(os.getenv("FIT_CACHE_SIZE", "1024"))
+
+# Chosen density level per content hash, so re-exports of the same resume skip measuring
+FIT_CACHE: "OrderedDict[str, int]" = OrderedDict()
+
+
+def _content_key(resume_json, preferences, page_limit):
+    style_choice = preferences.get("style_choice", "modern").lower()
+    raw = json.dumps([resume_json, style_choice, page_limit], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _page_limit(preferences):
+    try:
+        return max(1, int(preferences.get("page_limit") or 1))
+    except (TypeError, ValueError):
+        return 1
+
+
+@timed_stage("chromium_measure")
+async def measure_page_count(html: str) -> int:
+    # Render with print styles at Letter width and count how many pages the content spans
+    async with BROWSER_POOL.page(viewport={"width": PAGE_WIDTH_PX, "height": PAGE_HEIGHT_PX}) as page:
+        await page.emulate_media(media="print")
+        await page.set_content(html, wait_until="load")
+        height = await page.evaluate(
+            "Math.max(document.documentElement.scrollHeight, document.body.scrollHeight)"
+        )
+    return max(1, -(-int(height) // PAGE_HEIGHT_PX))
+
+
+async def _find_density_level(resume_json, preferences, page_limit):
+    # Binary search for the loosest density level that still fits within page_limit
+    lo, hi = 0, len(DENSITY_LEVELS) - 1
+    best = hi
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        html = generate_html_from_template(resume_json, preferences, density=mid)
+        if await measure_page_count(html) <= page_limit:
+            best = mid
+            hi = mid - 1
+        else:
+            lo = mid + 1
+    return best
+
+
+async def fit_resume_html(resume_json, preferences):
+    # Generate the resume HTML at the density that fits the preferred page limit
+    page_limit = _page_limit(preferences)
+    key = _content_key(resume_json, preferences, page_limit)
+
+    level = FIT_CACHE.get(key)
+    if level is not None:
+        FIT_CACHE.move_to_end(key)
+    else:
+        try:
+            level = await _find_density_level(resume_json, preferences, page_limit)
+        except Exception as e:
+            logger.warning("Layout measurement failed, using heuristic density: %s", e)
+            return generate_html_from_template(resume_json, preferences)
+
+        FIT_CACHE[key] = level
+        while len(FIT_CACHE) > FIT_CACHE_SIZE:
+            FIT_CACHE.popitem(last=False)
+
+    return generate_html_from_template(resume_json, preferences, density=level)
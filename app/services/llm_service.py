@@ -0,0 +1,173 @@
+#Prompting helpers shared by the web services and the console chatbot
+import json
+import re
+import logging
+from app.utils.openai_client import chat_completion
+from app.services.prompts import chatbot_system_prompt
+
+logger = logging.getLogger(__name__)
+
+
+def init_conversation():
+    # Return data structure for conversation history and instruct the AI on it's role
+    return [{
+        "role": "system",
+        "content": chatbot_system_prompt()
+    }]
+
+
+#Requests the complete current resume JSON state from the AI
+def get_resume_json(messages, client):
+
+    tmp_messages = messages + [{
+        "role": "user",
+        "content": "Please return the complete current resume JSON state (according to the schema). Return only JSON."
+    }]
+
+    try:
+        completion = chat_completion(
+            client, "resume_json",
+            model="gpt-4o",
+            messages=tmp_messages,
+            temperature=0
+        )
+        reply = completion.choices[0].message.content.strip()
+        match = re.search(r'{.*}', reply, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+        else:
+            logger.warning("AI did not return valid JSON for resume state.")
+            return {}
+    except Exception as e:
+        logger.error("AI failed to extract resume JSON: %s", e)
+        return {}
+
+
+#Retrieves the resume preferences JSON from the AI
+def get_resume_preferences(messages, client):
+    # Ask on a copy so the session history isn't extended (and later calls stay cacheable)
+    tmp_messages = messages + [{
+        "role": "user",
+        "content": """Please provide the detailed JSON object with resume preferences and reasoning for this user that you have kept internal, which should include:
+
+        - target_role (string): The job or industry type the user is applying for.
+        - style_choice (string): The most appropriate visual style based on user preference and industry norms ("corporate", "modern", "minimalist", or "creative").
+        - structure_type (string): The best resume structure for this field ("chronological", "functional", "combination", or "targeted").
+        - summary_required (boolean): True if summaries are strongly standard/encouraged in this industry, false if neutral or discouraged.
+        - page_limit (integer): Typical page length (1 for most industries, 2 for academia, research, or senior leadership).
+        - industry_notes (object): A structured breakdown of industry-specific standards, including:
+            {
+                "overview": "Brief explanation of resume tone and priorities for this field (e.g., metrics-driven, creative storytelling, academic focus).",
+                "formatting": {
+                    "alignment": "Describe alignment conventions (e.g., centered header, left-aligned body).",
+                    "font": "List typical font families used in this field.",
+                    "spacing": "Common margin and line spacing standards.",
+                    "section_order": "Recommended section order based on importance (e.g., Experience → Education → Skills)."
+                },
+                "design_advice": "Explain visual recommendations (use of color, icons, layout complexity, etc.)"
+            }
+        Return only the JSON object — no commentary or explanation outside the JSON."""
+    }]
+
+    try:
+        completion = chat_completion(
+            client, "preferences",
+            model="gpt-4o",
+            messages=tmp_messages,
+            temperature=0
+        )
+        reply = completion.choices[0].message.content.strip()
+        match = re.search(r'{.*}', reply, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+    except Exception as e:
+        logger.error("AI failed to extract preferences: %s", e)
+
+    # Default fallback if parsing fails
+    return {
+        "target_role": "professional role",
+        "style_choice": "modern",
+        "structure_type": "chronological",
+        "summary_required": False,
+        "page_limit": 1,
+        "industry_notes": {
+            "overview": "General professional resumes emphasize clarity, conciseness, and relevance to the target role.",
+            "formatting": {
+                "alignment": "Centered name and contact info; left-aligned body text for all other sections.",
+                "font": "Sans-serif fonts like Helvetica, Arial, or Calibri are preferred for readability.",
+                "spacing": "0.5–0.75 inch margins, 1.3 line spacing, compact section spacing.",
+                "section_order": "Experience → Education → Skills → Projects → Certifications"
+            },
+            "design_advice": "Keep the design simple and ATS-friendly. Avoid graphics, icons, or excessive color use."
+        }
+    }
+
+
+#Parses resume text into structured JSON using AI
+def parse_doc_text(resume_string, client):
+    messages = [{
+        "role": "system",
+        "content": """Your job is to parse the text from a Word or PDF document which is a professional resume, 
+            and extract ALL information relevant to a resume to create a JSON object that follows this schema (the values are examples):
+            {
+            "full_name": "Zach Loucks",
+            "email": "zach@example.com",
+            "phone": "123-456-7890",
+            "linkedin": "https://linkedin.com/in/zloucks",
+            "summary": "...",
+            "experience": [
+            {
+            "job_title": "Data Analyst",
+            "company": "XYZ Corp",
+            "start_date": "2022-01",
+            "end_date": "2023-12",
+            "description": "Worked on analytics..."
+            }
+            ],
+            "education": [
+            {
+            "degree": "BS Informatics",
+            "school": "IUPUI",
+            "start_date": "2020-08",
+            "end_date": "2024-05"
+            }
+            ],
+            "skills": ["Python", "SQL", "Data Analysis"],
+            "certifications": [],
+            "projects": [],
+            "volunteer": []
+            }
+            Additionally, you must return only the JSON object"""},
+        {
+            "role": "user",
+            "content": f"Here is the resume text: \n\n{resume_string}\n\nPlease parse this text and extract the relevant information to create a JSON object that follows the schema provided in the system message."
+    }]
+    
+    try:
+        response = chat_completion(
+            client, "parse_resume",
+            model="gpt-4o",
+            messages=messages,
+            temperature=0.0
+        )
+        parsed_json = response.choices[0].message.content.strip()
+        #Validate the JSON output from Grok
+        match = re.search(r'\{.*\}', parsed_json, re.DOTALL)
+        if match:
+            return json.loads(match.group(0))
+        logger.info("No valid JSON found in AI's response.")
+    except Exception as e:
+        logger.error("Error during AI parsing: %s", e)
+    return None
+
+
+#Normalize descriptions in experience to be lists of bullet points rather than one string
+def normalize_descriptions(resume_json):
+    for job in resume_json.get("experience", []):
+        desc = job.get("description")
+
+        if isinstance(desc, str):
+            bullets = [s.strip() for s in desc.split(".") if s.strip()]
+            job["description"] = bullets
+
+    return resume_json
@@ -1,73 +1,95 @@
-import tempfile
-from render_resume import generate_html_from_template
-from chatbot import parse_doc_text, extract_resume_text
-from app.utils.openai_client import get_openai
-from app.utils.supabase_client import supabase
+import json
+import logging
+from app.services.layout_service import fit_resume_html
+from app.services.llm_service import parse_doc_text
+from app.services.text_extraction import extract_resume_text
+from app.utils.openai_client import get_openai, CACHE_ENABLED
+from app.utils.metrics import OPENAI_CACHE, track_stage
+from app.utils.response_cache import RESPONSE_CACHE, cache_key
+from app.repositories.resume_repository import get_resume_repository
+from app.repositories.supabase_http import RepositoryError
 
-def generate_unique_resume_name(user_id: str, base_name: str):
+logger = logging.getLogger(__name__)
+
+# Part of the parse cache key; bump when the parse prompt or extraction changes so stale results aren't served
+PARSE_CACHE_VERSION = 1
+
+async def generate_unique_resume_name(user_id: str, base_name: str, exclude_id: str | None = None):
     # Automatically generate a unique resume name to avoid conflicts
+    # exclude_id leaves out the resume being renamed, so keeping its current name isn't a conflict
     base_name = base_name.strip()
-    
-    # First check if the name is free
-    existing = (
-        supabase.table("resumes")
-        .select("resume_name")
-        .eq("user_id", user_id)
-        .eq("resume_name", base_name)
-        .execute()
-    )
+    resumes = get_resume_repository()
 
-    if existing.data in (None, [],):
+    # First check if the name is free
+    if not await resumes.name_exists(user_id, base_name, exclude_id):
         return base_name  # Name is available
 
     # Otherwise, increment suffixes
     suffix = 1
     while True:
         new_name = f"{base_name} ({suffix})"
-        check = (
-            supabase.table("resumes")
-            .select("resume_name")
-            .eq("user_id", user_id)
-            .eq("resume_name", new_name)
-            .execute()
-        )
-        if check.data in (None, [],):
+        if not await resumes.name_exists(user_id, new_name, exclude_id):
             return new_name
         suffix += 1
 
-def generate_html_resume_service(body: dict):
-    # Calls generate_html_from_template with provided JSON and preferences
+def _rpc_missing(error: RepositoryError) -> bool:
+    # PostgREST answers PGRST202 (404) when the function doesn't exist in the schema cache
+    return error.status_code == 404 or "PGRST202" in error.message
+
+async def insert_resume_with_unique_name(row: dict):
+    # Insert a resume under a unique name in one round trip via the insert_resume_with_unique_name RPC
+    resumes = get_resume_repository()
+    try:
+        result = await resumes.insert_with_unique_name(row)
+        if result:
+            return {"id": result["id"], "resume_name": result["resume_name"]}
+    except RepositoryError as e:
+        # Only a missing function is safe to fall back from: after a timeout or 5xx the row may already be
+        # committed, and inserting again would duplicate it
+        if not _rpc_missing(e):
+            raise
+        logger.warning("insert_resume_with_unique_name RPC is not deployed, falling back to client-side naming: %s", e)
+
+    # Fallback for databases without the migration applied; the insert still returns its own row
+    final_name = await generate_unique_resume_name(row["user_id"], row["resume_name"])
+    inserted = await resumes.insert({**row, "resume_name": final_name}, returning="id")
+    return {"id": inserted["id"], "resume_name": final_name}
+
+async def generate_html_resume_service(body: dict):
+    # Renders the provided JSON and preferences at the density that fits the page limit
     resume_json = body["resume_json"]
     preferences = body["preferences"]
-    html = generate_html_from_template(resume_json, preferences)
+    html = await fit_resume_html(resume_json, preferences)
     return {"html": html}
 
-def parse_resume_file(upload):
-    # Parses either a PDF or DOCX resume file and returns structured JSON
-    ext = upload.filename.lower().split(".")[-1]
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{ext}") as temp:
-        temp.write(upload.file.read())
-        temp_path = temp.name
+def parse_resume_file(upload, client=None, extract=extract_resume_text):
+    # Parses an ingested PDF or DOCX resume into structured JSON. Results are cached by the file's sha256,
+    # so re-uploading the same file skips both text extraction and the model call.
+    # extract(path) -> text can be swapped, e.g. to run extraction in a process pool.
+    client = client or get_openai()
+
+    def parse():
+        with track_stage("extract_text"):
+            text = extract(upload.path)
+        parsed = parse_doc_text(text, client)
+        return json.dumps(parsed), parsed is not None
 
-    client = get_openai()
-    text = extract_resume_text(temp_path)
-    parsed = parse_doc_text(text, client)
-    return parsed
+    if not CACHE_ENABLED:
+        content, _ = parse()
+        return json.loads(content)
 
-def get_resume_html_by_id(supabase, resume_id):
+    key = cache_key({"purpose": "parse_upload", "version": PARSE_CACHE_VERSION, "sha256": upload.sha256, "ext": upload.ext})
+    content, outcome = RESPONSE_CACHE.get_or_create(key, "gpt-4o", parse)
+    OPENAI_CACHE.labels(purpose="parse_upload", outcome=outcome).inc()
+    return json.loads(content)
+
+async def get_resume_html_by_id(resume_id):
     # Fetches the stored HTML resume by its ID from Supabase
     try:
-        response = (
-            supabase.table("resumes")
-            .select("resume_html")
-            .eq("id", resume_id)
-            .single()
-            .execute()
-        )
-
-        if not response.data:
+        row = await get_resume_repository().get(resume_id, select="resume_html")
+        if not row:
             return None
-        return response.data["resume_html"]
+        return row["resume_html"]
     except Exception as e:
-        print(f"Error fetching resume HTML: {e}")
+        logger.error("Error fetching resume HTML: %s", e)
         return None
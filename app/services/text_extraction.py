@@ -0,0 +1,45 @@
+#Text extraction for uploaded resume files (PDF and DOCX)
+#Parser libraries are imported inside the functions so importing this module stays cheap
+import os
+
+
+#Generic function to retrieve text from either PDF or DOCX resume files
+def extract_resume_text(file_path):
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".pdf":
+        return extract_pdf_text(file_path)
+    elif extension == ".docx":
+        return extract_doc_text(file_path)
+    else:
+        raise ValueError("Unsupported file type. Only PDF and DOCX are supported.")
+
+
+def extract_doc_text(doc_path):
+    #Given a Word document, parse it and extract the text
+    from docx import Document
+    document = Document(doc_path)
+
+    #Put the text from the document into a list, removing empty lines
+    resume_text = []
+    for para in document.paragraphs:
+        if para.text.strip():
+            resume_text.append(para.text.strip())
+
+    #Combine the list into a single string
+    resume_string = "\n".join(resume_text)
+    return resume_string
+
+
+#Extract text from a PDF file
+def extract_pdf_text(pdf_path):
+    # PyMuPDF is only needed once a PDF actually arrives
+    import fitz
+
+    doc = fitz.open(pdf_path)
+    text = ""
+
+    for page in doc:
+        text += page.get_text()
+
+    doc.close()
+    return text.strip()
@@ -0,0 +1,121 @@
+import os
+import asyncio
+import logging
+import tempfile
+import subprocess
+
+from app.utils.browser_pool import BROWSER_POOL, PAGE_WIDTH_PX, PAGE_HEIGHT_PX
+from app.utils.metrics import timed_stage
+from app.repositories.resume_repository import get_resume_repository
+from app.repositories.storage_repository import get_storage_repository
+from app.repositories.supabase_http import columns
+
+logger = logging.getLogger(__name__)
+THUMBNAIL_WIDTH = int(os.getenv("THUMBNAIL_WIDTH", "320"))
+
+
+def thumbnail_path(resume_id: str) -> str:
+    # Thumbnails live in the resumes bucket next to the originals, keyed by resume id
+    return f"thumbnails/{resume_id}.png"
+
+
+@timed_stage("rasterize_thumbnail")
+def pdf_to_thumbnail(pdf_bytes: bytes) -> bytes:
+    # Rasterize the first page of a PDF at thumbnail width using PyMuPDF
+    import fitz
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    try:
+        page = doc[0]
+        zoom = THUMBNAIL_WIDTH / page.rect.width
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        return pix.tobytes("png")
+    finally:
+        doc.close()
+
+
+@timed_stage("chromium_thumbnail")
+async def html_to_thumbnail(html: str) -> bytes:
+    # Screenshot the first page of rendered HTML, scaled down to thumbnail width by the browser
+    async with BROWSER_POOL.page(
+        viewport={"width": PAGE_WIDTH_PX, "height": PAGE_HEIGHT_PX},
+        device_scale_factor=THUMBNAIL_WIDTH / PAGE_WIDTH_PX,
+    ) as page:
+        await page.set_content(html, wait_until="load")
+        return await page.screenshot(
+            type="png",
+            clip={"x": 0, "y": 0, "width": PAGE_WIDTH_PX, "height": PAGE_HEIGHT_PX},
+        )
+
+
+@timed_stage("pandoc_docx_to_html")
+def docx_to_html(docx_bytes: bytes) -> str:
+    # Convert a DOCX to standalone HTML with Pandoc so it can be screenshotted
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".docx") as temp_docx:
+        temp_docx.write(docx_bytes)
+        temp_docx_path = temp_docx.name
+
+    try:
+        result = subprocess.run(
+            ["pandoc", temp_docx_path, "--from=docx", "--to=html", "--standalone",
+             "--metadata", "title=Resume"],
+            check=True,
+            capture_output=True,
+        )
+        return result.stdout.decode("utf-8")
+    finally:
+        os.unlink(temp_docx_path)
+
+
+async def build_thumbnail(resume: dict) -> bytes | None:
+    # Produce a PNG thumbnail from a resume row (source_type, original_file_path, resume_html)
+    if resume.get("source_type") == "upload":
+        file_path = resume.get("original_file_path")
+        if not file_path:
+            return None
+        file_bytes = await get_storage_repository().download(file_path)
+        if not file_bytes:
+            return None
+        if file_path.lower().endswith(".pdf"):
+            return await asyncio.to_thread(pdf_to_thumbnail, file_bytes)
+        html = await asyncio.to_thread(docx_to_html, file_bytes)
+        return await html_to_thumbnail(html)
+
+    html = resume.get("resume_html")
+    if not html:
+        return None
+    return await html_to_thumbnail(html)
+
+
+async def store_thumbnail(resume_id: str, resume: dict) -> bytes | None:
+    # Build and upload the thumbnail for a resume, meant to run as a background task after saving
+    try:
+        png = await build_thumbnail(resume)
+        if not png:
+            return None
+
+        await get_storage_repository().upload(thumbnail_path(resume_id), png, content_type="image/png", upsert=True)
+        return png
+    except Exception as e:
+        logger.warning("Could not generate thumbnail for resume %s: %s", resume_id, e)
+        return None
+
+
+async def get_thumbnail(resume_id: str) -> bytes | None:
+    # Serve a stored thumbnail, generating it on first request for resumes saved before thumbnails existed
+    try:
+        png = await get_storage_repository().download(thumbnail_path(resume_id))
+        if png:
+            return png
+    except Exception as e:
+        logger.warning("Could not download thumbnail for resume %s: %s", resume_id, e)
+
+    row = await get_resume_repository().get(
+        resume_id, select=columns("source_type", "original_file_path", "resume_html")
+    )
+    if not row:
+        return None
+    return await store_thumbnail(resume_id, row)
+
+
+async def remove_thumbnail(resume_id: str):
+    await get_storage_repository().remove([thumbnail_path(resume_id)])
@@ -1,54 +1,39 @@
-import tempfile
-import os
-from app.utils.supabase_client import supabase
-from chatbot import extract_resume_text, parse_doc_text
-from app.utils.openai_client import get_openai
+import asyncio
+from app.repositories.resume_repository import get_resume_repository
+from app.repositories.storage_repository import get_storage_repository
+from app.services.resume_service import parse_resume_file
+from app.utils.usage import usage_scope
 
 
-async def upload_resume_service(file, user_id):
-    # Uploads and parses a resume file (PDF or DOCX), stores it in Supabase, and returns resume_id and parsed JSON
-    ext = file.filename.lower().split(".")[-1]
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{ext}") as temp:
-        temp.write(file.file.read())
-        temp_path = temp.name
-
-    # Extract text from PDF/DOCX
-    text = extract_resume_text(temp_path)
-
-    # Parse resume using OpenAI
-    client = get_openai()
-    parsed = parse_doc_text(text, client)
+async def upload_resume_service(upload, user_id):
+    # Parses an ingested resume file (PDF or DOCX), stores it in Supabase, and returns resume_id and parsed JSON
+    # Extract and parse off the event loop; cached by file hash, so re-uploads skip the model call
+    with usage_scope(user_id=user_id):
+        parsed = await asyncio.to_thread(parse_resume_file, upload)
 
     # Upload original file into Supabase Storage "resumes" bucket
-    file_bytes = open(temp_path, "rb").read()
+    file_bytes = await asyncio.to_thread(upload.read_bytes)
 
-    storage_path = f"{user_id}/{file.filename}"
+    storage_path = f"{user_id}/{upload.filename}"
 
-    supabase.storage.from_("resumes").upload(
-        path=storage_path,
-        file=file_bytes,
-        file_options={"content-type": "application/octet-stream"},
-    )
+    await get_storage_repository().upload(storage_path, file_bytes)
 
     # Insert metadata and parsed JSON into DB
-    result = supabase.table("resumes").insert({
+    inserted = await get_resume_repository().insert({
         "user_id": user_id,
         "resume_json": parsed,
-        "resume_name": file.filename,
+        "resume_name": upload.filename,
         "resume_html": None,
         "preferences": None,
         "original_file_path": storage_path,
         "source_type": "upload"
-    }).execute()
+    }, returning="id")
 
-    resume_id = result.data[0]["id"]
-
-    # Clean up temp file
-    os.remove(temp_path)
+    resume_id = inserted["id"]
 
     return {
         "message": "Resume uploaded successfully.",
         "resume_id": resume_id,
+        "original_file_path": storage_path,
         "parsed_json": parsed
     }
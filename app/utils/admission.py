@@ -0,0 +1,210 @@
+import os
+import math
+import time
+import asyncio
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from app.utils.metrics import ADMISSION_DECISIONS, ADMISSION_WAIT_SECONDS, ADMISSION_QUEUED
+
+# Global budget, matching the OpenAI tier the deployment runs on
+MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "32"))
+TOKENS_PER_MINUTE = int(os.getenv("ADMISSION_TOKENS_PER_MINUTE", "30000"))
+
+# Per-user request rate: sustained requests per minute plus a small burst
+USER_REQUESTS_PER_MINUTE = float(os.getenv("ADMISSION_USER_REQUESTS_PER_MINUTE", "20"))
+USER_BURST = float(os.getenv("ADMISSION_USER_BURST", "5"))
+
+# How long a request may wait for admission before it is turned away with a 429
+QUEUE_TIMEOUT_S = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_S", "10"))
+MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+
+# Completion tokens assumed per call when reserving from the tokens-per-minute budget
+EXPECTED_OUTPUT_TOKENS = int(os.getenv("ADMISSION_EXPECTED_OUTPUT_TOKENS", "400"))
+
+# Share of the tokens-per-minute budget background work (bulk imports) must leave untouched for interactive requests
+BACKGROUND_HEADROOM = float(os.getenv("ADMISSION_BACKGROUND_HEADROOM", "0.5"))
+
+MAX_TRACKED_USERS = int(os.getenv("ADMISSION_MAX_TRACKED_USERS", "10000"))
+
+
+class AdmissionRejected(Exception):
+    # Raised when a request cannot be admitted before its deadline; mapped to a 429 in main.py
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        super().__init__(f"Too many requests ({reason}), retry in {self.retry_after}s")
+
+
+def estimate_tokens(*parts) -> int:
+    # Rough prompt size (~4 characters per token) plus the expected reply
+    chars = 0
+    for part in parts:
+        if isinstance(part, list):
+            chars += sum(len(str(m.get("content", ""))) for m in part)
+        elif part:
+            chars += len(str(part))
+    return chars // 4 + EXPECTED_OUTPUT_TOKENS
+
+
+class TokenBucket:
+    # Reservation-style token bucket: callers take tokens up front (possibly going negative) and sleep off the debt,
+    # which keeps waiters in arrival order without holding a lock across the wait
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def reserve(self, amount: float, max_wait: float):
+        # Seconds to wait before the reservation is covered, or None (and nothing taken) if that exceeds max_wait
+        now = time.monotonic()
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        wait = max(0.0, (amount - self.tokens) / self.refill_per_second)
+        if wait > max_wait:
+            return None
+        self.tokens -= amount
+        return wait
+
+    def refund(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+    def time_until(self, amount: float) -> float:
+        self._refill(time.monotonic())
+        return max(0.0, (min(amount, self.capacity) - self.tokens) / self.refill_per_second)
+
+
+class AdmissionController:
+    # Gate for LLM-backed requests: per-user token bucket, global tokens-per-minute bucket and a concurrency cap.
+    # Requests queue until their deadline and are rejected fast when the wait is already known to be too long.
+    # Used from the event loop only, so state is not locked.
+    def __init__(self, max_concurrency, tokens_per_minute, user_requests_per_minute, user_burst,
+                 queue_timeout, max_queue):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.user_requests_per_minute = user_requests_per_minute
+        self.user_burst = user_burst
+        self.token_budget = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+        self._users: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._active = 0
+        self._waiters: deque = deque()
+        self._queued = 0
+
+    def _user_bucket(self, key: str) -> TokenBucket:
+        bucket = self._users.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.user_burst, self.user_requests_per_minute / 60)
+            self._users[key] = bucket
+            # Forget the least recently seen user; by then their bucket has almost always refilled
+            if len(self._users) > MAX_TRACKED_USERS:
+                self._users.popitem(last=False)
+        else:
+            self._users.move_to_end(key)
+        return bucket
+
+    def _reject(self, reason: str, retry_after: float):
+        ADMISSION_DECISIONS.labels(outcome=reason).inc()
+        raise AdmissionRejected(reason, retry_after)
+
+    async def _acquire_slot(self, deadline: float) -> bool:
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=max(0.0, deadline - time.monotonic()))
+            return True
+        except asyncio.TimeoutError:
+            return False
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as the client went away; pass it on
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _release_slot(self):
+        # Hand the slot straight to the next waiter, if any, instead of freeing it
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    async def reserve_background(self, tokens: int):
+        # Charge background work to the global token budget without the per-user rate or queue deadline.
+        # It waits until the budget holds its tokens plus a headroom and never takes the bucket into debt,
+        # so a large job slows down instead of turning interactive requests into 429s.
+        headroom = self.token_budget.capacity * BACKGROUND_HEADROOM
+        while True:
+            wait = self.token_budget.time_until(tokens + headroom)
+            if not wait:
+                self.token_budget.reserve(tokens, 0)
+                ADMISSION_DECISIONS.labels(outcome="background").inc()
+                return
+            await asyncio.sleep(wait)
+
+    @asynccontextmanager
+    async def admit(self, key: str, tokens: int):
+        # Hold a place for one LLM-backed request for the duration of the block
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+
+        if self._queued >= self.max_queue:
+            self._reject("queue_full", self.queue_timeout)
+
+        user_bucket = self._user_bucket(key or "anonymous")
+        user_wait = user_bucket.reserve(1, self.queue_timeout)
+        if user_wait is None:
+            self._reject("user_rate", user_bucket.time_until(1))
+
+        token_wait = self.token_budget.reserve(tokens, self.queue_timeout)
+        if token_wait is None:
+            user_bucket.refund(1)
+            self._reject("token_budget", self.token_budget.time_until(tokens))
+
+        self._queued += 1
+        ADMISSION_QUEUED.inc()
+        acquired = False
+        try:
+            wait = max(user_wait, token_wait)
+            if wait:
+                await asyncio.sleep(wait)
+            acquired = await self._acquire_slot(deadline)
+        finally:
+            self._queued -= 1
+            ADMISSION_QUEUED.dec()
+            # Rejected or abandoned (client gone while queued): give back what was reserved
+            if not acquired:
+                user_bucket.refund(1)
+                self.token_budget.refund(tokens)
+
+        if not acquired:
+            self._reject("concurrency", self.queue_timeout)
+
+        ADMISSION_DECISIONS.labels(outcome="admitted").inc()
+        ADMISSION_WAIT_SECONDS.observe(time.monotonic() - start)
+        try:
+            yield
+        finally:
+            self._release_slot()
+
+
+ADMISSION = AdmissionController(
+    max_concurrency=MAX_CONCURRENCY,
+    tokens_per_minute=TOKENS_PER_MINUTE,
+    user_requests_per_minute=USER_REQUESTS_PER_MINUTE,
+    user_burst=USER_BURST,
+    queue_timeout=QUEUE_TIMEOUT_S,
+    max_queue=MAX_QUEUE,
+)
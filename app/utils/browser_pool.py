@@ -0,0 +1,51 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+
+MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "4"))
+
+# Letter page size in CSS pixels, matching the PDF export
+PAGE_WIDTH_PX = 816
+PAGE_HEIGHT_PX = 1056
+
+
+class BrowserPool:
+    # One shared Chromium process for all rendering, with a cap on concurrently open pages
+    def __init__(self, max_pages: int):
+        self._playwright = None
+        self._browser = None
+        self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(max_pages)
+
+    async def _get_browser(self):
+        async with self._lock:
+            if self._browser is None or not self._browser.is_connected():
+                if self._playwright is None:
+                    # Playwright is imported on first render, not at app startup
+                    from playwright.async_api import async_playwright
+                    self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(args=["--no-sandbox"])
+            return self._browser
+
+    @asynccontextmanager
+    async def page(self, **context_options):
+        # Borrow a fresh page in its own context, closed again on exit
+        async with self._slots:
+            browser = await self._get_browser()
+            context = await browser.new_context(**context_options)
+            try:
+                yield await context.new_page()
+            finally:
+                await context.close()
+
+    async def close(self):
+        async with self._lock:
+            if self._browser is not None:
+                await self._browser.close()
+                self._browser = None
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+
+BROWSER_POOL = BrowserPool(MAX_PAGES)
@@ -0,0 +1,52 @@
+import threading
+from collections import OrderedDict
+
+
+class ByteCache:
+    # Thread-safe LRU cache for byte blobs, bounded by total size rather than entry count
+    def __init__(self, max_bytes: int, max_item_bytes: int | None = None):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes or max_bytes
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: bytes):
+        # Oversized blobs are not cached at all so one large file can't flush everything else
+        if len(value) > self.max_item_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = value
+            self._size += len(value)
+            while self._size > self.max_bytes and self._items:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def pop(self, key: str):
+        with self._lock:
+            value = self._items.pop(key, None)
+            if value is not None:
+                self._size -= len(value)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+    @property
+    def size(self):
+        return self._size
+
+    def __len__(self):
+        return len(self._items)
@@ -0,0 +1,163 @@
+import os
+import json
+import time
+from types import SimpleNamespace
+
+# Scripted, in-process stand-in for the OpenAI client (OPENAI_BACKEND=fake), so load
+# tests and benchmarks run offline with predictable latency. Only the parts of
+# client.chat.completions.create the app uses are implemented.
+#
+# FAKE_OPENAI_LATENCY_MS       time to first token (default 300)
+# FAKE_OPENAI_TOKENS_PER_SEC   completion token rate (default 60)
+# FAKE_OPENAI_READY_AFTER      chat turns before the assistant says it's ready (default 6)
+# FAKE_OPENAI_SCRIPT           optional JSON file of [{"match": "...", "reply": "..."}] rules,
+#                              checked against the last message before the built-in replies
+
+SAMPLE_RESUME = {
+    "full_name": "Jordan Sample",
+    "email": "jordan@example.com",
+    "phone": "555-010-0199",
+    "linkedin": "https://linkedin.com/in/jordansample",
+    "summary": "",
+    "experience": [
+        {
+            "job_title": "Data Analyst",
+            "company": "Example Corp",
+            "location": "Indianapolis, IN",
+            "start_date": "Jan 2022",
+            "end_date": "Present",
+            "description": [
+                "Built weekly KPI dashboards in Tableau used by 40+ stakeholders",
+                "Automated SQL data quality checks, cutting manual review time by 60%",
+                "Partnered with product managers to size and prioritize experiments",
+            ],
+        }
+    ],
+    "education": [
+        {"degree": "BS Informatics", "school": "Indiana University", "start_date": "2018", "end_date": "2022"}
+    ],
+    "skills": ["Python", "SQL", "Tableau", "A/B Testing"],
+    "certifications": [],
+    "projects": [],
+    "volunteer": [],
+}
+
+SAMPLE_PREFERENCES = {
+    "target_role": "Data Analyst",
+    "style_choice": "modern",
+    "structure_type": "chronological",
+    "summary_required": False,
+    "page_limit": 1,
+    "industry_notes": {
+        "overview": "Metrics-driven resumes that highlight tools and business impact.",
+        "formatting": {
+            "alignment": "Centered header; left-aligned body.",
+            "font": "Arial, Calibri",
+            "spacing": "0.5-0.75 inch margins",
+            "section_order": "Experience → Education → Skills",
+        },
+        "design_advice": "Keep it clean with a single accent color.",
+    },
+}
+
+SAMPLE_ANALYSIS = """1. Industry Summary
+Strong analyst resumes lead with quantified impact and the tools used.
+
+2. Evaluation
+Content is specific and measurable. Layout fits on one page.
+
+3. Actionable Recommendations
+- High (Content): Add the business outcome to the dashboard bullet.
+- Optional (Formatting): No formatting/structural changes needed."""
+
+READY_PHRASE = "Sounds good! I'm ready to generate the resume."
+
+
+def _text_of(message):
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+    return content
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class _FakeCompletions:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def create(self, model, messages, temperature=None, stream=False, **kwargs):
+        reply = self.owner.reply_for(messages)
+        prompt_tokens = sum(_estimate_tokens(_text_of(m)) for m in messages)
+        completion_tokens = _estimate_tokens(reply)
+        usage = SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        )
+
+        time.sleep(self.owner.latency_s)
+        if stream:
+            return self.owner.stream_reply(model, reply, usage)
+
+        time.sleep(completion_tokens / self.owner.tokens_per_sec)
+        return SimpleNamespace(
+            id="fake-completion",
+            model=model,
+            choices=[SimpleNamespace(index=0, finish_reason="stop", message=SimpleNamespace(role="assistant", content=reply))],
+            usage=usage,
+        )
+
+
+class FakeOpenAI:
+    def __init__(self):
+        self.latency_s = float(os.getenv("FAKE_OPENAI_LATENCY_MS", "300")) / 1000
+        self.tokens_per_sec = max(1.0, float(os.getenv("FAKE_OPENAI_TOKENS_PER_SEC", "60")))
+        self.ready_after = int(os.getenv("FAKE_OPENAI_READY_AFTER", "6"))
+        self.rules = []
+        script_path = os.getenv("FAKE_OPENAI_SCRIPT")
+        if script_path:
+            with open(script_path, encoding="utf-8") as f:
+                self.rules = json.load(f)
+        self.chat = SimpleNamespace(completions=_FakeCompletions(self))
+
+    def reply_for(self, messages):
+        last = _text_of(messages[-1]).lower() if messages else ""
+        for rule in self.rules:
+            if rule["match"].lower() in last:
+                return rule["reply"]
+
+        if "resume json state" in last or "parse this text" in last:
+            return json.dumps(SAMPLE_RESUME)
+        if "resume preferences" in last:
+            return json.dumps(SAMPLE_PREFERENCES)
+        if "resume analysis" in last or "unified assessment" in last or any(
+            isinstance(m.get("content"), list) for m in messages
+        ):
+            return SAMPLE_ANALYSIS
+
+        user_turns = sum(1 for m in messages if m.get("role") == "user")
+        if user_turns >= self.ready_after:
+            return READY_PHRASE
+        return f"Thanks! (fake turn {user_turns}) What's the next detail you'd like to add?"
+
+    def stream_reply(self, model, reply, usage):
+        # Yields chunks shaped like the SDK's ChatCompletionChunk, a few words at a time
+        words = reply.split(" ")
+        for i in range(0, len(words), 3):
+            piece = " ".join(words[i:i + 3]) + (" " if i + 3 < len(words) else "")
+            time.sleep(_estimate_tokens(piece) / self.tokens_per_sec)
+            yield SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(index=0, finish_reason=None, delta=SimpleNamespace(content=piece))],
+                usage=None,
+            )
+        yield SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(index=0, finish_reason="stop", delta=SimpleNamespace(content=None))],
+            usage=None,
+        )
+        # Final usage-only chunk, as sent with stream_options={"include_usage": True}
+        yield SimpleNamespace(model=model, choices=[], usage=usage)
@@ -0,0 +1,140 @@
+import os
+import json
+import uuid
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+from contextvars import ContextVar
+
+from app.utils.metrics import LOG_RECORDS_DROPPED
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_FILE = os.getenv("LOG_FILE")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# Fraction of verbose payload logs (prompts, AI replies) that are actually emitted, and how much of each
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+
+TEXT_FORMAT = "%(asctime)s - [%(levelname)s] %(message)s"
+
+# Correlates every log line written while handling one HTTP request
+_REQUEST_ID: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed through extra= and is emitted as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "request_id"}
+
+_listener = None
+
+
+def bind_request_id(request_id: str = None) -> str:
+    # Use the caller's X-Request-ID when present, otherwise mint one
+    request_id = (request_id or "").strip()[:64] or uuid.uuid4().hex
+    _REQUEST_ID.set(request_id)
+    return request_id
+
+
+def get_request_id() -> str:
+    return _REQUEST_ID.get()
+
+
+class RequestIdFilter(logging.Filter):
+    # Stamp the request id onto the record in the caller's context, before it crosses to the listener thread
+    def filter(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = _REQUEST_ID.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    # One JSON object per line, with any extra= fields merged in
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    # Never block the caller: when the queue is full the record is dropped and counted
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+    def prepare(self, record):
+        # Resolve the message and traceback now, but leave formatting to the listener thread
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(json_format: bool = None, log_file: str = None, level: str = None):
+    # Route the root logger through a bounded queue; a background listener does the formatting and I/O
+    global _listener
+    if _listener is not None:
+        return
+
+    json_format = LOG_FORMAT == "json" if json_format is None else json_format
+    formatter = JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+
+    handlers = [logging.StreamHandler()]
+    log_file = log_file or LOG_FILE
+    if log_file:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level or LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    # Flush whatever is still queued; called on app shutdown and at CLI exit
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def log_payload(logger: logging.Logger, message: str, payload, **fields):
+    # Sampled DEBUG logging for large bodies such as AI replies, so they can't flood the queue under load
+    if not logger.isEnabledFor(logging.DEBUG) or random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    text = payload if isinstance(payload, str) else json.dumps(payload, default=str)
+    if len(text) > LOG_PAYLOAD_MAX_CHARS:
+        fields["truncated_from"] = len(text)
+        text = text[:LOG_PAYLOAD_MAX_CHARS]
+    logger.debug(message, extra={**fields, "payload": text})
@@ -0,0 +1,114 @@
+import time
+import asyncio
+import functools
+from contextlib import contextmanager
+
+from prometheus_client import Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest
+
+# Buckets sized for everything from cache hits to multi-second GPT-4o calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being handled")
+
+OPENAI_SECONDS = Histogram(
+    "openai_request_duration_seconds", "OpenAI chat completion latency by purpose",
+    ["purpose", "model", "outcome"], buckets=LATENCY_BUCKETS,
+)
+SUPABASE_SECONDS = Histogram(
+    "supabase_query_duration_seconds", "Supabase REST latency by table and operation",
+    ["table", "op", "outcome"], buckets=LATENCY_BUCKETS,
+)
+STORAGE_SECONDS = Histogram(
+    "storage_transfer_duration_seconds", "Supabase Storage transfer latency",
+    ["op", "outcome"], buckets=LATENCY_BUCKETS,
+)
+STORAGE_BYTES = Counter("storage_transfer_bytes_total", "Bytes moved to/from Supabase Storage", ["op"])
+STAGE_SECONDS = Histogram(
+    "stage_duration_seconds", "Latency of heavy local stages (rasterization, pandoc, Chromium, ...)",
+    ["stage", "outcome"], buckets=LATENCY_BUCKETS,
+)
+IN_FLIGHT = Gauge("operations_in_flight", "External calls and heavy stages currently running", ["kind"])
+
+WEBSOCKETS_OPEN = Gauge("websockets_open", "Open conversation WebSockets", ["kind"])
+SESSIONS_STARTED = Counter("sessions_started_total", "Conversation sessions started", ["kind"])
+ACTIVE_SESSIONS = Gauge("active_sessions", "Conversation sessions held in memory", ["kind"])
+OPENAI_RETRIES = Counter("openai_retries_total", "OpenAI calls retried after a transient error", ["purpose", "reason"])
+OPENAI_HEDGES = Counter("openai_hedges_total", "Hedged OpenAI requests, by which request answered first", ["purpose", "winner"])
+OPENAI_CACHE = Counter(
+    "openai_cache_requests_total", "Cacheable OpenAI calls by outcome (hit, coalesced, miss)", ["purpose", "outcome"]
+)
+ADMISSION_DECISIONS = Counter(
+    "admission_decisions_total", "LLM-backed requests admitted or rejected, by reason", ["outcome"]
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "admission_wait_seconds", "Time admitted requests spent queued for admission", buckets=LATENCY_BUCKETS,
+)
+ADMISSION_QUEUED = Gauge("admission_queued", "Requests currently waiting for admission")
+SPECULATIONS = Counter(
+    "speculative_generations_total", "Background extraction/rendering started when a chat signals readiness", ["outcome"]
+)
+UPLOADS_REJECTED = Counter("uploads_rejected_total", "Uploads rejected before parsing, by reason", ["reason"])
+IMPORT_FILES = Counter("resume_import_files_total", "Files processed by bulk resume imports, by outcome", ["outcome"])
+EXPORTED_FILES = Counter("batch_export_files_total", "Files rendered by batch exports", ["format", "outcome"])
+LOG_RECORDS_DROPPED = Counter("log_records_dropped_total", "Log records dropped because the log queue was full")
+
+_IN_FLIGHT_KIND = {
+    OPENAI_SECONDS: "openai",
+    SUPABASE_SECONDS: "supabase",
+    STORAGE_SECONDS: "storage",
+    STAGE_SECONDS: "stage",
+}
+
+
+@contextmanager
+def track(histogram: Histogram, **labels):
+    # Time a block into histogram, adding outcome="ok"/"error" and counting it as in flight
+    in_flight = IN_FLIGHT.labels(kind=_IN_FLIGHT_KIND.get(histogram, "other"))
+    in_flight.inc()
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        in_flight.dec()
+        histogram.labels(**labels, outcome=outcome).observe(time.perf_counter() - start)
+
+
+def timed(histogram: Histogram, **labels):
+    # Decorator form of track, for both sync and async functions
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with track(histogram, **labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with track(histogram, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_stage(stage: str):
+    return timed(STAGE_SECONDS, stage=stage)
+
+
+def track_stage(stage: str):
+    return track(STAGE_SECONDS, stage=stage)
+
+
+def watch_sessions(kind: str, sessions: dict):
+    # Report the size of an in-memory session store on every scrape
+    ACTIVE_SESSIONS.labels(kind=kind).set_function(lambda: len(sessions))
+
+
+def render_metrics():
+    return generate_latest(), CONTENT_TYPE_LATEST
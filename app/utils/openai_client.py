@@ -1,9 +1,233 @@
 import os
-from openai import OpenAI
+import time
+import random
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait, FIRST_COMPLETED
+from app.utils.metrics import OPENAI_SECONDS, OPENAI_RETRIES, OPENAI_HEDGES, OPENAI_CACHE, track
+from app.utils.usage import USAGE
+from app.utils.logging_config import log_payload
+from app.utils.response_cache import RESPONSE_CACHE, cache_key, cached_response
+
+logger = logging.getLogger(__name__)
+
+# Request timeout in seconds per purpose; vision analysis sends page images and runs longest
+PURPOSE_TIMEOUTS = {
+    "chat_turn": 30,
+    "improvement_turn": 30,
+    "preferences": 30,
+    "resume_json": 45,
+    "parse_resume": 60,
+    "analysis_text": 60,
+    "analysis_vision": 90,
+}
+DEFAULT_TIMEOUT_S = float(os.getenv("OPENAI_DEFAULT_TIMEOUT_S", "60"))
+
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+BACKOFF_BASE_S = float(os.getenv("OPENAI_BACKOFF_BASE_S", "0.5"))
+BACKOFF_CAP_S = float(os.getenv("OPENAI_BACKOFF_CAP_S", "20"))
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = {"APITimeoutError", "APIConnectionError"}
+
+# Idempotent temperature-0 extractions may fire a second request once the first runs past the purpose's p95
+HEDGED_PURPOSES = {"parse_resume", "resume_json"}
+HEDGING_ENABLED = os.getenv("OPENAI_HEDGING", "1") == "1"
+HEDGE_DEFAULT_DELAY_S = float(os.getenv("OPENAI_HEDGE_DELAY_S", "8"))
+HEDGE_MIN_SAMPLES = 20
+MAX_HEDGES_IN_FLIGHT = int(os.getenv("OPENAI_MAX_HEDGES_IN_FLIGHT", "4"))
+
+# Deterministic extractions whose replies are cached and shared between identical concurrent calls
+CACHED_PURPOSES = {"parse_resume", "resume_json", "preferences"}
+CACHE_ENABLED = os.getenv("LLM_CACHE", "1") == "1"
+
+_LATENCIES = {}
+_LATENCIES_LOCK = threading.Lock()
+# Hedged calls run their primary request in one pool and the hedge in another, so hedges never queue behind
+# primaries; the primary pool is sized well above the threads that call it so it isn't a process-wide cap
+_PRIMARY_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("OPENAI_HEDGED_PRIMARY_WORKERS", "64")), thread_name_prefix="openai-primary"
+)
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=MAX_HEDGES_IN_FLIGHT, thread_name_prefix="openai-hedge")
+_hedges_in_flight = threading.BoundedSemaphore(MAX_HEDGES_IN_FLIGHT)
+
 
 def get_openai():
     #Initialize and return OpenAI client
+    if os.getenv("OPENAI_BACKEND", "openai").lower() == "fake":
+        # Offline stand-in for load tests and benchmarks
+        from app.utils.fake_openai import FakeOpenAI
+        return FakeOpenAI()
+
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         raise ValueError("Missing OPENAI_API_KEY")
-    return OpenAI(api_key=api_key)
+    # Imported here so the SDK is only loaded when a real client is needed
+    from openai import OpenAI
+    # Retries are done by chat_completion, so the SDK's own are turned off
+    return OpenAI(api_key=api_key, max_retries=0)
+
+
+def _record_latency(purpose: str, seconds: float):
+    with _LATENCIES_LOCK:
+        _LATENCIES.setdefault(purpose, deque(maxlen=200)).append(seconds)
+
+
+def _hedge_delay(purpose: str) -> float:
+    # Recent p95 latency of this purpose, or the configured default until there are enough samples
+    with _LATENCIES_LOCK:
+        samples = sorted(_LATENCIES.get(purpose, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return HEDGE_DEFAULT_DELAY_S
+    return samples[int(len(samples) * 0.95) - 1]
+
+
+def _retry_after(error) -> float | None:
+    # OpenAI sends retry-after-ms and/or retry-after on 429s and some 5xx responses
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def _retry_reason(error) -> str | None:
+    # Name of a transient failure worth retrying, or None for errors that would fail again
+    status = getattr(error, "status_code", None)
+    if status in RETRYABLE_STATUS:
+        return str(status)
+    if type(error).__name__ in RETRYABLE_ERRORS:
+        return type(error).__name__
+    return None
+
+
+def _backoff(attempt: int, error) -> float:
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_CAP_S)
+    return random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * (2 ** attempt)))
+
+
+def _create_once(client, purpose: str, kwargs: dict):
+    model = kwargs.get("model", "unknown")
+    start = time.perf_counter()
+    with track(OPENAI_SECONDS, purpose=purpose, model=model):
+        response = client.chat.completions.create(**kwargs)
+    if not kwargs.get("stream"):
+        _record_latency(purpose, time.perf_counter() - start)
+    USAGE.record(purpose, model, getattr(response, "usage", None))
+    return response
+
+
+def _create_with_retries(client, purpose: str, kwargs: dict):
+    # Exponential backoff with full jitter, honoring Retry-After
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return _create_once(client, purpose, kwargs)
+        except Exception as e:
+            reason = _retry_reason(e)
+            if reason is None or attempt == MAX_RETRIES:
+                raise
+            delay = _backoff(attempt, e)
+            OPENAI_RETRIES.labels(purpose=purpose, reason=reason).inc()
+            logger.warning("OpenAI %s call failed (%s), retrying in %.1fs", purpose, reason, delay)
+            time.sleep(delay)
+
+
+def _create_hedged(client, purpose: str, kwargs: dict):
+    # Fire a second identical request if the first is slower than usual, and take whichever answers first.
+    # The loser keeps running to completion (a blocking HTTP call can't be cancelled) and is still billed.
+    def submit(pool, started=None):
+        def run():
+            if started is not None:
+                started.set()
+            return _create_with_retries(client, purpose, kwargs)
+        return pool.submit(contextvars.copy_context().run, run)
+
+    # The hedge delay counts from when the primary starts, not while it waits for a pool thread
+    started = threading.Event()
+    primary = submit(_PRIMARY_POOL, started)
+    started.wait()
+    try:
+        return primary.result(timeout=_hedge_delay(purpose))
+    except FutureTimeout:
+        pass
+
+    # Cap outstanding hedges so a slow upstream isn't hit with double the load
+    if not _hedges_in_flight.acquire(blocking=False):
+        return primary.result()
+    hedge = submit(_HEDGE_POOL)
+    hedge.add_done_callback(lambda _: _hedges_in_flight.release())
+
+    names = {primary: "primary", hedge: "hedge"}
+    pending = {primary, hedge}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                OPENAI_HEDGES.labels(purpose=purpose, winner=names[future]).inc()
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def _create_cached(client, purpose: str, kwargs: dict, create):
+    # Serve identical temperature-0 requests from the response cache, coalescing concurrent duplicates
+    model = kwargs.get("model", "unknown")
+
+    def fetch():
+        response = create(client, purpose, kwargs)
+        choice = response.choices[0]
+        # Truncated or empty replies are passed through but not kept
+        return choice.message.content, bool(choice.message.content) and choice.finish_reason == "stop"
+
+    content, outcome = RESPONSE_CACHE.get_or_create(cache_key(kwargs), model, fetch)
+    OPENAI_CACHE.labels(purpose=purpose, outcome=outcome).inc()
+    return cached_response(model, content)
+
+
+def chat_completion(client, purpose: str, **kwargs):
+    # Single entry point for chat completions, labeled by purpose for metrics and usage accounting.
+    # Transient failures are retried; idempotent extractions are cached and hedged against slow responses.
+    model = kwargs.get("model", "unknown")
+    kwargs.setdefault("timeout", PURPOSE_TIMEOUTS.get(purpose, DEFAULT_TIMEOUT_S))
+
+    deterministic = kwargs.get("temperature") == 0 and not kwargs.get("stream")
+    create = _create_hedged if HEDGING_ENABLED and deterministic and purpose in HEDGED_PURPOSES else _create_with_retries
+
+    if CACHE_ENABLED and deterministic and purpose in CACHED_PURPOSES:
+        response = _create_cached(client, purpose, kwargs, create)
+    else:
+        response = create(client, purpose, kwargs)
+
+    if not kwargs.get("stream"):
+        log_payload(logger, "openai reply", response.choices[0].message.content, purpose=purpose, model=model)
+    return response
+
+
+def stream_chat_completion(client, purpose: str, **kwargs):
+    # Yield the reply text as it arrives. Retries only cover opening the stream; the latency histogram
+    # covers time to the first response, and usage is read from the final usage-only chunk.
+    model = kwargs.get("model", "unknown")
+    kwargs.setdefault("timeout", PURPOSE_TIMEOUTS.get(purpose, DEFAULT_TIMEOUT_S))
+    kwargs["stream"] = True
+    kwargs["stream_options"] = {"include_usage": True}
+
+    stream = _create_with_retries(client, purpose, kwargs)
+    try:
+        for chunk in stream:
+            if getattr(chunk, "usage", None):
+                USAGE.record(purpose, model, chunk.usage)
+            for choice in chunk.choices:
+                if choice.delta.content:
+                    yield choice.delta.content
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from types import SimpleNamespace
+from concurrent.futures import Future
+
+# Persistent cache for deterministic (temperature-0) completions, shared by all workers on the host
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.sqlite3"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_TTL_S = int(os.getenv("LLM_CACHE_TTL_S", str(7 * 24 * 3600)))
+
+# Request arguments that don't change what the model returns
+_IGNORED_ARGS = {"timeout", "stream"}
+
+SCHEMA = """
+create table if not exists responses (
+    key text primary key,
+    model text not null,
+    content text not null,
+    created_at real not null,
+    last_used real not null
+);
+create index if not exists responses_last_used on responses (last_used);
+"""
+
+
+def _canonical_message(message: dict) -> dict:
+    # Only the fields the model sees, with surrounding whitespace in text ignored
+    content = message.get("content")
+    if isinstance(content, str):
+        content = content.strip()
+    canonical = {"role": message.get("role"), "content": content}
+    if message.get("name"):
+        canonical["name"] = message["name"]
+    return canonical
+
+
+def cache_key(kwargs: dict) -> str:
+    # sha256 over model, temperature, canonicalized messages and any other request arguments
+    payload = {k: v for k, v in kwargs.items() if k not in _IGNORED_ARGS}
+    payload["messages"] = [_canonical_message(m) for m in kwargs.get("messages", [])]
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def cached_response(model: str, content: str):
+    # Minimal stand-in for a ChatCompletion; callers only read choices[0].message.content
+    return SimpleNamespace(
+        model=model,
+        usage=None,
+        choices=[SimpleNamespace(index=0, finish_reason="stop", message=SimpleNamespace(role="assistant", content=content))],
+    )
+
+
+class ResponseCache:
+    # SQLite-backed LRU of completion text, plus in-process coalescing of identical in-flight requests
+    def __init__(self, path: str, max_entries: int, ttl_s: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self._conn = None
+        self._lock = threading.Lock()
+        self._in_flight: dict[str, Future] = {}
+
+    def _db(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("pragma journal_mode=wal")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def get(self, key: str):
+        with self._lock:
+            db = self._db()
+            row = db.execute("select content, created_at from responses where key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if time.time() - row[1] > self.ttl_s:
+                db.execute("delete from responses where key = ?", (key,))
+                db.commit()
+                return None
+            db.execute("update responses set last_used = ? where key = ?", (time.time(), key))
+            db.commit()
+            return row[0]
+
+    def put(self, key: str, model: str, content: str):
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "insert or replace into responses (key, model, content, created_at, last_used) values (?, ?, ?, ?, ?)",
+                (key, model, content, now, now),
+            )
+            # Evict least recently used entries beyond the cap
+            db.execute(
+                "delete from responses where key in "
+                "(select key from responses order by last_used desc limit -1 offset ?)",
+                (self.max_entries,),
+            )
+            db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db().execute("delete from responses")
+            self._conn.commit()
+
+    def get_or_create(self, key: str, model: str, create):
+        # Return (content, outcome): outcome is "hit", "coalesced" (waited on an identical in-flight call) or "miss"
+        content = self.get(key)
+        if content is not None:
+            return content, "hit"
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+        if not leader:
+            return future.result(), "coalesced"
+
+        try:
+            content, cacheable = create()
+            if cacheable:
+                self.put(key, model, content)
+            future.set_result(content)
+            return content, "miss"
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+
+RESPONSE_CACHE = ResponseCache(LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL_S)
@@ -0,0 +1,26 @@
+import json
+
+# Resume JSON as embedded in prompts: empty fields dropped and no indentation or separator padding.
+# Input tokens dominate GPT-4o latency, and pretty-printing alone adds a token for nearly every line.
+
+
+def strip_empty(value):
+    # Recursively drop None, blank strings and empty lists/dicts; False and 0 are real values and kept
+    if isinstance(value, dict):
+        stripped = {key: strip_empty(item) for key, item in value.items()}
+        return {key: item for key, item in stripped.items() if not _is_empty(item)}
+    if isinstance(value, list):
+        stripped = [strip_empty(item) for item in value]
+        return [item for item in stripped if not _is_empty(item)]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def _is_empty(value):
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
+
+
+def resume_for_prompt(resume: dict) -> str:
+    # Compact JSON of the non-empty resume fields, for embedding in a prompt
+    return json.dumps(strip_empty(resume or {}), separators=(",", ":"), ensure_ascii=False)
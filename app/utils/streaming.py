@@ -0,0 +1,127 @@
+import os
+import asyncio
+import threading
+import contextvars
+from contextlib import asynccontextmanager
+from concurrent.futures import TimeoutError as FutureTimeout
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.utils.metrics import WEBSOCKETS_OPEN
+from app.utils.usage import bind_request
+from app.utils.logging_config import bind_request_id
+from app.utils.admission import AdmissionRejected
+
+# Token chunks buffered between the OpenAI reader thread and the socket before the reader is paused
+STREAM_BUFFER = int(os.getenv("WS_STREAM_BUFFER", "64"))
+
+
+class SocketChannel:
+    # Serializes sends on one WebSocket, so token frames and server-initiated events never interleave mid-frame
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self._lock = asyncio.Lock()
+
+    async def send(self, payload: dict):
+        async with self._lock:
+            await self.websocket.send_json(payload)
+
+
+@asynccontextmanager
+async def open_channel(websocket: WebSocket, kind: str):
+    # Accept a conversation socket and bind it for usage accounting and log correlation, like an HTTP request
+    await websocket.accept()
+    bind_request(websocket.scope)
+    bind_request_id(websocket.headers.get("x-request-id"))
+    WEBSOCKETS_OPEN.labels(kind=kind).inc()
+    try:
+        yield SocketChannel(websocket)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        WEBSOCKETS_OPEN.labels(kind=kind).dec()
+
+
+async def receive_messages(channel: SocketChannel):
+    # Yield the text of each {"type": "message", "content": ...} frame until the client disconnects
+    while True:
+        try:
+            data = await channel.websocket.receive_json()
+        except WebSocketDisconnect:
+            return
+        except (ValueError, KeyError):
+            await channel.send({"type": "error", "status": 400, "detail": "Frames must be JSON text"})
+            continue
+        if not isinstance(data, dict) or data.get("type") != "message" or not isinstance(data.get("content"), str):
+            await channel.send({"type": "error", "status": 400, "detail": 'Expected {"type": "message", "content": "..."}'})
+            continue
+        yield data["content"]
+
+
+async def send_error(channel: SocketChannel, error: Exception, status: int = 400):
+    # Turn failures into error frames; the connection stays open for the next message
+    if isinstance(error, AdmissionRejected):
+        await channel.send({"type": "error", "status": 429, "detail": str(error), "retry_after": error.retry_after})
+    else:
+        await channel.send({"type": "error", "status": status, "detail": str(error)})
+
+
+async def relay_stream(channel: SocketChannel, produce, max_buffered: int = STREAM_BUFFER):
+    # Run the blocking generator produce() in a worker thread and forward each text delta as a "token" frame.
+    # The queue between them is bounded: when the client reads slowly the worker blocks, which in turn stops
+    # it reading from OpenAI. Deltas that pile up meanwhile are coalesced into one frame.
+    # Returns the generator's return value.
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffered)
+    stopped = threading.Event()
+
+    def put(item):
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                return future.result(timeout=0.5)
+            except FutureTimeout:
+                if stopped.is_set():
+                    future.cancel()
+                    return None
+
+    def worker():
+        generator = produce()
+        try:
+            while not stopped.is_set():
+                try:
+                    delta = next(generator)
+                except StopIteration as stop:
+                    put(("done", stop.value))
+                    return
+                put(("delta", delta))
+        except BaseException as e:
+            put(("error", e))
+        finally:
+            generator.close()
+
+    reader = loop.run_in_executor(None, contextvars.copy_context().run, worker)
+    try:
+        while True:
+            kind, value = await queue.get()
+            pending = []
+            if kind == "delta":
+                parts = [value]
+                while not queue.empty():
+                    next_kind, next_value = queue.get_nowait()
+                    if next_kind != "delta":
+                        pending.append((next_kind, next_value))
+                        break
+                    parts.append(next_value)
+                await channel.send({"type": "token", "delta": "".join(parts)})
+                if not pending:
+                    continue
+                kind, value = pending[0]
+            if kind == "error":
+                raise value
+            return value
+    finally:
+        # On disconnect or error, release the worker and let it close the upstream stream
+        stopped.set()
+        while not queue.empty():
+            queue.get_nowait()
+        await reader
@@ -0,0 +1,145 @@
+import os
+import hashlib
+import tempfile
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+from app.utils.metrics import UPLOADS_REJECTED
+
+# Streaming ingest for resume uploads: the request body is capped before multipart parsing buffers it,
+# and the file is then copied to disk chunk by chunk, with its type sniffed from the first chunk and its
+# sha256 computed along the way (the parse cache is keyed by it).
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Headroom for the other form fields and multipart boundaries around the file
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(MAX_UPLOAD_BYTES + 256 * 1024)))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+RESUME_TYPES = (".pdf", ".docx")
+UNSUPPORTED_TYPE = "Unsupported file type. Only PDF and DOCX resumes are supported."
+
+
+def matches_type(head: bytes, ext: str) -> bool:
+    # Whether the file's first bytes match its extension. PDF readers tolerate junk before the header
+    # within the first 1KB; a DOCX is a zip whose first entries are the OOXML parts.
+    if ext == ".pdf":
+        return b"%PDF-" in head[:1024]
+    if ext == ".docx":
+        return head.startswith(b"PK\x03\x04") and (b"[Content_Types].xml" in head or b"word/" in head)
+    if ext == ".zip":
+        return head.startswith((b"PK\x03\x04", b"PK\x05\x06"))
+    return False
+
+
+def _reject(status: int, reason: str, detail: str):
+    UPLOADS_REJECTED.labels(reason=reason).inc()
+    raise HTTPException(status_code=status, detail=detail)
+
+
+class IngestedUpload:
+    # An upload spooled to a temp file, with its extension (checked against the magic bytes), size and sha256
+    def __init__(self, filename: str, path: str, ext: str, size: int, sha256: str):
+        self.filename = filename
+        self.path = path
+        self.ext = ext
+        self.size = size
+        self.sha256 = sha256
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def cleanup(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+async def ingest_upload(
+    file: UploadFile, allowed=RESUME_TYPES, max_bytes: int = MAX_UPLOAD_BYTES, unsupported: str = UNSUPPORTED_TYPE
+) -> IngestedUpload:
+    # Stream an UploadFile to disk, rejecting it as soon as the name, magic bytes or size rule it out
+    filename = os.path.basename(file.filename or "")
+    claimed = os.path.splitext(filename)[1].lower()
+    if claimed not in allowed:
+        _reject(415, "extension", unsupported)
+
+    digest = hashlib.sha256()
+    size = 0
+    temp = tempfile.NamedTemporaryFile(delete=False, suffix=claimed)
+    try:
+        with temp:
+            while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+                if size == 0 and not matches_type(chunk, claimed):
+                    _reject(415, "content", unsupported)
+                size += len(chunk)
+                if size > max_bytes:
+                    _reject(413, "size", f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit.")
+                digest.update(chunk)
+                temp.write(chunk)
+        if size == 0:
+            _reject(400, "empty", "Uploaded file is empty.")
+    except BaseException:
+        os.remove(temp.name)
+        raise
+
+    return IngestedUpload(filename, temp.name, claimed, size, digest.hexdigest())
+
+
+class BodySizeLimitMiddleware:
+    # Rejects request bodies over max_bytes with a 413, from Content-Length up front or by counting a
+    # chunked body as it streams, so an oversized upload is never spooled by the multipart parser.
+    # path_limits raises or lowers the cap for specific paths (e.g. bulk imports).
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES, path_limits: dict | None = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = path_limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        max_bytes = self.path_limits.get(scope["path"], self.max_bytes)
+        headers = dict(scope.get("headers") or [])
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > max_bytes:
+            UPLOADS_REJECTED.labels(reason="size").inc()
+            return await self._too_large(scope, receive, send, max_bytes)
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    UPLOADS_REJECTED.labels(reason="size").inc()
+                    raise _BodyTooLarge(max_bytes)
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            if not response_started:
+                await self._too_large(scope, receive, send, max_bytes)
+
+    async def _too_large(self, scope, receive, send, max_bytes: int):
+        response = JSONResponse(
+            {"detail": f"Request body exceeds {max_bytes} bytes."}, status_code=413, headers={"Connection": "close"}
+        )
+        await response(scope, receive, send)
+
+
+class _BodyTooLarge(HTTPException):
+    # An HTTPException so FastAPI's body parsing re-raises it as a 413 instead of wrapping it in a 400
+    def __init__(self, max_bytes: int):
+        super().__init__(status_code=413, detail=f"Request body exceeds {max_bytes} bytes.")
@@ -0,0 +1,147 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from prometheus_client import Counter, Histogram
+
+# USD per 1M tokens: (input, cached input, output)
+MODEL_PRICING = {
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+}
+DEFAULT_PRICING = MODEL_PRICING["gpt-4o"]
+
+OPENAI_TOKENS = Counter(
+    "openai_tokens_total", "Tokens used by OpenAI completions", ["purpose", "model", "kind"]
+)
+OPENAI_COST = Counter(
+    "openai_cost_usd_total", "Estimated OpenAI spend in USD", ["purpose", "model"]
+)
+OPENAI_CACHED_RATIO = Histogram(
+    "openai_cached_prompt_ratio", "Share of prompt tokens served from OpenAI's prompt-prefix cache, per call",
+    ["purpose", "model"], buckets=(0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 1),
+)
+
+# Who a completion is being made for; set by the request middleware and the services
+_USAGE_CONTEXT: ContextVar[dict] = ContextVar("usage_context", default={})
+
+DIMENSIONS = ("endpoint", "purpose", "session", "user")
+MAX_KEYS_PER_DIMENSION = int(os.getenv("USAGE_MAX_KEYS", "5000"))
+
+
+def bind_request(scope: dict):
+    # Remember the ASGI scope, so the endpoint template can be read once routing has happened
+    _USAGE_CONTEXT.set({**_USAGE_CONTEXT.get(), "scope": scope})
+
+
+@contextmanager
+def usage_scope(**fields):
+    # Attribute completions made inside the block to e.g. session_id/user_id
+    token = _USAGE_CONTEXT.set({**_USAGE_CONTEXT.get(), **{k: v for k, v in fields.items() if v}})
+    try:
+        yield
+    finally:
+        _USAGE_CONTEXT.reset(token)
+
+
+def _current_endpoint(context: dict):
+    if "endpoint" in context:
+        return context["endpoint"]
+    scope = context.get("scope")
+    route = scope.get("route") if scope else None
+    # WebSocket scopes have no method
+    return f"{scope.get('method', 'WS')} {route.path}" if route is not None else None
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    input_price, cached_price, output_price = MODEL_PRICING.get(model, DEFAULT_PRICING)
+    uncached = max(0, prompt_tokens - cached_tokens)
+    return (uncached * input_price + cached_tokens * cached_price + completion_tokens * output_price) / 1_000_000
+
+
+def _cached_ratio(row: dict) -> float:
+    # Share of prompt tokens that hit OpenAI's prompt-prefix cache
+    return round(row["cached_tokens"] / row["prompt_tokens"], 4) if row["prompt_tokens"] else 0.0
+
+
+class UsageTracker:
+    # In-memory usage aggregates per endpoint, purpose, session and user
+    def __init__(self, max_keys: int = MAX_KEYS_PER_DIMENSION):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._totals = {dimension: OrderedDict() for dimension in DIMENSIONS}
+
+    def _add(self, dimension, key, prompt_tokens, completion_tokens, cached_tokens, cost):
+        table = self._totals[dimension]
+        row = table.get(key)
+        if row is None:
+            row = table[key] = {
+                "requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "cost_usd": 0.0,
+            }
+        table.move_to_end(key)
+        row["requests"] += 1
+        row["prompt_tokens"] += prompt_tokens
+        row["completion_tokens"] += completion_tokens
+        row["cached_tokens"] += cached_tokens
+        row["cost_usd"] += cost
+        # Sessions and users are unbounded, so the least recently active ones are dropped
+        while len(table) > self.max_keys:
+            table.popitem(last=False)
+
+    def record(self, purpose: str, model: str, usage):
+        if usage is None:
+            return None
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+        cost = estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
+
+        OPENAI_TOKENS.labels(purpose=purpose, model=model, kind="prompt").inc(prompt_tokens)
+        OPENAI_TOKENS.labels(purpose=purpose, model=model, kind="completion").inc(completion_tokens)
+        OPENAI_TOKENS.labels(purpose=purpose, model=model, kind="cached").inc(cached_tokens)
+        OPENAI_COST.labels(purpose=purpose, model=model).inc(cost)
+        if prompt_tokens:
+            OPENAI_CACHED_RATIO.labels(purpose=purpose, model=model).observe(cached_tokens / prompt_tokens)
+
+        context = _USAGE_CONTEXT.get()
+        keys = {
+            "endpoint": _current_endpoint(context),
+            "purpose": purpose,
+            "session": context.get("session_id"),
+            "user": context.get("user_id"),
+        }
+        with self._lock:
+            for dimension, key in keys.items():
+                if key:
+                    self._add(dimension, key, prompt_tokens, completion_tokens, cached_tokens, cost)
+
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "cost_usd": cost}
+
+    def summary(self, dimension: str, limit: int = 50):
+        # Top entries of a dimension by estimated cost
+        with self._lock:
+            rows = [{"key": key, **values} for key, values in self._totals[dimension].items()]
+        rows.sort(key=lambda row: row["cost_usd"], reverse=True)
+        for row in rows:
+            row["cost_usd"] = round(row["cost_usd"], 6)
+            row["cached_ratio"] = _cached_ratio(row)
+        return rows[:limit]
+
+    def totals(self):
+        with self._lock:
+            rows = list(self._totals["purpose"].values())
+        totals = {
+            "requests": sum(r["requests"] for r in rows),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in rows),
+            "completion_tokens": sum(r["completion_tokens"] for r in rows),
+            "cached_tokens": sum(r["cached_tokens"] for r in rows),
+            "cost_usd": round(sum(r["cost_usd"] for r in rows), 6),
+        }
+        totals["cached_ratio"] = _cached_ratio(totals)
+        return totals
+
+
+USAGE = UsageTracker()
@@ -0,0 +1,54 @@
+# Run the offline benchmark suites (import time + micro + routes), the prompt token
+# report and the prompt prefix check and store results under benchmarks/results.
+#
+# Usage:
+#   python -m benchmarks [--quick]
+#
+# bench_save_generated needs a local Postgres and is run on its own.
+
+import os
+import sys
+import uuid
+import tempfile
+import asyncio
+import argparse
+
+from benchmarks import bench_import_time, bench_micro, bench_prompt_tokens, bench_routes, check_prompt_prefix
+from benchmarks.fixtures import SIZES
+from benchmarks.harness import report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suites")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for a smoke run")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATA_BACKEND", "local")
+    os.environ.setdefault("OPENAI_BACKEND", "fake")
+    os.environ.setdefault("LOCAL_DATA_DIR", tempfile.mkdtemp(prefix="resume-bench-"))
+    os.environ.setdefault("FAKE_OPENAI_LATENCY_MS", "50" if args.quick else "300")
+    admin_token = os.environ.setdefault("ADMIN_TOKEN", uuid.uuid4().hex)
+
+    prefix_failures = check_prompt_prefix.run()
+    for failure in prefix_failures:
+        print(f"FAIL {failure}")
+    bench_prompt_tokens.report(bench_prompt_tokens.run(list(SIZES)))
+
+    iterations = 3 if args.quick else 20
+    regressions = report("import_time", bench_import_time.run(3 if args.quick else 10))
+    regressions += report("micro", bench_micro.run(iterations, list(SIZES)))
+
+    results, failures = asyncio.run(bench_routes.run(
+        users=2 if args.quick else 10, iterations=1 if args.quick else 3, chat_turns=6, base_url=None,
+        admin_token=admin_token,
+    ))
+    for failure in failures[:10]:
+        print(f"flow failed: {failure}")
+    regressions += report("routes", results)
+    socket_failed = any(failure.startswith(bench_routes.SOCKET_FAILURE) for failure in failures)
+
+    sys.exit(1 if regressions or prefix_failures or socket_failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Import-time benchmark for app startup, measured with `python -X importtime`.
+#
+# Each sample runs a fresh interpreter so nothing is served from sys.modules.
+#
+# Usage:
+#   python -m benchmarks.bench_import_time [--iterations 10] [--top 15]
+
+import os
+import sys
+import argparse
+import subprocess
+
+from benchmarks.harness import summarize, report
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entry points whose startup cost we care about
+TARGETS = ("app.main", "chatbot")
+
+# Modules the web app should only load on first use, never at import
+LAZY_MODULES = ("fitz", "playwright", "openai", "supabase", "docx", "numpy")
+
+
+def parse_importtime(stderr):
+    # Map each imported module to its cumulative import time in microseconds
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        timings[name.strip()] = int(cumulative.strip())
+    return timings
+
+
+def sample(module):
+    # Import one module in a clean interpreter and return its timings
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    return parse_importtime(proc.stderr)
+
+
+def run(iterations, top=15):
+    results = {}
+    for module in TARGETS:
+        try:
+            sample(module)  # warm the bytecode cache
+            samples = [sample(module) for _ in range(iterations)]
+        except RuntimeError as e:
+            results[f"import[{module}]"] = {"skipped": str(e)}
+            continue
+
+        results[f"import[{module}]"] = summarize([s[module] / 1000 for s in samples])
+
+        last = samples[-1]
+        heaviest = sorted(last.items(), key=lambda item: item[1], reverse=True)[:top]
+        print(f"\nheaviest imports under {module}:")
+        for name, micros in heaviest:
+            print(f"  {micros / 1000:>10.1f} ms  {name}")
+
+        if module == "app.main":
+            loaded = sorted(name for name in last if name.split(".")[0] in LAZY_MODULES)
+            if loaded:
+                print(f"WARNING: app.main eagerly imports {', '.join(loaded)}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark for app startup")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    regressions = report("import_time", run(args.iterations, args.top))
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
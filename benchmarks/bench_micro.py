@@ -0,0 +1,96 @@
+# Micro-benchmarks for the heavy building blocks behind the API routes.
+#
+# Usage:
+#   python -m benchmarks.bench_micro [--iterations 20] [--sizes small,medium,large]
+
+import os
+import asyncio
+import argparse
+import tempfile
+
+from benchmarks.fixtures import SIZES, make_resume, make_html, make_pdf_bytes, make_docx_bytes, PREFERENCES, JOB_DESCRIPTION
+from benchmarks.harness import bench, abench, report
+
+
+def _write_temp(data, suffix):
+    # extract_resume_text and convert_pdf_to_images_web take paths, like the upload flow
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp:
+        temp.write(data)
+        return temp.name
+
+
+def run_sync(iterations, fixtures, results, temp_paths):
+    from render_resume import generate_html_from_template
+    from app.services.text_extraction import extract_resume_text
+    from app.services.analysis_service import convert_pdf_to_images_web
+    from app.services.ats_service import score_resumes
+
+    for size, (resume, html, pdf_bytes, docx_bytes) in fixtures.items():
+        pdf_path = _write_temp(pdf_bytes, ".pdf")
+        docx_path = _write_temp(docx_bytes, ".docx")
+        temp_paths += [pdf_path, docx_path]
+
+        for name, fn, args in [
+            (f"generate_html_from_template[{size}]", generate_html_from_template, (resume, PREFERENCES)),
+            (f"extract_resume_text[pdf,{size}]", extract_resume_text, (pdf_path,)),
+            (f"extract_resume_text[docx,{size}]", extract_resume_text, (docx_path,)),
+            (f"convert_pdf_to_images_web[{size}]", convert_pdf_to_images_web, (pdf_path,)),
+            (f"ats_score_resumes[x100,{size}]", score_resumes, ([resume] * 100, JOB_DESCRIPTION)),
+        ]:
+            try:
+                results[name] = bench(fn, *args, iterations=iterations)
+            except Exception as e:
+                results[name] = {"skipped": f"{type(e).__name__}: {e}"}
+
+
+async def run_async(iterations, fixtures, results):
+    from app.services.export_service import html_to_pdf_bytes, html_to_docx_bytes, _render_pdf
+    from app.utils.browser_pool import BROWSER_POOL
+
+    try:
+        for size, (resume, html, pdf_bytes, docx_bytes) in fixtures.items():
+            # html_to_pdf_bytes serves repeats of the same HTML from PDF_CACHE, so the Chromium render is
+            # timed through _render_pdf and the cache hit separately
+            for name, fn in [
+                (f"html_to_pdf_bytes[{size}]", _render_pdf),
+                (f"html_to_pdf_bytes[cached,{size}]", html_to_pdf_bytes),
+                (f"html_to_docx_bytes[{size}]", html_to_docx_bytes),
+            ]:
+                try:
+                    results[name] = await abench(fn, html, iterations=iterations)
+                except Exception as e:
+                    results[name] = {"skipped": f"{type(e).__name__}: {e}"}
+    finally:
+        await BROWSER_POOL.close()
+
+
+def run(iterations, sizes):
+    fixtures = {}
+    for size in sizes:
+        resume = make_resume(size)
+        fixtures[size] = (resume, make_html(resume), make_pdf_bytes(resume), make_docx_bytes(resume))
+
+    results = {}
+    temp_paths = []
+    try:
+        run_sync(iterations, fixtures, results, temp_paths)
+        asyncio.run(run_async(iterations, fixtures, results))
+    finally:
+        for path in temp_paths:
+            os.remove(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for rendering, extraction and export")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--sizes", default=",".join(SIZES))
+    args = parser.parse_args()
+
+    results = run(args.iterations, [s.strip() for s in args.sizes.split(",") if s.strip()])
+    regressions = report("micro", results)
+    raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Token savings of the prompt serialization of resume JSON over the old indent=2 dumps.
+#
+# Counts use tiktoken's GPT-4o encoding when installed, otherwise a rough estimate.
+#
+# Usage:
+#   python -m benchmarks.bench_prompt_tokens
+
+import re
+import json
+
+from app.utils.resume_serialization import resume_for_prompt
+from benchmarks.fixtures import SIZES, make_resume
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except ImportError:
+    _ENCODING = None
+
+FORMATS = {
+    "indent=2": lambda resume: json.dumps(resume, indent=2),
+    "compact": lambda resume: json.dumps(resume, separators=(",", ":"), ensure_ascii=False),
+    "prompt": resume_for_prompt,
+}
+
+
+def count_tokens(text):
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # Words, punctuation and whitespace runs each count as one token
+    return len(re.findall(r"\w+|[^\w\s]|\s+", text))
+
+
+def run(sizes):
+    results = {}
+    for size in sizes:
+        resume = make_resume(size)
+        tokens = {name: count_tokens(fmt(resume)) for name, fmt in FORMATS.items()}
+        baseline = tokens["indent=2"]
+        results[size] = {
+            **tokens,
+            "saved": baseline - tokens["prompt"],
+            "saved_pct": round(100 * (baseline - tokens["prompt"]) / baseline, 1),
+        }
+    return results
+
+
+def report(results):
+    counter = "tiktoken o200k_base" if _ENCODING is not None else "approximate"
+    print(f"\n== prompt_tokens ({counter}) ==")
+    print(f"{'fixture':<10}" + "".join(f"{name:>12}" for name in FORMATS) + f"{'saved':>10}{'saved %':>10}")
+    for size, row in results.items():
+        print(f"{size:<10}" + "".join(f"{row[name]:>12}" for name in FORMATS) + f"{row['saved']:>10}{row['saved_pct']:>10}")
+
+
+def main():
+    report(run(list(SIZES)))
+
+
+if __name__ == "__main__":
+    main()
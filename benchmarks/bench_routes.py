@@ -0,0 +1,366 @@
+# Macro load test: virtual users drive every FastAPI route concurrently through the
+# full build → save → preview → upload → improve → score → export → import → delete flow,
+# plus one conversation over each WebSocket, and report per-route latency percentiles and throughput.
+#
+# By default it runs in-process against the local stand-ins (DATA_BACKEND=local,
+# OPENAI_BACKEND=fake), so it needs neither Supabase nor OpenAI. Pass --base-url to
+# load a running server instead.
+#
+# Usage:
+#   python -m benchmarks.bench_routes --users 10 --iterations 3 --llm-latency-ms 300
+
+import io
+import os
+import json
+import time
+import uuid
+import asyncio
+import zipfile
+import argparse
+import tempfile
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from benchmarks.fixtures import SIZES, make_resume, make_pdf_bytes, JOB_DESCRIPTION
+from benchmarks.harness import summarize, report
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def __call__(self, label, request, expect=(200,)):
+        start = time.perf_counter()
+        try:
+            response = await request
+        except Exception:
+            self.errors[label] += 1
+            raise
+        self.latencies[label].append((time.perf_counter() - start) * 1000)
+        if response.status_code not in expect:
+            self.errors[label] += 1
+            raise RuntimeError(f"{label} returned {response.status_code}: {response.text[:200]}")
+        return response
+
+
+# How long a bulk import may run before the flow gives up on it
+IMPORT_TIMEOUT_S = 120
+IMPORT_POLL_S = 0.1
+
+
+def _zip_of(files):
+    # In-memory ZIP archive of {name: bytes}, as uploaded to /resume/import
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+async def import_flow(client, rec, user_id, resume):
+    # Bulk import of a small archive, polled until the background job finishes; returns the imported ids
+    archive = _zip_of({
+        f"import-{uuid.uuid4().hex[:8]}-{i}.pdf": make_pdf_bytes(resume) for i in range(2)
+    })
+    job = (await rec("POST /resume/import", client.post(
+        "/resume/import", data={"user_id": user_id}, files={"file": ("resumes.zip", archive, "application/zip")}
+    ), expect=(202,))).json()
+
+    deadline = time.monotonic() + IMPORT_TIMEOUT_S
+    while job["status"] not in ("done", "failed"):
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"bulk import {job['job_id']} still {job['status']} after {IMPORT_TIMEOUT_S}s")
+        await asyncio.sleep(IMPORT_POLL_S)
+        job = (await rec("GET /resume/import/{job_id}", client.get(f"/resume/import/{job['job_id']}"))).json()
+    if job["status"] != "done" or job["failed"]:
+        raise RuntimeError(f"bulk import {job['job_id']} {job['status']}: {job['errors'][:3]}")
+    return job["resume_ids"]
+
+
+async def user_flow(client, rec, size, chat_turns, admin_token):
+    user_id = str(uuid.uuid4())
+    resume = make_resume(size)
+
+    # Build-from-scratch chatbot
+    session_id = (await rec("POST /chatbot/start", client.post("/chatbot/start", json={"user_id": user_id}))).json()["session_id"]
+    for turn in range(chat_turns):
+        await rec("POST /chatbot/message", client.post(
+            "/chatbot/message", json={"session_id": session_id, "message": f"Answer number {turn}"}
+        ))
+    resume_json = (await rec("GET /chatbot/json/{session_id}", client.get(f"/chatbot/json/{session_id}"))).json()["resume_json"]
+    preferences = (await rec("GET /chatbot/preferences/{session_id}", client.get(f"/chatbot/preferences/{session_id}"))).json()["preferences"]
+
+    html = (await rec("POST /resume/generate", client.post(
+        "/resume/generate", json={"resume_json": resume_json or resume, "preferences": preferences}
+    ))).json()["html"]
+
+    saved = (await rec("POST /resume/save-generated", client.post("/resume/save-generated", data={
+        "resume_json": json.dumps(resume_json or resume),
+        "preferences": json.dumps(preferences),
+        "resume_html": html,
+        "resume_name": "Benchmark Resume",
+        "user_id": user_id,
+    }))).json()
+    generated_id = saved["resume_id"]
+
+    preview = await rec("GET /resume/preview/{id}", client.get(f"/resume/preview/{generated_id}"))
+    await rec("GET /resume/preview/{id} (304)", client.get(
+        f"/resume/preview/{generated_id}", headers={"If-None-Match": preview.headers.get("etag", "")}
+    ), expect=(304,))
+    await rec("GET /resume/thumbnail/{id}", client.get(f"/resume/thumbnail/{generated_id}"))
+    await rec("POST /resume/rename/{id}", client.post(f"/resume/rename/{generated_id}", data={"new_name": "Renamed"}))
+
+    # Upload + parse + analysis of an original file
+    pdf_bytes = make_pdf_bytes(resume)
+    pdf_name = f"resume-{uuid.uuid4().hex[:8]}.pdf"
+    uploaded = (await rec("POST /resume/upload", client.post(
+        "/resume/upload", data={"user_id": user_id}, files={"file": (pdf_name, pdf_bytes, "application/pdf")}
+    ))).json()
+    upload_id = uploaded["resume_id"]
+
+    parsed = (await rec("POST /resume/parse", client.post(
+        "/resume/parse", files={"file": (pdf_name, pdf_bytes, "application/pdf")}
+    ))).json()
+    await rec("POST /resume/analyze-with-context", client.post("/resume/analyze-with-context", data={
+        "parsed_json": json.dumps(parsed or resume),
+        "target_job": "Data Analyst",
+    }, files={"file": (pdf_name, pdf_bytes, "application/pdf")}))
+
+    # Improvement flow on the uploaded resume
+    improve_id = (await rec("POST /resume/improve/start", client.post(
+        "/resume/improve/start", data={"resume_id": upload_id, "user_id": user_id}
+    ))).json()["session_id"]
+    for message in ("Data Analyst", "Yes, let's begin", "Yes, apply it"):
+        await rec("POST /resume/improve/message", client.post(
+            "/resume/improve/message", data={"session_id": improve_id, "message": message}
+        ))
+    improved = (await rec("POST /resume/improve/finalize", client.post(
+        "/resume/improve/finalize", data={"session_id": improve_id}
+    ))).json()
+
+    # Keyword-match scoring, inline and across the user's stored resumes
+    await rec("POST /resume/ats-score", client.post("/resume/ats-score", json={
+        "job_description": JOB_DESCRIPTION, "resume_json": resume_json or resume,
+    }))
+    await rec("POST /resume/ats-score/batch", client.post("/resume/ats-score/batch", json={
+        "user_id": user_id, "job_description": JOB_DESCRIPTION,
+    }))
+
+    # Exports
+    html_file = {"file": ("resume.html", html.encode("utf-8"), "text/html")}
+    # The server caches PDFs by HTML hash and every flow's HTML may coincide, so a unique comment forces a
+    # real render; the repeat of the same file measures the cache hit
+    pdf_file = {"file": ("resume.html", f"{html}<!-- {uuid.uuid4()} -->".encode("utf-8"), "text/html")}
+    await rec("POST /resume/export/pdf", client.post("/resume/export/pdf", files=pdf_file))
+    await rec("POST /resume/export/pdf (cached)", client.post("/resume/export/pdf", files=pdf_file))
+    await rec("POST /resume/export/docx", client.post("/resume/export/docx", files=html_file))
+    await rec("POST /resume/export/batch", client.post("/resume/export/batch", json={
+        "resume_ids": [generated_id, improved["resume_id"]], "format": "pdf", "user_id": user_id,
+    }))
+
+    imported_ids = await import_flow(client, rec, user_id, resume)
+
+    await rec("GET /", client.get("/"))
+    await rec("GET /metrics", client.get("/metrics"))
+    if admin_token:
+        await rec("GET /admin/usage", client.get("/admin/usage", headers={"X-Admin-Token": admin_token}))
+
+    for resume_id in (generated_id, upload_id, improved["resume_id"], *imported_ids):
+        await rec("DELETE /resume/{id}", client.delete(f"/resume/{resume_id}"))
+
+
+# Prefix of the failure recorded when the WebSocket flow breaks; that always fails the run
+SOCKET_FAILURE = "WebSocket flow"
+
+
+class _TestClientSocket:
+    # Async face over a Starlette TestClient WebSocket session, for the in-process run
+    def __init__(self, session):
+        self.session = session
+
+    async def send_json(self, data):
+        await asyncio.to_thread(self.session.send_json, data)
+
+    async def receive_json(self):
+        return await asyncio.to_thread(self.session.receive_json)
+
+
+class _RemoteSocket:
+    def __init__(self, websocket):
+        self.websocket = websocket
+
+    async def send_json(self, data):
+        await self.websocket.send(json.dumps(data))
+
+    async def receive_json(self):
+        return json.loads(await self.websocket.recv())
+
+
+@asynccontextmanager
+async def open_socket(path, base_url):
+    # httpx's ASGI transport can't speak WebSocket: use TestClient in-process, the websockets client otherwise
+    if base_url:
+        import websockets
+        async with websockets.connect(base_url.replace("http", "ws", 1) + path) as websocket:
+            yield _RemoteSocket(websocket)
+        return
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    session = TestClient(app).websocket_connect(path)
+    websocket = await asyncio.to_thread(session.__enter__)
+    try:
+        yield _TestClientSocket(websocket)
+    finally:
+        await asyncio.to_thread(session.__exit__, None, None, None)
+
+
+async def _next_frame(socket, *types):
+    # Skip token frames until one of types arrives; error frames fail the flow
+    while True:
+        frame = await socket.receive_json()
+        if frame["type"] == "error":
+            raise RuntimeError(f"socket error frame: {frame}")
+        if frame["type"] in types:
+            return frame
+
+
+async def socket_flow(client, rec, chat_turns, base_url):
+    # One conversation over each socket: the chatbot, then an improvement session
+    await chatbot_socket_flow(rec, chat_turns, base_url)
+    await improvement_socket_flow(client, rec, base_url)
+
+
+async def chatbot_socket_flow(rec, chat_turns, base_url):
+    # Full chatbot conversation over /chatbot/ws: session frame, streamed turns, then the resume_ready event
+    label = "WS /chatbot/ws (turn)"
+    try:
+        async with open_socket(f"/chatbot/ws?user_id={uuid.uuid4()}", base_url) as socket:
+            await _next_frame(socket, "session")
+            reply = None
+            for turn in range(chat_turns):
+                start = time.perf_counter()
+                await socket.send_json({"type": "message", "content": f"Answer number {turn}"})
+                reply = await _next_frame(socket, "reply")
+                rec.latencies[label].append((time.perf_counter() - start) * 1000)
+            if reply is None or not reply.get("ready_to_generate"):
+                raise RuntimeError("chat over /chatbot/ws never became ready to generate")
+            start = time.perf_counter()
+            await _next_frame(socket, "event")
+            rec.latencies["WS /chatbot/ws (resume_ready)"].append((time.perf_counter() - start) * 1000)
+    except Exception:
+        rec.errors[label] += 1
+        raise
+
+
+async def improvement_socket_flow(client, rec, base_url):
+    # Improvement session over /resume/improve/ws: the target job runs the analysis (analysis_ready event),
+    # then streamed improvement turns
+    user_id = str(uuid.uuid4())
+    pdf_bytes = make_pdf_bytes(make_resume("medium"))
+    upload_id = (await rec("POST /resume/upload", client.post(
+        "/resume/upload", data={"user_id": user_id},
+        files={"file": (f"resume-{uuid.uuid4().hex[:8]}.pdf", pdf_bytes, "application/pdf")},
+    ))).json()["resume_id"]
+    session_id = (await rec("POST /resume/improve/start", client.post(
+        "/resume/improve/start", data={"resume_id": upload_id, "user_id": user_id}
+    ))).json()["session_id"]
+
+    label = "WS /resume/improve/ws (turn)"
+    try:
+        async with open_socket(f"/resume/improve/ws?session_id={session_id}", base_url) as socket:
+            await _next_frame(socket, "session")
+            start = time.perf_counter()
+            await socket.send_json({"type": "message", "content": "Data Analyst"})
+            await _next_frame(socket, "event")
+            await _next_frame(socket, "reply")
+            rec.latencies["WS /resume/improve/ws (analysis)"].append((time.perf_counter() - start) * 1000)
+            for message in ("Yes, let's begin", "Yes, apply it"):
+                start = time.perf_counter()
+                await socket.send_json({"type": "message", "content": message})
+                await _next_frame(socket, "reply")
+                rec.latencies[label].append((time.perf_counter() - start) * 1000)
+    except Exception:
+        rec.errors[label] += 1
+        raise
+    finally:
+        await rec("DELETE /resume/{id}", client.delete(f"/resume/{upload_id}"))
+
+
+async def run(users, iterations, chat_turns, base_url, admin_token=None):
+    import httpx
+
+    rec = Recorder()
+    sizes = list(SIZES)
+    failures = []
+
+    if base_url:
+        client = httpx.AsyncClient(base_url=base_url, timeout=120)
+        close_pools = None
+    else:
+        from app.main import app
+        from app.utils.browser_pool import BROWSER_POOL
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=120)
+        close_pools = BROWSER_POOL.close
+
+    async def virtual_user(index):
+        for i in range(iterations):
+            try:
+                await user_flow(client, rec, sizes[(index + i) % len(sizes)], chat_turns, admin_token)
+            except Exception as e:
+                failures.append(f"{type(e).__name__}: {e}")
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(virtual_user(i) for i in range(users)))
+        # One conversation over each WebSocket route, so a broken socket path fails the run
+        try:
+            await socket_flow(client, rec, chat_turns, base_url)
+        except Exception as e:
+            failures.append(f"{SOCKET_FAILURE}: {type(e).__name__}: {e}")
+    finally:
+        elapsed = time.perf_counter() - start
+        await client.aclose()
+        if close_pools:
+            await close_pools()
+
+    results = {
+        label: summarize(values, elapsed, errors=rec.errors[label])
+        for label, values in sorted(rec.latencies.items())
+    }
+    return results, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test over every API route")
+    parser.add_argument("--users", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=2, help="flows per virtual user")
+    parser.add_argument("--chat-turns", type=int, default=6)
+    parser.add_argument("--llm-latency-ms", type=float, default=300)
+    parser.add_argument("--llm-tokens-per-sec", type=float, default=60)
+    parser.add_argument("--base-url", default=None)
+    parser.add_argument("--admin-token", default=os.getenv("ADMIN_TOKEN"), help="enables GET /admin/usage")
+    args = parser.parse_args()
+
+    if not args.base_url:
+        os.environ.setdefault("DATA_BACKEND", "local")
+        os.environ.setdefault("OPENAI_BACKEND", "fake")
+        os.environ.setdefault("LOCAL_DATA_DIR", tempfile.mkdtemp(prefix="resume-bench-"))
+        os.environ["FAKE_OPENAI_LATENCY_MS"] = str(args.llm_latency_ms)
+        os.environ["FAKE_OPENAI_TOKENS_PER_SEC"] = str(args.llm_tokens_per_sec)
+        os.environ["FAKE_OPENAI_READY_AFTER"] = str(args.chat_turns)
+        args.admin_token = os.environ.setdefault("ADMIN_TOKEN", args.admin_token or uuid.uuid4().hex)
+
+    results, failures = asyncio.run(run(args.users, args.iterations, args.chat_turns, args.base_url, args.admin_token))
+    for failure in failures[:10]:
+        print(f"flow failed: {failure}")
+    regressions = report("routes", results)
+    socket_failed = any(failure.startswith(SOCKET_FAILURE) for failure in failures)
+    raise SystemExit(1 if regressions or socket_failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Check that the chat system prompts keep a static, cacheable prefix.
+#
+# OpenAI caches prompt prefixes of 1024+ tokens automatically, but only when they are
+# byte-identical between requests. This builds the prompts for sessions with different
+# dates, users, target roles and analyses and fails if their static prefixes differ.
+#
+# Usage:
+#   python -m benchmarks.check_prompt_prefix
+
+from unittest import mock
+
+from app.services import prompts
+from benchmarks.fixtures import make_resume
+
+# Smallest prefix OpenAI will cache
+MIN_CACHEABLE_TOKENS = 1024
+
+
+def _approx_tokens(text):
+    return len(text) // 4
+
+
+def _chatbot_prompts():
+    months = ("January 2026", "October 2026")
+    built = []
+    for month in months:
+        with mock.patch.object(prompts, "current_month", return_value=month):
+            built.append(prompts.chatbot_system_prompt())
+    return prompts.CHATBOT_INSTRUCTIONS, built, months
+
+
+def _improvement_prompts():
+    sessions = [
+        ("January 2026", "Data Analyst", "Strong metrics, weak summary.", make_resume("small")),
+        ("October 2026", "Registered Nurse", "Add certifications first.", make_resume("large")),
+    ]
+    built = []
+    for month, target_job, analysis, resume in sessions:
+        with mock.patch.object(prompts, "current_month", return_value=month):
+            built.append(prompts.improvement_system_prompt(target_job, analysis, resume))
+    dynamic = [value for month, target_job, analysis, resume in sessions for value in (month, target_job, analysis)]
+    return prompts.IMPROVEMENT_INSTRUCTIONS, built, dynamic
+
+
+def run():
+    failures = []
+    for name, (instructions, built, dynamic) in {
+        "chatbot": _chatbot_prompts(),
+        "improvement": _improvement_prompts(),
+    }.items():
+        prefixes = {prompts.static_prefix(prompt) for prompt in built}
+        if prefixes != {instructions}:
+            failures.append(f"{name}: static prefix differs between sessions")
+        leaked = [value for value in dynamic if value in instructions]
+        if leaked:
+            failures.append(f"{name}: per-session values in the static prefix: {leaked}")
+        tokens = _approx_tokens(instructions)
+        note = "" if tokens >= MIN_CACHEABLE_TOKENS else f" (below the {MIN_CACHEABLE_TOKENS}-token caching minimum)"
+        print(f"{name:<12} static prefix ~{tokens} tokens, {len(instructions)} chars{note}")
+    return failures
+
+
+def main():
+    failures = run()
+    for failure in failures:
+        print(f"FAIL {failure}")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
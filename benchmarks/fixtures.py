@@ -0,0 +1,113 @@
+# Deterministic fixture resumes of increasing size, plus PDF/DOCX/HTML renderings of them.
+
+import io
+
+SIZES = {
+    # jobs, bullets per job, projects, certifications, skills
+    "small": (1, 3, 0, 0, 6),
+    "medium": (3, 5, 2, 2, 12),
+    "large": (6, 8, 5, 5, 30),
+}
+
+PREFERENCES = {
+    "target_role": "Data Analyst",
+    "style_choice": "modern",
+    "structure_type": "chronological",
+    "summary_required": False,
+    "page_limit": 1,
+}
+
+JOB_DESCRIPTION = (
+    "Data Analyst. We are looking for an analyst with strong SQL, Python and Tableau skills to build "
+    "dashboards and automated reporting pipelines. Experience with Power BI, ETL, A/B testing, statistics "
+    "and stakeholder communication required; AWS, Airflow and machine learning are a plus."
+)
+
+
+def make_resume(size="medium"):
+    jobs, bullets, projects, certs, skills = SIZES[size]
+    return {
+        "full_name": "Jordan Sample",
+        "email": "jordan@example.com",
+        "phone": "555-010-0199",
+        "linkedin": "https://linkedin.com/in/jordansample",
+        "summary": "Analyst with a track record of turning messy data into decisions." if size != "small" else "",
+        "experience": [
+            {
+                "job_title": f"Data Analyst {j + 1}",
+                "company": f"Example Corp {j + 1}",
+                "location": "Indianapolis, IN",
+                "start_date": f"Jan {2015 + j}",
+                "end_date": f"Dec {2016 + j}",
+                "description": [
+                    f"Delivered analysis {b + 1} for team {j + 1}, improving reporting turnaround by {10 + b}% "
+                    f"through automated SQL pipelines and Tableau dashboards"
+                    for b in range(bullets)
+                ],
+            }
+            for j in range(jobs)
+        ],
+        "education": [
+            {"degree": "BS Informatics", "school": "Indiana University", "start_date": "2011", "end_date": "2015"}
+        ],
+        "skills": [f"Skill {i + 1}" for i in range(skills)],
+        "certifications": [f"Certification {i + 1}" for i in range(certs)],
+        "projects": [
+            {"name": f"Project {i + 1}", "description": "Built a forecasting model in Python with scikit-learn."}
+            for i in range(projects)
+        ],
+        "volunteer": [],
+    }
+
+
+def resume_lines(resume):
+    lines = [resume["full_name"], f"{resume['email']} | {resume['phone']} | {resume['linkedin']}"]
+    if resume.get("summary"):
+        lines += ["Summary", resume["summary"]]
+    lines.append("Experience")
+    for job in resume["experience"]:
+        lines.append(f"{job['job_title']}, {job['company']} ({job['start_date']} - {job['end_date']})")
+        lines += [f"- {bullet}" for bullet in job["description"]]
+    lines.append("Education")
+    for edu in resume["education"]:
+        lines.append(f"{edu['degree']}, {edu['school']} ({edu['start_date']} - {edu['end_date']})")
+    lines += ["Skills", ", ".join(resume["skills"])]
+    for project in resume["projects"]:
+        lines.append(f"{project['name']}: {project['description']}")
+    lines += resume["certifications"]
+    return lines
+
+
+def make_pdf_bytes(resume):
+    # Plain-text PDF rendering with PyMuPDF, flowing onto extra pages as needed
+    import fitz
+
+    doc = fitz.open()
+    page = doc.new_page()
+    y = 54
+    for line in resume_lines(resume):
+        if y > 760:
+            page = doc.new_page()
+            y = 54
+        page.insert_text((54, y), line[:110], fontsize=10)
+        y += 14
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_docx_bytes(resume):
+    from docx import Document
+
+    document = Document()
+    for line in resume_lines(resume):
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def make_html(resume):
+    from render_resume import generate_html_from_template
+
+    return generate_html_from_template(resume, PREFERENCES)
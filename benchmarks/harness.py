@@ -0,0 +1,141 @@
+# Shared timing, reporting and result storage for the benchmark scripts.
+
+import os
+import json
+import time
+import math
+import subprocess
+from datetime import datetime, timezone
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# A p95 this much slower than the previous stored run is flagged as a regression
+REGRESSION_THRESHOLD = float(os.getenv("BENCH_REGRESSION_THRESHOLD", "0.15"))
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies_ms, elapsed_s=None, errors=0):
+    values = sorted(latencies_ms)
+    elapsed_s = elapsed_s if elapsed_s is not None else sum(values) / 1000
+    return {
+        "count": len(values),
+        "errors": errors,
+        "mean_ms": round(sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 50), 3),
+        "p95_ms": round(percentile(values, 95), 3),
+        "p99_ms": round(percentile(values, 99), 3),
+        "max_ms": round(values[-1], 3) if values else 0.0,
+        "throughput_per_s": round(len(values) / elapsed_s, 3) if elapsed_s else 0.0,
+    }
+
+
+def bench(fn, *args, iterations=20, warmup=2, **kwargs):
+    # Time a sync callable, pytest-benchmark style: warm up, then record each call
+    for _ in range(warmup):
+        fn(*args, **kwargs)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        fn(*args, **kwargs)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def abench(fn, *args, iterations=20, warmup=2, **kwargs):
+    # Async counterpart of bench; run all async benches on one loop, since the browser pool is loop-bound
+    for _ in range(warmup):
+        await fn(*args, **kwargs)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        await fn(*args, **kwargs)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def save_results(suite, results):
+    # Store one JSON file per run, tagged with the commit, so runs on different commits can be diffed
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    revision = git_revision()
+    now = datetime.now(timezone.utc)
+    path = os.path.join(RESULTS_DIR, f"{suite}-{revision}-{now:%Y%m%d%H%M%S}.json")
+    payload = {
+        "suite": suite,
+        "revision": revision,
+        "timestamp": now.isoformat(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def load_previous(suite, exclude_path=None):
+    # Most recent stored run of a suite other than the one just written
+    if not os.path.isdir(RESULTS_DIR):
+        return None
+    candidates = [
+        os.path.join(RESULTS_DIR, name)
+        for name in os.listdir(RESULTS_DIR)
+        if name.startswith(f"{suite}-") and name.endswith(".json")
+    ]
+    candidates = [p for p in candidates if p != exclude_path]
+    if not candidates:
+        return None
+    with open(max(candidates, key=os.path.getmtime), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(previous, results):
+    # List benchmarks whose p95 regressed beyond REGRESSION_THRESHOLD
+    regressions = []
+    if not previous:
+        return regressions
+    for name, current in results.items():
+        before = previous["results"].get(name)
+        if not before or not isinstance(current, dict) or "p95_ms" not in current:
+            continue
+        if before.get("p95_ms") and current["p95_ms"] > before["p95_ms"] * (1 + REGRESSION_THRESHOLD):
+            regressions.append(
+                f"{name}: p95 {before['p95_ms']}ms ({previous['revision']}) -> {current['p95_ms']}ms"
+            )
+    return regressions
+
+
+def report(suite, results):
+    # Print a table, store the run and flag regressions against the previous stored run
+    print(f"\n== {suite} ==")
+    print(f"{'benchmark':<48}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'err':>6}")
+    for name, row in results.items():
+        if "skipped" in row:
+            print(f"{name:<48}  skipped: {row['skipped']}")
+            continue
+        print(
+            f"{name:<48}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+            f"{row['throughput_per_s']:>10}{row.get('errors', 0):>6}"
+        )
+
+    path = save_results(suite, results)
+    regressions = compare(load_previous(suite, exclude_path=path), results)
+    print(f"results stored in {path}")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return regressions
@@ -9,17 +9,19 @@ from datetime import datetime
 import shutil
 import base64
 import pypandoc
+import fitz
 from render_resume import generate_html_from_template
-
-#Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - [%(levelname)s] %(message)s",
-    handlers=[    
-        logging.StreamHandler(),
-        logging.FileHandler("resume_backend.log")
-    ]
+from app.services.llm_service import (
+    init_conversation,
+    get_resume_json,
+    get_resume_preferences,
+    parse_doc_text,
+    normalize_descriptions,
 )
+from app.services.text_extraction import extract_resume_text
+from app.utils.logging_config import setup_logging
+
+
 #Create OpenAI client
 def create_openai_client():
     from dotenv import load_dotenv
@@ -30,187 +32,6 @@ def create_openai_client():
     return OpenAI(api_key=api_key)
 
 
-def init_conversation():
-    # Return data structure for conversation history and instruct the AI on it's role
-    today = datetime.today().strftime("%B %Y")
-    system_template = f"""
-        Today's date is {today}. When interpreting employment dates or the word "present", treat "{today}" as the current point in time. 
-        If someone lists their end date as present, leave it as present.
-
-        You are a semi-friendly but professional resume assistant chatbot. 
-        Your job is to collect information from the user to create a professional, ATS-friendly resume. 
-        Ask one question at a time in a clear and conversational tone, while internally maintaining a structured resume state.
-
-        ------------------------------------
-        Always follow this sequence of topics:
-        1. Collect user information in this order:
-        - Full name
-        - Email address
-        - Phone number
-        - LinkedIn or portfolio URL
-        - Target job title or industry
-            - When the user provides their target job title/industry, immediately internally research relevant resume norms for that field, but do NOT explain them to the user. Use that research only to guide tone, structure, and section inclusion.
-        - Most recent/relevant job - (ask these as separate questions):
-                    - What was your job title?
-                    - What was the name of the company?
-                    - Where was this company located? (City, State or City, Country)
-                    - What were the start and end dates? 
-                    - What were your key responsibilities or accomplishments?
-            - Ask if they want to add another job. If yes, repeat the above job flow.
-        - Education (ask for degree, school, and dates)
-            * Gather one detail at a time.
-            * After one education entry is entered, ask if the user wants to add another.
-            * If they are still enrolled, don't forget to ask for the start date, and for the end date, ask if they have a expected graduation date or if not, just say "present".
-        - Key skills (ask if they'd like to add any; allow multiple)
-            - Ask what skills they would like to add to their resume
-            - After an entry, ask if they want to add any other skills before moving on.
-        - Certifications or awards
-            -After an entry, ask if they want to add another.
-        - Projects (ask separately; projects must not go under skills)
-            -After an entry, ask if they want to add another.
-        - Volunteer work or unpaid internships 
-            -After an entry, ask if they want to add another.
-        - Preferred visual style (corporate, modern, minimalist, creative)
-                - Corporate style resumes are traditional, formal, and strictly professional. Use standard fonts, black text, and clear hierarchical structure with minimal styling. Avoid color or creative layout.
-                - Modern style resumes balance professionalism with visual clarity. They may use a subtle accent color for headings or lines, clean sans-serif fonts, and distinct section spacing.
-                - Minimalist resumes are entirely black and white, with simple typography, strong alignment, and balanced whitespace. They rely on clean structure instead of color or design elements.
-                - Creative style resumes use color, visual structure, and typography for expression. They are ideal for creative industries and may deviate from traditional layouts while remaining readable and ATS-compatible.
-            - Offer a suggestion for style based on your research of the user's target job/industry standards, as well as to best highlight the user's strengths based on their content they provided, and explain why
-        - Preferred resume format (chronological, functional, combination, targeted)
-            - Offer a suggestion for format based on your research of the user's target job/industry standards, as well as to best highlight the user's strengths based on their content they provided, and explain why
-        - If a professional summary is STRONGLY encouraged based on your research: 
-            - After the volunteer work or unpaid internships section, ask if the user has a summary they would like to include, or if not, write a short professional summary that highlights the user's key skills and experiences relevant to the target role to your best ability.
-        - If summaries are discouraged or overall not necessary optional, do not include one and proceed.
-
-        2. At the end:
-        - Ask if everything looks correct and if they are ready to generate the resume.
-        - Do NOT print or summarize the collected resume data when asking for final confirmation; simply ask if everything looks good.
-        - When the user confirms, respond with:
-            "Sounds good! I'm ready to generate the resume."
-        Then stop. Do not continue speaking, and do not offer summaries or JSON unless asked.
-            When prompted:
-            1. Return the complete resume data you've collected as a JSON object using the schema below.
-                Hidden Resume State Management:
-                - Here is the data schema you will follow for storing and structuring the user's resume information internally:
-                {{
-                "full_name": "",
-                "email": "",
-                "phone": "",
-                "linkedin": "",
-                "summary": "",
-                "experience": [
-                    {{
-                    "job_title": "",
-                    "company": "",
-                    "location": "",
-                    "start_date": "",
-                    "end_date": "",
-                    "description": []
-                    }}
-                ],
-                "education": [
-                    {{
-                    "degree": "",
-                    "school": "",
-                    "start_date": "",
-                    "end_date": ""
-                    }}
-                ],
-                "skills": {{}},   # grouped categories if strongly recommended by industry standards 
-                "certifications": [],
-                "projects": [],
-                "volunteer": []
-                }}
-
-        IMPORTANT: Immediately update the internal JSON state after EVERY user message that provides ANY resume-related data, even if it is only contact information or basic details that go into a JSON field. Do this from the very beginning of the conversation.
-        - If the user input is unrelated (clarifications, general chat), do not modify the JSON.
-        - Never display this JSON in the conversation. It is for backend preview only.
-        - Always keep the JSON state up to date and retrievable by the backend.
-            2. Then, when asked, return the preferences JSON:
-            ```json
-            {{
-            "target_role": "...",
-            "style_choice": "...",
-            "structure_type": "..."
-            "summary_required": true/false,
-            "page_limit": 1 by default, 2 or more if standards suggest it, or based on amount of content (stay strict to industry standards)
-            "industry_notes": "Explanation of resume standards for this industry"
-            }}
-            ```
-            - Do not provide any of the JSON to the user at all
-            3. Then wait for a follow-up prompt to generate the HTML resume, this will be the same where the backend will request it, don't provide it to the user through the chat.
-
-        ------------------------------------
-        Behavioral Guidelines:
-        - Start the conversation by greeting the user and asking for their full name.
-        - Ask only one question at a time, do not request multiple details in one message.
-        - Allow multiple entries for each section before moving on (e.g., multiple projects)
-        - Do not assume multiple details from a single answer. Confirm and clarify one field at a time.
-        - After a section is complete, do not return to it unless the user explicitly asks.
-        - If the user provides clarifications or corrections, update the stored values accordingly.
-        - Never fabricate content. Only store what the user explicitly says.
-        - Omit any sections that were not filled out or skipped.
-        - Do not leave out the entire job description if the user provides it.
-            - NEVER remove or omit ANY user-provided content.
-            - Every bullet, sentence, and detail must be preserved unless the user asks otherwise.
-        - Format the dates as needed yourself, do not make the user meet your format.
-        - Ask clarifying questions as needed if the user provides incomplete or incorrect information.
-        - NEVER rewrite, shorten, merge, or omit user-provided details without checking with the user first. If you decide to ask the user, explain why this change should be made and give them the choice to let you change it or not.
-        - Only fix grammar and typos while keeping EVERY detail exactly intact.
-        - If they’re unsure on any of the previous questions, guide them based on their experience and your research on industry norms, and offer recommendations as needed
-        - Preserve the exact company/organization name as the user provides it. Do not shorten (e.g., keep "University Information Technology Services, Indiana University" as is). )
-        - If the user input is unrelated to resume data (clarifying questions, side discussion), do not change the resume state.
-        - Keep the conversation helpful, concise, and focused on building a strong resume.
-        - Offer suggestions for resume style and structure one at a time, not together, and provide the alternative options for styles/structures after explaining the reasoning for your suggestion.
-
-        ------------------------------------
-        Resume Writing Standards:
-        - After collecting target job/industry, first do some deep research on industry-specific resume standards for the target job/industry provided by the user.
-        - Make sure to review reputable sources on industry resume standards, and gather the general consensus for how to build the resume, especially as ATS-friendly. 
-            - If a professional summary is STRONGLY encouraged based on your research: 
-                - After the volunteer work or unpaid internships section, ask if the user has a summary they would like to include, or if not, write a short professional summary that highlights the user's key skills and experiences relevant to the target role to your best ability.
-                - If summaries are discouraged or overall not necessary/strongly encouraged, do not include one.
-            - Always start with strong action verbs.
-            - If measurable outcomes (numbers, percentages, scope) are provided, include them.
-            - If not, emphasize scope, tools/technologies used, and value delivered to the best of your ability without changing the truth of the user's input.
-            - Do NOT remove, merge, or shorten bullets automatically.
-            - Only group skills into logical categories if industry standards strongly recommend it; otherwise, list them inline or as bullets.
-            - Projects must include a title, brief description, and if relevant, include any methods, tools, or outcomes.
-            - Certificates should go under Certifications unless they are academic minors (which stay in Education).
-            - Keep the resume ATS-friendly: no graphics, text boxes, or unusual formatting.
-            - Default to one page unless industry standards (e.g., academia, senior leadership) allow longer.
-            - Provide a recommendation for both visual style and structure type based on industry norms and the user's target role, as well as based on their strengths to best highlight them.
-        - During your deep research, please internally store the following information in JSON format based on the user's target role/industry. 
-            - This information will be later requested by the backend, so do not provide it to the user at all, only the backend when the preferences JSON is requested.
-            - This will be a detailed JSON object with resume preferences and reasoning for this user, including:
-                - target_role (string): The job or industry type the user is applying for.
-                - style_choice (string): The most appropriate visual style based on user preference and industry norms ("corporate", "modern", "minimalist", or "creative").
-                - structure_type (string): The best resume structure for this field ("chronological", "functional", "combination", or "targeted").
-                - summary_required (boolean): True if summaries are strongly standard/encouraged in this industry, false if neutral or discouraged.
-                - page_limit (integer): Typical page length (1 for most industries, 2 for academia, research, or senior leadership).
-                - industry_notes (object): A structured breakdown of industry-specific standards, including:
-                    {{
-                        "overview": "Brief explanation of resume tone and priorities for this field (e.g., metrics-driven, creative storytelling, academic focus).",
-                        "formatting": {{
-                            "alignment": "Describe alignment conventions (e.g., centered header, left-aligned body).",
-                            "font": "List typical font families used in this field.",
-                            "spacing": "Common margin and line spacing standards.",
-                            "section_order": "Recommended section order based on importance (e.g., Experience → Education → Skills)."
-                        }},
-                        "design_advice": "Explain visual recommendations (use of color, icons, layout complexity, etc.)"
-                    }}
-
-        The goal is to capture both the content strategy and visual formatting expectations for the industry.
-        Make sure `industry_notes.formatting.alignment` reflects typical alignment rules for this field.
-        Use all the information gathered through research to guide your chatbot interaction with the user, as well as your suggestions for the user.
-
-        Do not provide any of the JSON to the user at all, only to the backend when prompted.
-        """
-
-    return [{
-        "role": "system",
-        "content": system_template
-    }]
 
 
 #Initiates the generate resume chatbot loop
@@ -242,90 +63,10 @@ def run_chatbot(messages, client):
         messages.append({"role": "user", "content": user_input})
 
 
-#Requests the complete current resume JSON state from the AI
-def get_resume_json(messages, client):
 
-    tmp_messages = messages + [{
-        "role": "user",
-        "content": "Please return the complete current resume JSON state (according to the schema). Return only JSON."
-    }]
 
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=tmp_messages,
-            temperature=0
-        )
-        reply = completion.choices[0].message.content.strip()
-        match = re.search(r'{.*}', reply, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-        else:
-            logging.warning("AI did not return valid JSON for resume state.")
-            return {}
-    except Exception as e:
-        logging.error("AI failed to extract resume JSON: %s", e)
-        return {}
-
-
-
-
-#Retrieves the resume preferences JSON from the AI
-def get_resume_preferences(messages, client):
-    messages.append({
-        "role": "user",
-        "content": """Please provide the detailed JSON object with resume preferences and reasoning for this user that you have kept internal, which should include:
-
-        - target_role (string): The job or industry type the user is applying for.
-        - style_choice (string): The most appropriate visual style based on user preference and industry norms ("corporate", "modern", "minimalist", or "creative").
-        - structure_type (string): The best resume structure for this field ("chronological", "functional", "combination", or "targeted").
-        - summary_required (boolean): True if summaries are strongly standard/encouraged in this industry, false if neutral or discouraged.
-        - page_limit (integer): Typical page length (1 for most industries, 2 for academia, research, or senior leadership).
-        - industry_notes (object): A structured breakdown of industry-specific standards, including:
-            {
-                "overview": "Brief explanation of resume tone and priorities for this field (e.g., metrics-driven, creative storytelling, academic focus).",
-                "formatting": {
-                    "alignment": "Describe alignment conventions (e.g., centered header, left-aligned body).",
-                    "font": "List typical font families used in this field.",
-                    "spacing": "Common margin and line spacing standards.",
-                    "section_order": "Recommended section order based on importance (e.g., Experience → Education → Skills)."
-                },
-                "design_advice": "Explain visual recommendations (use of color, icons, layout complexity, etc.)"
-            }
-        Return only the JSON object — no commentary or explanation outside the JSON."""
-    })
 
-    try:
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            temperature=0
-        )
-        reply = completion.choices[0].message.content.strip()
-        match = re.search(r'{.*}', reply, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-    except Exception as e:
-        logging.error("AI failed to extract preferences: %s", e)
-
-    # Default fallback if parsing fails
-    return {
-        "target_role": "professional role",
-        "style_choice": "modern",
-        "structure_type": "chronological",
-        "summary_required": False,
-        "page_limit": 1,
-        "industry_notes": {
-            "overview": "General professional resumes emphasize clarity, conciseness, and relevance to the target role.",
-            "formatting": {
-                "alignment": "Centered name and contact info; left-aligned body text for all other sections.",
-                "font": "Sans-serif fonts like Helvetica, Arial, or Calibri are preferred for readability.",
-                "spacing": "0.5–0.75 inch margins, 1.3 line spacing, compact section spacing.",
-                "section_order": "Experience → Education → Skills → Projects → Certifications"
-            },
-            "design_advice": "Keep the design simple and ATS-friendly. Avoid graphics, icons, or excessive color use."
-        }
-    }
+
 
 
 """
@@ -619,45 +360,10 @@ def insert_resume_to_supabase(supabase, resume_name, resume_data, user_id=None,
         logging.error("Error inserting resume: %s", e)
         return None
 
-#Generic function to retrieve text from either PDF or DOCX resume files
-def extract_resume_text(file_path):
-    extension = os.path.splitext(file_path)[1].lower()
-    if extension == ".pdf":
-        return extract_pdf_text(file_path)
-    elif extension == ".docx":
-        return extract_doc_text(file_path)
-    else:
-        raise ValueError("Unsupported file type. Only PDF and DOCX are supported.")
-
 
 
-def extract_doc_text(doc_path):
-    #Given a Word document, parse it and extract the text
-    from docx import Document
-    document = Document(doc_path)
 
-    #Put the text from the document into a list, removing empty lines
-    resume_text = []
-    for para in document.paragraphs:
-        if para.text.strip():
-            resume_text.append(para.text.strip())
 
-    #Combine the list into a single string
-    resume_string = "\n".join(resume_text)
-    return resume_string
-
-#Extract text from a PDF file
-import fitz
-
-def extract_pdf_text(pdf_path):
-    doc = fitz.open(pdf_path)
-    text = ""
-
-    for page in doc:
-        text += page.get_text()
-
-    doc.close()
-    return text.strip()
 
 #Retrieves all resumes for a given user
 def get_resumes_for_user(supabase, user_id):
@@ -799,71 +505,6 @@ def safe_delete_resume(supabase, user_id, resume_record):
     return False
 
 
-#Parses resume text into structured JSON using AI
-def parse_doc_text(resume_string, client):
-    messages = [{
-        "role": "system",
-        "content": """Your job is to parse the text from a Word or PDF document which is a professional resume, 
-            and extract ALL information relevant to a resume to create a JSON object that follows this schema (the values are examples):
-            {
-            "full_name": "Zach Loucks",
-            "email": "zach@example.com",
-            "phone": "123-456-7890",
-            "linkedin": "https://linkedin.com/in/zloucks",
-            "summary": "...",
-            "experience": [
-            {
-            "job_title": "Data Analyst",
-            "company": "XYZ Corp",
-            "start_date": "2022-01",
-            "end_date": "2023-12",
-            "description": "Worked on analytics..."
-            }
-            ],
-            "education": [
-            {
-            "degree": "BS Informatics",
-            "school": "IUPUI",
-            "start_date": "2020-08",
-            "end_date": "2024-05"
-            }
-            ],
-            "skills": ["Python", "SQL", "Data Analysis"],
-            "certifications": [],
-            "projects": [],
-            "volunteer": []
-            }
-            Additionally, you must return only the JSON object"""},
-        {
-            "role": "user",
-            "content": f"Here is the resume text: \n\n{resume_string}\n\nPlease parse this text and extract the relevant information to create a JSON object that follows the schema provided in the system message."
-    }]
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=messages,
-            temperature=0.0
-        )
-        parsed_json = response.choices[0].message.content.strip()
-        #Validate the JSON output from Grok
-        match = re.search(r'\{.*\}', parsed_json, re.DOTALL)
-        if match:
-            return json.loads(match.group(0))
-        logging.info("No valid JSON found in AI's response.")
-    except Exception as e:
-        logging.error("Error during AI parsing: %s", e)
-    return None
-#Normalize descriptions in experience to be lists of bullet points rather than one string
-def normalize_descriptions(resume_json):
-    for job in resume_json.get("experience", []):
-        desc = job.get("description")
-
-        if isinstance(desc, str):
-            bullets = [s.strip() for s in desc.split(".") if s.strip()]
-            job["description"] = bullets
-
-    return resume_json
 
 
 #Analyze the resume provided by user for improvements
@@ -1033,6 +674,8 @@ def upload_original_file_to_supabase(supabase, file_path, user_id, resume_name):
 
 def main():
 
+    #Console sessions keep plain-text output; the file is written off-thread and rotated
+    setup_logging(json_format=False, log_file="resume_backend.log", level="INFO")
     supabase = create_supabase_client()
     client = create_openai_client()
 
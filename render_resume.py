@@ -171,8 +171,68 @@ def should_use_compact_mode(resume_json):
 
 
 
+# Density levels, from the template's normal layout to the tightest fallback.
+# Level 1 is the templates' own compact mode, the extra levels layer on top of it.
+DENSE_CSS = """
+body.dense {
+    font-size: 9.8pt !important;
+    line-height: 1.12 !important;
+}
+body.dense h2 {
+    margin-top: 10px !important;
+    margin-bottom: 3px !important;
+}
+body.dense .job,
+body.dense .edu-item,
+body.dense .project-item,
+body.dense .vol-item,
+body.dense .cert-item {
+    margin-bottom: 4px !important;
+}
+"""
+
+TIGHT_CSS = """
+body.tight {
+    font-size: 9.3pt !important;
+    line-height: 1.08 !important;
+    margin: 0.45in !important;
+}
+body.tight h1 {
+    font-size: 19pt !important;
+}
+body.tight h2 {
+    margin-top: 8px !important;
+    font-size: 12pt !important;
+}
+body.tight .contact {
+    margin-bottom: 8px !important;
+}
+"""
+
+DENSITY_LEVELS = [
+    {"body_class": "", "css": ""},
+    {"body_class": "compact", "css": ""},
+    {"body_class": "compact dense", "css": DENSE_CSS},
+    {"body_class": "compact dense tight", "css": DENSE_CSS + TIGHT_CSS},
+]
+
+
+def heuristic_density_level(resume_json):
+    # Fallback when the layout can't be measured
+    return 1 if should_use_compact_mode(resume_json) else 0
+
+
+def apply_density(html, level):
+    density = DENSITY_LEVELS[max(0, min(level, len(DENSITY_LEVELS) - 1))]
+    if density["css"]:
+        html = html.replace("</head>", f"<style>{density['css']}</style>\n</head>", 1)
+    if density["body_class"]:
+        html = html.replace("<body>", f'<body class="{density["body_class"]}">', 1)
+    return html
+
+
 # Final HTML Resume Generator
-def generate_html_from_template(resume_json, preferences):
+def generate_html_from_template(resume_json, preferences, density=None):
 
     # Template selection
     style_choice = preferences.get("style_choice", "modern").lower()
@@ -205,8 +265,8 @@ def generate_html_from_template(resume_json, preferences):
         .replace("{{volunteer_section}}", volunteer_html)
     )
 
-    if should_use_compact_mode(resume_json):
-        final_html = final_html.replace("<body>", '<body class="compact">')
+    if density is None:
+        density = heuristic_density_level(resume_json)
 
-    return final_html
+    return apply_density(final_html, density)
 
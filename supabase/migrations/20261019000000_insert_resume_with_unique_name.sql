@@ -0,0 +1,41 @@
+-- Allocate a unique resume name and insert the row in one transaction, so saving
+-- a resume is a single round trip instead of N name checks + insert + re-select.
+--
+-- p_row holds the resume columns as JSON. resume_name is the requested base name;
+-- if it is taken for this user, " (1)", " (2)", ... is appended like
+-- generate_unique_resume_name does. Returns {"id": ..., "resume_name": ...}.
+create or replace function public.insert_resume_with_unique_name(p_row jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    rec public.resumes := jsonb_populate_record(null::public.resumes, p_row);
+    base_name text := btrim(p_row->>'resume_name');
+    final_name text := base_name;
+    suffix integer := 0;
+    new_id public.resumes.id%type;
+begin
+    -- Serialize name allocation per user so concurrent saves can't pick the same name
+    perform pg_advisory_xact_lock(hashtext('resume_name:' || rec.user_id::text));
+
+    while exists (
+        select 1 from public.resumes r
+        where r.user_id = rec.user_id and r.resume_name = final_name
+    ) loop
+        suffix := suffix + 1;
+        final_name := base_name || ' (' || suffix || ')';
+    end loop;
+
+    insert into public.resumes (
+        user_id, resume_json, resume_name, resume_html,
+        preferences, original_file_path, source_type
+    )
+    values (
+        rec.user_id, rec.resume_json, final_name, rec.resume_html,
+        rec.preferences, rec.original_file_path, rec.source_type
+    )
+    returning id into new_id;
+
+    return jsonb_build_object('id', new_id, 'resume_name', final_name);
+end;
+$$;